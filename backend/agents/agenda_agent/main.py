@@ -1,10 +1,11 @@
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
 from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.prompt_template import PromptTemplateConfig
 from semantic_kernel.functions import KernelArguments
-from typing import List, Dict, Any
-import json
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional, Tuple
+import asyncio
 
 from a2a_python_sdk import (
     AgentCard, AgentSkill, AgentExecutor, DefaultRequestHandler,
@@ -13,19 +14,32 @@ from a2a_python_sdk import (
 
 from ...shared.models import AgentRequest, AgentResponse, SlideContent, SlideAgenda
 from ...shared.config import settings
+from ...shared.cancellation import CancellationRegistry, RequestCancelledError
+from ...shared.cache import MinHashLSHIndex, canonical_hash, create_llm_response_cache
+from ...shared.telemetry import telemetry_manager
+from ...shared.llm_clients import LLMClientPool, create_execution_settings, resolve_llm_config
+from ...shared.llm_gateway import llm_gateway
+from ...shared.llm_output import JsonArrayStreamParser, LLMJsonParser, response_format
 
 
 class AgendaGenerationExecutor(AgentExecutor):
     def __init__(self):
-        self.kernel = Kernel()
-        
-        # Azure OpenAI service setup
-        self.chat_service = AzureChatCompletion(
-            deployment_name=settings.default_llm_model,
-            endpoint=settings.azure_ai_foundry_endpoint,
-            api_key=settings.azure_ai_foundry_key
+        self.cancellation = CancellationRegistry()
+        # リクエストの LLM 設定ごとに Kernel・チャットサービスを作り置きして再利用する
+        self.llm_clients = LLMClientPool("agenda", self._register_functions)
+        # 同じプロンプト・モデル設定のアジェンダ生成は LLM を呼ばずに応答を再利用する
+        self.response_cache = create_llm_response_cache("agenda")
+        # 言い換えたプロンプトには過去のアジェンダを下書きとして即座に返す（承認時にユーザーが確認する）
+        self.draft_index: MinHashLSHIndex[Dict[str, Any]] = MinHashLSHIndex(
+            settings.agenda_draft_max_entries,
+            settings.agenda_draft_ttl_seconds,
+            num_perm=settings.agenda_draft_num_perm,
+            bands=settings.agenda_draft_bands
+        )
+        self._drafts = telemetry_manager.create_counter(
+            "agenda_draft_requests_total",
+            "類似プロンプトのアジェンダ下書きの参照数（result=hit/miss/skipped）"
         )
-        self.kernel.add_service(self.chat_service)
         
         self._setup_prompts()
     
@@ -67,27 +81,89 @@ class AgendaGenerationExecutor(AgentExecutor):
 
 スライド構成を生成してください：
 """
-        
+
+        self.agenda_prompt = agenda_prompt
+        self.json_parser = LLMJsonParser("agenda")
+        # 構造化出力に対応したモデルではスキーマに沿った JSON だけを返させる
+        self.agenda_format = response_format("slide_agenda", SlideAgenda.schema())
+    
+    def _register_functions(self, kernel: Kernel, llm_config: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM 設定用の Kernel にアジェンダ生成関数を登録（設定ごとに最初の 1 回だけ呼ばれる）"""
         prompt_config = PromptTemplateConfig(
-            template=agenda_prompt,
+            template=self.agenda_prompt,
             name="agenda_generation",
             description="スライドアジェンダ生成",
-            input_variables=["prompt", "max_slides", "reference_urls"]
+            input_variables=["prompt", "max_slides", "reference_urls"],
+            execution_settings={"default": create_execution_settings(llm_config, self.agenda_format)}
         )
         
-        self.agenda_function = self.kernel.add_function(
-            plugin_name="AgendaPlugin",
-            function_name="generate_agenda",
-            prompt_template_config=prompt_config
-        )
+        return {
+            "agenda": kernel.add_function(
+                plugin_name="AgendaPlugin",
+                function_name="generate_agenda",
+                prompt_template_config=prompt_config
+            )
+        }
     
-    async def execute(self, request: AgentRequest) -> AgentResponse:
-        """アジェンダ生成を実行"""
+    async def execute(
+        self,
+        request: AgentRequest,
+        on_slide: Optional[Callable[[SlideContent], Awaitable[None]]] = None
+    ) -> AgentResponse:
+        """アジェンダ生成を実行（on_slide を指定するとスライドが確定するたびに呼び出す）"""
+        try:
+            return await self.cancellation.run(request.request_id, self._execute(request, on_slide))
+        except RequestCancelledError:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Cancelled"
+            )
+    
+    async def execute_stream(self, request: AgentRequest) -> AsyncIterator[AgentResponse]:
+        """アジェンダ生成を実行し、確定したスライドまでの途中経過を返してから最終結果を返す"""
+        partials: asyncio.Queue = asyncio.Queue()
+        slides: List[SlideContent] = []
+        max_slides = max(int(request.payload.get("max_slides", 10)), 1)
+        
+        async def on_slide(slide: SlideContent):
+            slides.append(slide)
+            await partials.put(AgentResponse(
+                request_id=request.request_id,
+                success=True,
+                result={"slides": [s.dict() for s in slides]},
+                progress=min(99, int(100 * len(slides) / max_slides))
+            ))
+        
+        task = asyncio.ensure_future(self.execute(request, on_slide))
+        try:
+            while True:
+                next_partial = asyncio.ensure_future(partials.get())
+                done, _ = await asyncio.wait({next_partial, task}, return_when=asyncio.FIRST_COMPLETED)
+                if next_partial in done:
+                    yield next_partial.result()
+                    continue
+                next_partial.cancel()
+                break
+            
+            while not partials.empty():
+                yield partials.get_nowait()
+            yield task.result()
+        finally:
+            # 呼び出し元が途中で読むのをやめた場合（切断など）は生成も止める
+            task.cancel()
+    
+    async def _execute(
+        self,
+        request: AgentRequest,
+        on_slide: Optional[Callable[[SlideContent], Awaitable[None]]] = None
+    ) -> AgentResponse:
         try:
             payload = request.payload
             prompt = payload.get("prompt", "")
             max_slides = payload.get("max_slides", 10)
             reference_urls = payload.get("reference_urls", [])
+            llm_config = resolve_llm_config(payload.get("llm_config"))
             
             if not prompt:
                 return AgentResponse(
@@ -103,34 +179,55 @@ class AgendaGenerationExecutor(AgentExecutor):
                 reference_urls="\n".join(reference_urls) if reference_urls else "なし"
             )
             
-            result = await self.kernel.invoke(self.agenda_function, arguments)
-            agenda_text = str(result)
+            cache_key = None
+            cached_text = None
+            if self.response_cache.should_cache(llm_config["temperature"]):
+                cache_key = self._response_cache_key(arguments, llm_config)
+                if not payload.get("bypass_cache", False):
+                    cached_text = await self.response_cache.get(cache_key)
             
-            # JSON パース
-            try:
-                # JSONブロックを抽出
-                if "```json" in agenda_text:
-                    start = agenda_text.find("```json") + 7
-                    end = agenda_text.find("```", start)
-                    agenda_text = agenda_text[start:end].strip()
+            if cached_text is None:
+                draft = self._find_draft(request, payload)
+                if draft:
+                    agenda_data, similarity = draft
+                    return AgentResponse(
+                        request_id=request.request_id,
+                        success=True,
+                        result={**agenda_data, "draft": {"similarity": round(similarity, 3)}}
+                    )
                 
-                agenda_data = json.loads(agenda_text)
-                agenda = SlideAgenda(**agenda_data)
-                
-                return AgentResponse(
-                    request_id=request.request_id,
-                    success=True,
-                    result=agenda.dict()
-                )
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                # フォールバック: シンプルなアジェンダ生成
+                response_text = await self._generate(llm_config, arguments, on_slide)
+            else:
+                response_text = cached_text
+            agenda = self._parse_agenda(response_text)
+            # 解析できない応答は再生成する（ストリーミングで通知済みのスライドは最終結果で置き換わる）
+            reinvocations = 0
+            while agenda is None and reinvocations < settings.llm_json_max_reinvocations:
+                reinvocations += 1
+                cached_text = None
+                response_text = await self._generate(llm_config, arguments, None)
+                agenda = self._parse_agenda(response_text)
+            
+            if agenda is None:
+                # フォールバック: シンプルなアジェンダ生成（既定の構成であることを呼び出し元に伝える）
                 agenda = self._create_fallback_agenda(prompt, max_slides)
                 return AgentResponse(
                     request_id=request.request_id,
                     success=True,
-                    result=agenda.dict()
+                    result=agenda.dict(),
+                    degradations=["アジェンダを解析できなかったため既定の構成を使用"]
                 )
+            
+            # パースできた応答だけをキャッシュする（フォールバックを再利用しない）
+            if cache_key and cached_text is None:
+                await self.response_cache.set(cache_key, response_text)
+            self._remember_draft(request, payload, agenda)
+            
+            return AgentResponse(
+                request_id=request.request_id,
+                success=True,
+                result=agenda.dict()
+            )
         
         except Exception as e:
             return AgentResponse(
@@ -139,9 +236,118 @@ class AgendaGenerationExecutor(AgentExecutor):
                 error=str(e)
             )
     
+    async def _generate(
+        self,
+        llm_config: Dict[str, Any],
+        arguments: KernelArguments,
+        on_slide: Optional[Callable[[SlideContent], Awaitable[None]]]
+    ) -> str:
+        """LLM でアジェンダを生成（on_slide 指定時はストリーミングで受け取り、閉じたスライドから通知）"""
+        async with self.llm_clients.lease(llm_config) as llm:
+            function = llm.functions["agenda"]
+            if on_slide is None:
+                return str(await llm_gateway.invoke(
+                    llm.kernel, function, arguments, lane="interactive",
+                    deployment=llm.deployment, max_tokens=llm_config["max_tokens"]
+                ))
+            
+            parser = JsonArrayStreamParser("slides")
+            chunks = []
+            async for messages in llm_gateway.invoke_stream(
+                llm.kernel, function, arguments, lane="interactive",
+                deployment=llm.deployment, max_tokens=llm_config["max_tokens"]
+            ):
+                text = str(messages[0]) if messages else ""
+                chunks.append(text)
+                for item in parser.feed(text):
+                    try:
+                        slide = SlideContent(**item)
+                    except (TypeError, ValueError):
+                        continue
+                    await on_slide(slide)
+            return "".join(chunks)
+    
+    def _parse_agenda(self, text: str) -> Optional[SlideAgenda]:
+        """LLM の応答をアジェンダとして読み込む（修復で途中までになったスライドは捨てる）"""
+        try:
+            data, repaired = self.json_parser.parse(text)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("slides"), list):
+            return None
+        
+        slides = []
+        for item in data["slides"]:
+            try:
+                slides.append(SlideContent(**item))
+            except (TypeError, ValueError):
+                if not repaired:
+                    return None
+        if not slides:
+            return None
+        
+        # 修復した場合はページ数が実際のスライド数と合わないため数え直す
+        total_pages = len(slides) if repaired else data.get("total_pages", len(slides))
+        try:
+            return SlideAgenda(
+                slides=slides,
+                total_pages=total_pages,
+                estimated_duration=data.get("estimated_duration", len(slides) * 2)
+            )
+        except (TypeError, ValueError):
+            return None
+    
+    def _draft_scope(self, request: AgentRequest, payload: Dict[str, Any]) -> str:
+        """下書きを共有できる範囲（同じユーザー・スライド数・参照URL・モデルのリクエスト同士）"""
+        llm_config = resolve_llm_config(payload.get("llm_config"))
+        return canonical_hash({
+            "user_id": request.user_id,
+            "max_slides": payload.get("max_slides", 10),
+            "reference_urls": sorted(payload.get("reference_urls", [])),
+            "llm": [llm_config["provider"], llm_config["model_name"]],
+        })
+    
+    def _find_draft(
+        self,
+        request: AgentRequest,
+        payload: Dict[str, Any]
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """類似したプロンプトで生成済みのアジェンダを探す（自動承認時は確認されないため使わない）"""
+        if (
+            not settings.agenda_draft_enabled
+            or payload.get("auto_approval", False)
+            or payload.get("bypass_cache", False)
+        ):
+            self._drafts.add(1, {"result": "skipped"})
+            return None
+        
+        match = self.draft_index.query(payload.get("prompt", ""), self._draft_scope(request, payload))
+        if match is None or match[1] < settings.agenda_draft_similarity_threshold:
+            self._drafts.add(1, {"result": "miss"})
+            return None
+        self._drafts.add(1, {"result": "hit"})
+        return match
+    
+    def _remember_draft(self, request: AgentRequest, payload: Dict[str, Any], agenda: SlideAgenda):
+        """生成したアジェンダを類似プロンプトの下書き候補として登録"""
+        if not settings.agenda_draft_enabled:
+            return
+        scope = self._draft_scope(request, payload)
+        prompt = payload.get("prompt", "")
+        self.draft_index.add((scope, prompt), prompt, agenda.dict(), scope)
+    
+    def _response_cache_key(self, arguments: KernelArguments, llm_config: Dict[str, Any]) -> str:
+        """プロンプトテンプレートと引数（描画済みプロンプトを一意に決める）とモデル設定からキーを作成"""
+        return self.response_cache.key(
+            self.agenda_prompt,
+            arguments={name: str(value) for name, value in arguments.items()},
+            endpoint=settings.azure_ai_foundry_endpoint,
+            **llm_config
+        )
+    
     async def cancel(self, request_id: str) -> bool:
-        """処理をキャンセル"""
-        return True
+        """処理をキャンセル（実行中の LLM 呼び出しや HTTP リクエストも中断される）"""
+        return self.cancellation.cancel(request_id)
     
     def _create_fallback_agenda(self, prompt: str, max_slides: int) -> SlideAgenda:
         """フォールバック用のシンプルなアジェンダ生成"""
@@ -193,8 +399,32 @@ agent_skills = [
 executor = AgendaGenerationExecutor()
 request_handler = DefaultRequestHandler(agent_card, agent_skills, executor)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """LLM クライアントの終了"""
+    yield
+    await executor.llm_clients.aclose()
+
+
 # FastAPI app
-app = FastAPI(title="Agenda Generation Agent")
+app = FastAPI(title="Agenda Generation Agent", lifespan=lifespan)
+
+
+@app.post("/cancel/{request_id}")
+async def cancel_request(request_id: str):
+    """実行中のリクエストをキャンセル"""
+    return {"cancelled": await executor.cancel(request_id)}
+
+
+@app.post("/stream")
+async def stream_request(request: AgentRequest):
+    """アジェンダ生成の途中経過を NDJSON で返す（最後の行が最終結果）"""
+    async def body():
+        async for response in executor.execute_stream(request):
+            yield response.json() + "\n"
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
 
 # Create A2A application
 a2a_app = A2AStarletteApplication(app, request_handler)
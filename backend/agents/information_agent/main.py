@@ -1,10 +1,12 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from azure.ai.projects import AIProjectsClient
 from azure.ai.projects.models import AgentRunRequest
 from azure.identity import DefaultAzureCredential
-from typing import Dict, Any, List
+from typing import Awaitable, Callable, Dict, Any, List, Optional
 import httpx
 import json
+import asyncio
 
 from a2a_python_sdk import (
     AgentCard, AgentSkill, AgentExecutor, DefaultRequestHandler,
@@ -13,10 +15,24 @@ from a2a_python_sdk import (
 
 from ...shared.models import AgentRequest, AgentResponse
 from ...shared.config import settings
+from ...shared.storage import artifact_store
+from ...shared.cache import SingleFlight, TTLCache
+from ...shared.cancellation import CancellationRegistry, RequestCancelledError
+from ...shared.deadlines import RequestBudget
+
+
+# 取得に失敗した結果（None）のキャッシュ上の値（TTLCache は None をキャッシュなしとして扱うため）
+_FAILED_FETCH = object()
 
 
 class InformationCollectionExecutor(AgentExecutor):
     def __init__(self):
+        self.cancellation = CancellationRegistry()
+        # バッチ内で共有する URL 取得・検索結果（キーは batch_id を含む）
+        self._batch_cache: TTLCache[Any] = TTLCache(
+            settings.batch_fetch_cache_max_entries, settings.batch_fetch_cache_ttl_seconds
+        )
+        self._batch_fetches = SingleFlight()
         self.ai_client = AIProjectsClient(
             endpoint=settings.azure_ai_foundry_endpoint,
             credential=DefaultAzureCredential()
@@ -24,10 +40,22 @@ class InformationCollectionExecutor(AgentExecutor):
     
     async def execute(self, request: AgentRequest) -> AgentResponse:
         """情報収集を実行"""
+        try:
+            return await self.cancellation.run(request.request_id, self._execute(request))
+        except RequestCancelledError:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Cancelled"
+            )
+    
+    async def _execute(self, request: AgentRequest) -> AgentResponse:
         try:
             payload = request.payload
-            agenda = payload.get("agenda", {})
+            agenda = await artifact_store.resolve(payload.get("agenda", {}), request.user_id)
             reference_urls = payload.get("reference_urls", [])
+            batch_id = payload.get("batch_id")
+            budget = RequestBudget(request.deadline)
             
             if not agenda:
                 return AgentResponse(
@@ -36,25 +64,37 @@ class InformationCollectionExecutor(AgentExecutor):
                     error="Agenda is required"
                 )
             
-            # 各スライドの情報を収集
-            collected_info = {}
+            # 期限までの残り時間が少ない場合は参照URLの数を絞り、補足検索を省略する
+            search_bing = True
+            if not budget.allows(settings.deadline_full_information_seconds):
+                limit = settings.deadline_reduced_reference_urls
+                if len(reference_urls) > limit:
+                    reference_urls = reference_urls[:limit]
+                    budget.degrade(f"参照URLを先頭 {limit} 件に制限")
+                search_bing = False
+                budget.degrade("Bing 検索を省略")
+            
+            # 各スライドの情報を並列に収集
             slides = agenda.get("slides", [])
+            semaphore = asyncio.Semaphore(settings.information_concurrency)
             
-            for slide in slides:
-                slide_num = slide.get("page_number", 0)
-                slide_title = slide.get("title", "")
-                slide_content = slide.get("content", "")
-                
-                # Microsoft Learn とBing Search で情報収集
-                slide_info = await self._collect_slide_information(
-                    slide_title, slide_content, reference_urls
-                )
-                collected_info[f"slide_{slide_num}"] = slide_info
+            async def collect(slide: Dict[str, Any]):
+                async with semaphore:
+                    # Microsoft Learn とBing Search で情報収集
+                    slide_info = await self._collect_slide_information(
+                        slide.get("title", ""), slide.get("content", ""), reference_urls, batch_id,
+                        search_bing
+                    )
+                # 大きな収集結果は成果物ストアに置き、参照だけを返す（スライドエージェントが取得する）
+                return f"slide_{slide.get('page_number', 0)}", await artifact_store.offload(slide_info, request.user_id)
+            
+            collected_info = dict(await asyncio.gather(*(collect(slide) for slide in slides)))
             
             return AgentResponse(
                 request_id=request.request_id,
                 success=True,
-                result=collected_info
+                result=collected_info,
+                degradations=budget.degradations
             )
         
         except Exception as e:
@@ -65,25 +105,33 @@ class InformationCollectionExecutor(AgentExecutor):
             )
     
     async def cancel(self, request_id: str) -> bool:
-        """処理をキャンセル"""
-        return True
+        """処理をキャンセル（実行中の LLM 呼び出しや HTTP リクエストも中断される）"""
+        return self.cancellation.cancel(request_id)
     
     async def _collect_slide_information(
         self, 
         title: str, 
         content: str, 
-        reference_urls: List[str]
+        reference_urls: List[str],
+        batch_id: Optional[str] = None,
+        search_bing: bool = True
     ) -> Dict[str, Any]:
         """個別スライドの情報を収集"""
         
         # Microsoft Learn MCP Server を使用した情報収集
-        learn_info = await self._search_microsoft_learn(title, content)
+        learn_info = await self._shared_in_batch(
+            batch_id, ("learn", title, content), lambda: self._search_microsoft_learn(title, content)
+        )
         
         # 参照URLからの情報収集
-        url_info = await self._collect_from_urls(reference_urls, title)
+        url_info = await self._collect_from_urls(reference_urls, title, batch_id)
         
         # Bing Search を使用した補足情報
-        bing_info = await self._search_with_bing(title, content)
+        bing_info = {}
+        if search_bing:
+            bing_info = await self._shared_in_batch(
+                batch_id, ("bing", title, content), lambda: self._search_with_bing(title, content)
+            )
         
         return {
             "text": self._combine_information(learn_info, url_info, bing_info),
@@ -110,7 +158,47 @@ class InformationCollectionExecutor(AgentExecutor):
             print(f"Microsoft Learn search failed: {e}")
             return {"text": "", "sources": [], "images": [], "tables": []}
     
-    async def _collect_from_urls(self, urls: List[str], topic: str) -> Dict[str, Any]:
+    async def _shared_in_batch(
+        self,
+        batch_id: Optional[str],
+        key: tuple,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """バッチ内で同じ取得を 1 回にまとめる（バッチ外のリクエストは毎回取得）"""
+        if not batch_id:
+            return await fetch()
+        
+        cache_key = (batch_id,) + key
+        cached = self._batch_cache.get(cache_key)
+        if cached is not None:
+            return None if cached is _FAILED_FETCH else cached
+        
+        async def fetch_and_store():
+            result = await fetch()
+            # 失敗した取得もバッチ内の他のジョブで繰り返さないようキャッシュする
+            self._batch_cache.set(cache_key, _FAILED_FETCH if result is None else result)
+            return result
+        
+        result, _ = await self._batch_fetches.do(cache_key, fetch_and_store)
+        return result
+    
+    async def _fetch_url(self, client: httpx.AsyncClient, url: str) -> Optional[str]:
+        """URL の本文を取得（失敗時は None）"""
+        try:
+            response = await client.get(url)
+        except httpx.HTTPError as e:
+            print(f"Failed to fetch {url}: {e}")
+            return None
+        if response.status_code == 200:
+            return response.text
+        return None
+    
+    async def _collect_from_urls(
+        self,
+        urls: List[str],
+        topic: str,
+        batch_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """指定されたURLからの情報収集"""
         collected_text = []
         collected_images = []
@@ -120,11 +208,12 @@ class InformationCollectionExecutor(AgentExecutor):
                 try:
                     if not url.strip():
                         continue
-                        
-                    response = await client.get(url)
-                    if response.status_code == 200:
+                    
+                    content = await self._shared_in_batch(
+                        batch_id, ("url", url), lambda: self._fetch_url(client, url)
+                    )
+                    if content is not None:
                         # 簡単なテキスト抽出（実際にはより高度なスクレイピングが必要）
-                        content = response.text
                         # TODO: Implement proper content extraction
                         extracted = self._extract_relevant_content(content, topic)
                         collected_text.append(extracted)
@@ -132,7 +221,7 @@ class InformationCollectionExecutor(AgentExecutor):
                         # 画像URL抽出
                         images = self._extract_image_urls(content, url)
                         collected_images.extend(images)
-                        
+                
                 except Exception as e:
                     print(f"Failed to collect from {url}: {e}")
                     continue
@@ -250,8 +339,22 @@ agent_skills = [
 executor = InformationCollectionExecutor()
 request_handler = DefaultRequestHandler(agent_card, agent_skills, executor)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """成果物ストアの初期化と終了"""
+    await artifact_store.initialize()
+    yield
+    await artifact_store.close()
+
+
 # FastAPI app
-app = FastAPI(title="Information Collection Agent")
+app = FastAPI(title="Information Collection Agent", lifespan=lifespan)
+
+
+@app.post("/cancel/{request_id}")
+async def cancel_request(request_id: str):
+    """実行中のリクエストをキャンセル"""
+    return {"cancelled": await executor.cancel(request_id)}
 
 # Create A2A application
 a2a_app = A2AStarletteApplication(app, request_handler)
@@ -1,27 +1,87 @@
 from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Header
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List, Optional, Dict, Any
+from typing import Awaitable, Callable, List, Optional, Dict, Any, Tuple
 import uuid
+import json
 import asyncio
+import logging
+import socket
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from a2a_python_sdk import (
     AgentCard, AgentSkill, AgentExecutor, DefaultRequestHandler,
-    A2AStarletteApplication, A2AClient
+    A2AStarletteApplication
 )
 
-from ..shared.models import (
-    SlideGenerationRequest, SlideGenerationJob, SlideGenerationStatus,
+from ...shared.models import (
+    SlideGenerationRequest, SlideGenerationBatchRequest, SlideGenerationJob, SlideGenerationStatus,
     SlideTemplate, PromptTemplate, LLMConfig, UserSettings, GenerationHistory,
-    AgentRequest, AgentResponse
+    AgentRequest, AgentResponse, SlideAgenda, SlideContent, JobQueueEntry, JobCheckpoint,
+    DeckVersion
 )
-from ..shared.storage import cosmos_client, blob_client
-from ..shared.auth import auth_manager
-from ..shared.config import settings
+from ...shared.storage import cosmos_client, blob_client, artifact_store
+from ...shared.auth import auth_manager
+from ...shared.config import settings
+from ...shared.transport import AGENT_NAMES, create_agent_transport
+from ...shared.cache import SingleFlight, TTLCache, canonical_hash
+from ...shared.telemetry import telemetry_manager
+from ...shared.resilience import AdmissionController, AdmissionRejectedError, StageCaller
+from ...shared.deadlines import deadline_after
+from ...shared.jobs import (
+    TERMINAL_STATUSES, JobStateWriter, JobWorkerPool, create_job_queue, format_sse,
+    job_event_broker
+)
+from .prefetch import SpeculativePrefetcher
+
+
+logger = logging.getLogger(__name__)
 
 
 class OrchestrationExecutor(AgentExecutor):
+    def __init__(self):
+        # バックグラウンド処理は永続キュー経由でワーカープールが実行する
+        self.job_queue = create_job_queue()
+        self.job_queue.on_positions_changed = self._publish_queue_positions
+        self.worker_pool = JobWorkerPool(
+            self.job_queue, self._run_queue_entry, settings.job_worker_concurrency
+        )
+        self.state_writer = JobStateWriter()
+        # 下流エージェントの呼び出し方法（A2A over HTTP / 同一プロセス内）
+        self.transport = create_agent_transport()
+        self.stage_caller = StageCaller()
+        self.admission = AdmissionController(self.stage_caller, self.job_queue.oldest_wait_seconds)
+        # アジェンダ承認待ちの間の先行情報収集（待機中のジョブがあるときは行わない）
+        self.prefetcher = SpeculativePrefetcher(is_idle=lambda: self.job_queue.depth == 0)
+        # 永続キューを持つレプリカの識別子（起動時は自分が所有するジョブだけを再開する）
+        self.instance_id = settings.orchestrator_instance_id or socket.gethostname()
+        
+        # キャンセル用: 実行中のジョブタスクと、各ジョブが下流エージェントに発行中のリクエスト
+        self._job_tasks: Dict[str, asyncio.Task] = {}
+        self._inflight_requests: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._cancelled_jobs: set = set()
+        
+        # 重複投稿の抑止: 冪等キー → ジョブID（同時投稿は SingleFlight でまとめる）
+        self._recent_submissions: TTLCache[str] = TTLCache(
+            settings.idempotency_max_entries, settings.idempotency_window_seconds
+        )
+        self._submissions = SingleFlight()
+        self._deduplicated = telemetry_manager.create_counter(
+            "slide_generation_deduplicated_total",
+            "既存ジョブにまとめられたスライド生成リクエスト数"
+        )
+        
+        # 生成結果キャッシュ: リクエスト・テンプレート版・モデル設定のハッシュ → アジェンダと結果URL
+        self._result_cache: TTLCache[Dict[str, Any]] = TTLCache(
+            settings.result_cache_max_entries, settings.result_cache_ttl_seconds
+        )
+        self._result_cache_requests = telemetry_manager.create_counter(
+            "result_cache_requests_total",
+            "生成結果キャッシュの参照数（result=hit/miss/bypass）"
+        )
+    
     async def execute(self, request: AgentRequest) -> AgentResponse:
         """オーケストレーションエージェントのメイン実行ロジック"""
         try:
@@ -35,6 +95,9 @@ class OrchestrationExecutor(AgentExecutor):
                     success=False,
                     error=f"Unknown agent type: {request.agent_type}"
                 )
+        except AdmissionRejectedError:
+            # 受け付けの拒否は呼び出し元で 429 として返す
+            raise
         except Exception as e:
             return AgentResponse(
                 request_id=request.request_id,
@@ -43,153 +106,1015 @@ class OrchestrationExecutor(AgentExecutor):
             )
     
     async def cancel(self, request_id: str) -> bool:
-        """実行中のジョブをキャンセル"""
-        # TODO: ジョブキャンセル実装
+        """実行中のジョブをキャンセル（request_id にはジョブIDを指定）"""
+        cancelled = await self.job_queue.remove_job(request_id)
+        return await self._cancel_running_job(request_id) or cancelled
+    
+    async def cancel_job(self, job_id: str, user_id: str) -> Optional[SlideGenerationJob]:
+        """ジョブをキャンセルし、下流エージェントの処理も中断する"""
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
+        if not job_data:
+            return None
+        
+        job = SlideGenerationJob(**job_data)
+        if job.status in TERMINAL_STATUSES:
+            return job
+        
+        # ローカルで実行中のタスクは cancel() がタスクの終了まで待つ
+        if not await self.cancel(job_id) and job.owner_id and job.owner_id != self.instance_id:
+            # 他のレプリカが処理中のジョブは、キャンセル要求を記録して所有者にステージの区切りで止めさせる
+            await cosmos_client.upsert_item("job_cancellations", {"id": job_id, "user_id": user_id})
+        self.prefetcher.discard(job_id)
+        
+        # 最初に読んだ状態は書き込みの遅延やキャンセル中の進行で古い可能性があるため、反映してから読み直す
+        await self.state_writer.flush(job_id)
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
+        if not job_data:
+            return None
+        job = SlideGenerationJob(**job_data)
+        if job.status in TERMINAL_STATUSES:
+            return job
+        
+        await self._mark_cancelled(job)
+        return job
+    
+    async def _mark_cancelled(self, job: SlideGenerationJob):
+        """キャンセル状態にする（結果やチェックポイントを上書きしないよう状態の項目だけを書き込む）"""
+        job.status = SlideGenerationStatus.CANCELLED
+        job.current_step = "キャンセルされました"
+        job.queue_position = None
+        job.updated_at = datetime.utcnow()
+        await job_event_broker.publish(job)
+        
+        data = json.loads(job.json())
+        await self.state_writer.submit_fields(job.id, job.user_id, {
+            field: data[field] for field in ("status", "current_step", "queue_position", "updated_at")
+        })
+        await self.state_writer.flush(job.id)
+    
+    async def _stop_if_cancel_requested(self, job: SlideGenerationJob):
+        """他のレプリカで受け付けたキャンセル要求があれば、ステージの区切りでジョブを止める"""
+        if not await cosmos_client.read_item("job_cancellations", job.id, job.user_id):
+            return
+        self._cancelled_jobs.add(job.id)
+        await self._mark_cancelled(job)
+        raise asyncio.CancelledError()
+    
+    async def _clear_cancel_request(self, job: SlideGenerationJob):
+        """再開するジョブに残っているキャンセル要求を削除"""
+        await cosmos_client.delete_item("job_cancellations", job.id, job.user_id, missing_ok=True)
+    
+    async def retry_job(self, job_id: str, user_id: str) -> Optional[SlideGenerationJob]:
+        """失敗・キャンセルしたジョブを最初の未完了ステージから再開する"""
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
+        if not job_data:
+            return None
+        
+        job = SlideGenerationJob(**job_data)
+        if job.status not in (SlideGenerationStatus.FAILED, SlideGenerationStatus.CANCELLED):
+            return job
+        
+        await self._clear_cancel_request(job)
+        job.error_message = None
+        job.owner_id = self.instance_id
+        self._start_deadline(job)
+        if job.agenda and job.checkpoint.agenda_generated and not job.checkpoint.agenda_approved:
+            if job.request.auto_approval:
+                job.checkpoint.agenda_approved = True
+            else:
+                # 生成済みのアジェンダは LLM を呼び直さずに承認待ちへ戻す
+                await self._await_agenda_approval(job)
+                return job
+        
+        job.status = SlideGenerationStatus.PENDING
+        job.current_step = "再開待機中..."
+        await self._update_job(job, full=True, immediate=True)
+        await self._enqueue(job, self._resume_kind(job))
+        return job
+    
+    async def regenerate_job(
+        self,
+        job_id: str,
+        user_id: str,
+        agenda: SlideAgenda
+    ) -> Optional[SlideGenerationJob]:
+        """完了したジョブを編集後のアジェンダで再生成し、新しいデッキのバージョンとして保存する"""
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
+        if not job_data:
+            return None
+        
+        job = SlideGenerationJob(**job_data)
+        if job.status != SlideGenerationStatus.COMPLETED or not job.agenda or not job.result_blob_url:
+            return job
+        
+        # バージョン履歴を持たない既存のジョブは現在の結果を最初のバージョンとする
+        if not job.versions:
+            job.versions.append(DeckVersion(
+                version=1,
+                agenda=job.agenda,
+                result_blob_url=job.result_blob_url,
+                information_blob_url=job.checkpoint.information_blob_url,
+                created_at=job.updated_at
+            ))
+        
+        await self._clear_cancel_request(job)
+        job.agenda = agenda
+        job.checkpoint = JobCheckpoint(agenda_generated=True, agenda_approved=True)
+        job.owner_id = self.instance_id
+        job.cache_key = None
+        job.status = SlideGenerationStatus.PENDING
+        job.progress = 25
+        job.error_message = None
+        job.current_step = "再生成待機中..."
+        job.degradations = []
+        self._start_deadline(job)
+        await self._update_job(job, full=True, immediate=True)
+        await self._enqueue(job, "continue_after_approval")
+        return job
+    
+    async def resume_interrupted_jobs(self) -> int:
+        """起動時に、このインスタンスで処理中のまま停止したジョブをチェックポイントから再開する"""
+        in_flight = [
+            SlideGenerationStatus.PENDING,
+            SlideGenerationStatus.AGENDA_GENERATION,
+            SlideGenerationStatus.INFORMATION_COLLECTION,
+            SlideGenerationStatus.SLIDE_CREATION,
+            SlideGenerationStatus.REVIEW,
+        ]
+        # 他のレプリカが処理中のジョブを二重に投入しないよう、自分が所有するジョブに限る
+        jobs = await cosmos_client.query_items(
+            "slide_jobs",
+            "SELECT * FROM c WHERE ARRAY_CONTAINS(@statuses, c.status) AND c.owner_id = @owner_id",
+            [
+                {"name": "@statuses", "value": [status.value for status in in_flight]},
+                {"name": "@owner_id", "value": self.instance_id},
+            ]
+        )
+        # 永続キューから復旧済みのジョブは除く
+        queued = await self.job_queue.job_ids()
+        
+        resumed = 0
+        for job_data in jobs:
+            job = SlideGenerationJob(**job_data)
+            if job.id in queued:
+                continue
+            job.status = SlideGenerationStatus.PENDING
+            job.current_step = "再開待機中..."
+            await self._update_job(job)
+            await self._enqueue(job, self._resume_kind(job))
+            resumed += 1
+        return resumed
+    
+    def _resume_kind(self, job: SlideGenerationJob) -> str:
+        """ジョブの再開に使う処理種別（承認済みアジェンダがあれば以降のステージから再開）"""
+        if job.agenda and job.checkpoint.agenda_approved:
+            return "continue_after_approval"
+        return "slide_generation"
+    
+    async def _cancel_running_job(self, job_id: str) -> bool:
+        """実行中のジョブタスクと下流エージェントのリクエストをキャンセル"""
+        task = self._job_tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        
+        self._cancelled_jobs.add(job_id)
+        inflight = dict(self._inflight_requests.get(job_id, {}))
+        task.cancel()
+        
+        # 下流エージェントにもキャンセルを伝播して LLM 呼び出しや HTTP 取得を即座に止める
+        await asyncio.gather(
+            *(
+                self._cancel_downstream(agent, request_id, session_key)
+                for request_id, (agent, session_key) in inflight.items()
+            ),
+            return_exceptions=True
+        )
+        await asyncio.gather(task, return_exceptions=True)
         return True
     
+    async def _cancel_downstream(self, agent: str, request_id: str, session_key: Optional[str] = None):
+        """下流エージェントの cancel フックを呼び出す（呼び出し時と同じ振り分けキーで同じレプリカへ届ける）"""
+        try:
+            await self.transport.cancel(agent, request_id, session_key)
+        except Exception as e:
+            logger.warning(f"Failed to cancel {request_id} on {agent} agent: {e}")
+    
     async def _handle_slide_generation(self, request: AgentRequest) -> AgentResponse:
-        """スライド生成フローの開始"""
-        gen_request = SlideGenerationRequest(**request.payload)
-        job_id = str(uuid.uuid4())
+        """スライド生成フローの開始（同一内容の投稿は既存ジョブにまとめる）"""
+        payload = dict(request.payload)
+        idempotency_key = payload.pop("idempotency_key", None)
+        gen_request = SlideGenerationRequest(**payload)
         
-        # ジョブをデータベースに保存
-        job = SlideGenerationJob(
-            id=job_id,
-            user_id=request.user_id,
-            request=gen_request,
-            status=SlideGenerationStatus.AGENDA_GENERATION,
-            current_step="アジェンダ生成中..."
-        )
+        if idempotency_key:
+            key = f"{request.user_id}:key:{idempotency_key}"
+        else:
+            key = f"{request.user_id}:hash:{canonical_hash(gen_request.dict())}"
         
-        cosmos_client.create_item("slide_jobs", job.dict())
+        job = await self._find_submitted_job(key, request.user_id, explicit=bool(idempotency_key))
+        deduplicated = job is not None
+        if job is None:
+            job, deduplicated = await self._submissions.do(
+                key, lambda: self._create_job(key, request.user_id, gen_request)
+            )
         
-        # バックグラウンドでスライド生成を開始
-        asyncio.create_task(self._process_slide_generation(job))
+        if deduplicated:
+            self._deduplicated.add(1, {"source": "header" if idempotency_key else "hash"})
         
         return AgentResponse(
             request_id=request.request_id,
             success=True,
-            result={"job_id": job_id, "status": job.status},
+            result={"job_id": job.id, "status": job.status, "deduplicated": deduplicated},
             progress=10
         )
     
+    async def _result_cache_key(
+        self,
+        user_id: str,
+        gen_request: SlideGenerationRequest,
+        llm_config: Optional[Dict[str, Any]]
+    ) -> str:
+        """生成リクエスト・テンプレートの版・モデル設定から結果キャッシュのキーを作成"""
+        template_version = None
+        if gen_request.slide_template_id:
+            template = await cosmos_client.read_item(
+                "slide_templates", gen_request.slide_template_id, user_id
+            )
+            template_version = self._document_version(template)
+        
+        if llm_config:
+            model_settings = self._document_version(llm_config)
+        else:
+            model_settings = {
+                "endpoint": settings.azure_ai_foundry_endpoint,
+                "model": settings.default_llm_model,
+                "temperature": settings.default_temperature,
+                "max_tokens": settings.default_max_tokens,
+            }
+        
+        # 生成結果に影響しないフラグはキーから除く（期限で省略した結果はキャッシュしない）
+        request_data = gen_request.dict(exclude={"bypass_cache", "auto_approval", "latency_target_seconds"})
+        return canonical_hash({
+            "user_id": user_id,
+            "request": request_data,
+            "template_version": template_version,
+            "model_settings": model_settings,
+        })
+    
+    def _document_version(self, document: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Cosmos DB ドキュメントの版（更新ごとに変わる ETag、なければ内容のハッシュ）"""
+        if not document:
+            return None
+        return document.get("_etag") or canonical_hash(document)
+    
+    async def _find_submitted_job(
+        self,
+        key: str,
+        user_id: str,
+        explicit: bool
+    ) -> Optional[SlideGenerationJob]:
+        """重複抑止期間内に同じキーで投稿されたジョブを取得"""
+        job_id = self._recent_submissions.get(key)
+        if job_id is None:
+            return None
+        
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
+        if not job_data:
+            self._recent_submissions.pop(key)
+            return None
+        
+        job = SlideGenerationJob(**job_data)
+        # 内容ハッシュによる抑止では、失敗・キャンセル済みのジョブには再投稿を許可する
+        if not explicit and job.status in (SlideGenerationStatus.FAILED, SlideGenerationStatus.CANCELLED):
+            self._recent_submissions.pop(key)
+            return None
+        return job
+    
+    async def _create_job(
+        self,
+        key: str,
+        user_id: str,
+        gen_request: SlideGenerationRequest
+    ) -> SlideGenerationJob:
+        """ジョブを作成してキューに投入（結果キャッシュにヒットした場合は完了状態で作成）"""
+        user_settings = await self._user_settings(user_id)
+        job = await self._build_job(user_id, gen_request, user_settings)
+        # 既存ジョブや結果キャッシュで返せる投稿は過負荷でも受け付け、新たに処理するジョブだけを制限する
+        if job.status != SlideGenerationStatus.COMPLETED:
+            self.admission.admit()
+        
+        await cosmos_client.create_item("slide_jobs", json.loads(job.json()))
+        await job_event_broker.publish(job)
+        
+        self._recent_submissions.set(key, job.id)
+        if job.status == SlideGenerationStatus.COMPLETED:
+            await self._write_history(job)
+            return job
+        
+        # キューに投入してワーカーでスライド生成を開始
+        await self._enqueue(job, "slide_generation", weight=user_settings.scheduling_weight)
+        return job
+    
+    async def _build_job(
+        self,
+        user_id: str,
+        gen_request: SlideGenerationRequest,
+        user_settings: UserSettings,
+        batch_id: Optional[str] = None
+    ) -> SlideGenerationJob:
+        """ジョブを組み立てる（結果キャッシュにヒットした場合は完了状態にする）"""
+        llm_config = await self._resolve_llm_config(user_id, gen_request, user_settings)
+        cache_key = None
+        cached = None
+        if not settings.result_cache_enabled or gen_request.bypass_cache:
+            self._result_cache_requests.add(1, {"result": "bypass"})
+        else:
+            cache_key = await self._result_cache_key(user_id, gen_request, llm_config)
+            cached = self._result_cache.get(cache_key)
+            self._result_cache_requests.add(1, {"result": "hit" if cached else "miss"})
+        
+        job = SlideGenerationJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            request=gen_request,
+            status=SlideGenerationStatus.PENDING,
+            current_step="処理待機中...",
+            cache_key=cache_key,
+            batch_id=batch_id,
+            owner_id=self.instance_id,
+            latency_target_seconds=(
+                gen_request.latency_target_seconds
+                or user_settings.latency_target_seconds
+                or settings.default_latency_target_seconds
+                or None
+            ),
+            llm_config=(
+                LLMConfig(**llm_config).dict(include={"provider", "model_name", "temperature", "max_tokens"})
+                if llm_config else None
+            )
+        )
+        self._start_deadline(job)
+        if cached:
+            job.status = SlideGenerationStatus.COMPLETED
+            job.agenda = SlideAgenda(**cached["agenda"])
+            job.progress = 100
+            job.current_step = "完了（キャッシュ）"
+            job.result_blob_url = cached["result_blob_url"]
+        return job
+    
+    async def _resolve_llm_config(
+        self,
+        user_id: str,
+        gen_request: SlideGenerationRequest,
+        user_settings: UserSettings
+    ) -> Optional[Dict[str, Any]]:
+        """リクエストまたはユーザー設定で指定された LLM 設定を取得（見つからない場合は既定のモデル）"""
+        config_id = gen_request.llm_config_id or user_settings.default_llm_config_id
+        if not config_id:
+            return None
+        return await cosmos_client.read_item("llm_configs", config_id, user_id)
+    
+    def _start_deadline(self, job: SlideGenerationJob):
+        """レイテンシ目標から処理の期限を設定（目標がない場合は期限なし）"""
+        job.deadline = deadline_after(job.latency_target_seconds) if job.latency_target_seconds else None
+    
+    async def create_batch(
+        self,
+        user_id: str,
+        requests: List[SlideGenerationRequest]
+    ) -> Tuple[str, List[SlideGenerationJob]]:
+        """バッチ内の全ジョブを一括作成してキューに投入"""
+        batch_id = str(uuid.uuid4())
+        user_settings = await self._user_settings(user_id)
+        jobs = [
+            await self._build_job(user_id, gen_request, user_settings, batch_id)
+            for gen_request in requests
+        ]
+        if any(job.status != SlideGenerationStatus.COMPLETED for job in jobs):
+            self.admission.admit()
+        
+        # 全ジョブは同一ユーザー（同一パーティション）なのでトランザクションバッチで作成できる
+        await cosmos_client.create_items_batch(
+            "slide_jobs", user_id, [json.loads(job.json()) for job in jobs]
+        )
+        
+        for job in jobs:
+            await job_event_broker.publish(job)
+            if job.status == SlideGenerationStatus.COMPLETED:
+                await self._write_history(job)
+            else:
+                await self._enqueue(job, "slide_generation", weight=user_settings.scheduling_weight)
+        return batch_id, jobs
+    
+    async def get_batch(self, batch_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """バッチ内ジョブの状態を集計"""
+        jobs = [
+            SlideGenerationJob(**job_data) for job_data in await cosmos_client.query_items(
+                "slide_jobs",
+                "SELECT * FROM c WHERE c.user_id = @user_id AND c.batch_id = @batch_id",
+                [
+                    {"name": "@user_id", "value": user_id},
+                    {"name": "@batch_id", "value": batch_id},
+                ]
+            )
+        ]
+        if not jobs:
+            return None
+        
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status.value] = counts.get(job.status.value, 0) + 1
+        finished = sum(1 for job in jobs if job.status in TERMINAL_STATUSES)
+        
+        return {
+            "batch_id": batch_id,
+            "total": len(jobs),
+            "finished": finished,
+            "status": "completed" if finished == len(jobs) else "in_progress",
+            "progress": round(sum(job.progress for job in jobs) / len(jobs)),
+            "status_counts": counts,
+            "jobs": [
+                {
+                    "job_id": job.id,
+                    "status": job.status,
+                    "progress": job.progress,
+                    "current_step": job.current_step,
+                    "result_blob_url": job.result_blob_url,
+                    "error_message": job.error_message,
+                }
+                for job in jobs
+            ],
+        }
+    
+    async def _user_settings(self, user_id: str) -> UserSettings:
+        """ユーザー設定（未作成の場合は既定値）"""
+        user_settings = await cosmos_client.read_item("users", user_id, user_id)
+        if user_settings:
+            return UserSettings(**user_settings)
+        return UserSettings(user_id=user_id)
+    
+    async def _enqueue(self, job: SlideGenerationJob, kind: str, weight: Optional[float] = None):
+        """ユーザーの重みを付けてジョブをキューに投入"""
+        if weight is None:
+            weight = (await self._user_settings(job.user_id)).scheduling_weight
+        await self.job_queue.put(job.id, job.user_id, kind, str(uuid.uuid4()), weight=weight)
+    
+    async def _publish_queue_positions(self, changed: Dict[str, Tuple[str, Optional[int]]]):
+        """待機順位の変化をジョブに反映して配信"""
+        for job_id, (user_id, position) in changed.items():
+            await job_event_broker.publish_fields(job_id, {"queue_position": position})
+            await self.state_writer.submit_fields(job_id, user_id, {"queue_position": position})
+    
+    async def _run_queue_entry(self, entry: JobQueueEntry):
+        """キューから取り出したエントリを処理"""
+        job_data = await cosmos_client.read_item("slide_jobs", entry.job_id, entry.user_id)
+        if not job_data:
+            return
+        
+        job = SlideGenerationJob(**job_data)
+        if job.status in TERMINAL_STATUSES:
+            return
+        running = self._job_tasks.get(job.id)
+        if running is not None and not running.done():
+            # 同じジョブのエントリが重複して投入された場合は、実行中のタスクに任せる
+            logger.info(f"Skipping duplicate queue entry for running job {job.id}")
+            return
+        job.queue_position = None
+        
+        if entry.kind == "slide_generation":
+            task = asyncio.create_task(self._process_slide_generation(job))
+        elif entry.kind == "continue_after_approval":
+            task = asyncio.create_task(self._continue_after_approval(job))
+        else:
+            return
+        
+        self._job_tasks[job.id] = task
+        try:
+            await task
+        except asyncio.CancelledError:
+            # ジョブ単位のキャンセルはここで吸収し、ワーカー自体の停止は伝播させる
+            if job.id not in self._cancelled_jobs:
+                raise
+        finally:
+            self._job_tasks.pop(job.id, None)
+            self._inflight_requests.pop(job.id, None)
+            self._cancelled_jobs.discard(job.id)
+    
+    async def _call_agent(
+        self,
+        job: SlideGenerationJob,
+        agent: str,
+        agent_type: str,
+        payload: Dict[str, Any],
+        on_partial: Optional[Callable[[AgentResponse], Awaitable[None]]] = None
+    ) -> AgentResponse:
+        """下流エージェントをステージのタイムアウト・リトライ・ヘッジ設定に従って呼び出す"""
+        response = await self.stage_caller.call(
+            agent,
+            lambda request_id: self._send_agent_request(
+                job, agent, agent_type, payload, request_id, on_partial
+            ),
+            lambda request_id: self._cancel_downstream(agent, request_id, self._session_key(job, agent)),
+            is_success=lambda response: response.success
+        )
+        
+        # 期限に合わせてエージェントが省略した処理をジョブに記録する
+        for degradation in response.degradations:
+            entry = f"{agent}: {degradation}"
+            if entry not in job.degradations:
+                job.degradations.append(entry)
+        return response
+    
+    def _session_key(self, job: SlideGenerationJob, agent: str) -> str:
+        """エージェントのレプリカへの振り分けキー（情報収集は同じバッチのジョブを同じレプリカへ送り、バッチ内の取得をまとめる）"""
+        if agent == "information" and job.batch_id:
+            return job.batch_id
+        return job.id
+    
+    async def _send_agent_request(
+        self,
+        job: SlideGenerationJob,
+        agent: str,
+        agent_type: str,
+        payload: Dict[str, Any],
+        request_id: str,
+        on_partial: Optional[Callable[[AgentResponse], Awaitable[None]]] = None
+    ) -> AgentResponse:
+        """下流エージェントを 1 回呼び出し、キャンセル用に発行中リクエストを記録（on_partial には途中経過を渡す）"""
+        session_key = self._session_key(job, agent)
+        inflight = self._inflight_requests.setdefault(job.id, {})
+        inflight[request_id] = (agent, session_key)
+        request = AgentRequest(
+            request_id=request_id,
+            agent_type=agent_type,
+            payload=payload,
+            user_id=job.user_id,
+            deadline=job.deadline,
+            session_key=session_key
+        )
+        try:
+            if on_partial is None:
+                return await self.transport.call(agent, request)
+            
+            response = None
+            async for response in self.transport.stream(agent, request):
+                if response.success and response.progress < 100:
+                    await on_partial(response)
+            if response is None:
+                raise Exception(f"{agent} agent returned no response")
+            return response
+        finally:
+            inflight.pop(request_id, None)
+    
     async def _process_slide_generation(self, job: SlideGenerationJob):
         """スライド生成の全フローを実行"""
         try:
+            await self._stop_if_cancel_requested(job)
+            
             # 1. アジェンダ生成
-            agenda_client = A2AClient("http://agenda-agent:8001")
-            agenda_response = await agenda_client.call_agent(AgentRequest(
-                request_id=str(uuid.uuid4()),
-                agent_type="generate_agenda",
-                payload=job.request.dict(),
-                user_id=job.user_id
-            ))
+            job.status = SlideGenerationStatus.AGENDA_GENERATION
+            job.current_step = "アジェンダ生成中..."
+            job.agenda = None
+            await self._update_job(job)
+            
+            agenda_response = await self._call_agent(
+                job, "agenda", "generate_agenda", {**job.request.dict(), "llm_config": job.llm_config},
+                on_partial=lambda partial: self._on_partial_agenda(job, partial)
+            )
             
             if not agenda_response.success:
                 raise Exception(f"Agenda generation failed: {agenda_response.error}")
             
-            job.agenda = agenda_response.result
-            job.status = SlideGenerationStatus.AGENDA_APPROVAL
-            job.progress = 25
-            job.current_step = "アジェンダ承認待ち..."
-            await self._update_job(job)
+            job.agenda = SlideAgenda(**agenda_response.result)
+            draft = agenda_response.result.get("draft")
+            job.agenda_draft_similarity = draft["similarity"] if draft else None
+            job.checkpoint.agenda_generated = True
+            await self._stop_if_cancel_requested(job)
             
             # 自動承認設定確認
             if job.request.auto_approval:
+                job.checkpoint.agenda_approved = True
+                job.status = SlideGenerationStatus.AGENDA_APPROVAL
+                job.progress = 25
+                job.current_step = "アジェンダ承認待ち..."
+                await self._update_job(job, full=True, immediate=True)
                 await self._continue_after_approval(job)
-            
+            else:
+                await self._await_agenda_approval(job)
+        
         except Exception as e:
+            self.prefetcher.discard(job.id)
             job.status = SlideGenerationStatus.FAILED
             job.error_message = str(e)
             job.current_step = "エラーが発生しました"
             await self._update_job(job)
     
+    async def _await_agenda_approval(self, job: SlideGenerationJob):
+        """アジェンダを承認待ちにし、承認を待つ間に提案中のアジェンダで情報収集を先行させる"""
+        job.status = SlideGenerationStatus.AGENDA_APPROVAL
+        job.progress = 25
+        job.current_step = (
+            "アジェンダ承認待ち（類似リクエストの下書き）..." if job.agenda_draft_similarity is not None
+            else "アジェンダ承認待ち..."
+        )
+        await self._update_job(job, full=True, immediate=True)
+        self.prefetcher.start(
+            job.id, job.agenda.slides,
+            lambda slide: self._prefetch_slide_information(job, slide)
+        )
+    
+    async def _on_partial_agenda(self, job: SlideGenerationJob, partial: AgentResponse):
+        """生成途中のアジェンダを配信し、確定したスライドの情報収集を先に始める"""
+        slides = [SlideContent(**slide) for slide in partial.result.get("slides", [])]
+        # ヘッジした試行の途中経過が混ざっても後戻りさせない
+        if job.agenda and len(slides) <= len(job.agenda.slides):
+            return
+        
+        job.agenda = SlideAgenda(slides=slides, total_pages=len(slides), estimated_duration=0)
+        job.progress = min(24, partial.progress // 4)
+        job.current_step = f"アジェンダ生成中... ({len(slides)} 枚)"
+        await self._update_job(job)
+        
+        self.prefetcher.start(
+            job.id, slides, lambda slide: self._prefetch_slide_information(job, slide)
+        )
+    
     async def _continue_after_approval(self, job: SlideGenerationJob):
-        """アジェンダ承認後の処理続行"""
+        """アジェンダ承認後の処理続行（チェックポイントがあれば完了済みステージを飛ばす）"""
+        # 承認時に編集されたスライドの先行収集は使えないため取り消す
+        self.prefetcher.retain(job.id, job.agenda.slides)
         try:
-            # 2. 情報収集
-            job.status = SlideGenerationStatus.INFORMATION_COLLECTION
-            job.progress = 50
-            job.current_step = "情報収集中..."
-            await self._update_job(job)
+            await self._stop_if_cancel_requested(job)
             
-            info_client = A2AClient("http://information-agent:8002")
-            info_response = await info_client.call_agent(AgentRequest(
-                request_id=str(uuid.uuid4()),
-                agent_type="collect_information",
-                payload={
-                    "agenda": job.agenda.dict(),
-                    "reference_urls": job.request.reference_urls
-                },
-                user_id=job.user_id
-            ))
-            
-            if not info_response.success:
-                raise Exception(f"Information collection failed: {info_response.error}")
-            
-            # 3. スライド作成
-            job.status = SlideGenerationStatus.SLIDE_CREATION
-            job.progress = 75
-            job.current_step = "スライド作成中..."
-            await self._update_job(job)
-            
-            slide_client = A2AClient("http://slide-agent:8003")
-            slide_response = await slide_client.call_agent(AgentRequest(
-                request_id=str(uuid.uuid4()),
-                agent_type="create_slides",
-                payload={
-                    "agenda": job.agenda.dict(),
-                    "information": info_response.result,
-                    "template_id": job.request.slide_template_id,
-                    "include_images": job.request.include_images,
-                    "include_tables": job.request.include_tables
-                },
-                user_id=job.user_id
-            ))
+            # 2-3. 情報収集とスライド作成
+            checkpoint = job.checkpoint
+            if checkpoint.slide_url:
+                slide_result = {"slide_url": checkpoint.slide_url}
+            elif job.versions:
+                slide_result = await self._regenerate_slides(job)
+            elif checkpoint.information_blob_url:
+                information = await self._load_information(checkpoint.information_blob_url)
+                slide_result = await self._create_slides(job, information)
+            elif settings.slide_pipeline_enabled:
+                slide_result = await self._collect_and_create_slides_pipelined(job)
+            else:
+                slide_result = await self._collect_and_create_slides(job)
             
-            if not slide_response.success:
-                raise Exception(f"Slide creation failed: {slide_response.error}")
+            if checkpoint.slide_url != slide_result["slide_url"]:
+                checkpoint.slide_url = slide_result["slide_url"]
+                await self._update_job(job, full=True, immediate=True)
             
             # 4. レビュー
+            await self._stop_if_cancel_requested(job)
             job.status = SlideGenerationStatus.REVIEW
             job.progress = 90
             job.current_step = "品質チェック中..."
             await self._update_job(job)
             
-            review_client = A2AClient("http://review-agent:8004")
-            review_response = await review_client.call_agent(AgentRequest(
-                request_id=str(uuid.uuid4()),
-                agent_type="review_slides",
-                payload={
-                    "slide_url": slide_response.result["slide_url"],
-                    "agenda": job.agenda.dict()
-                },
-                user_id=job.user_id
-            ))
+            review_response = await self._call_agent(
+                job, "review", "review_slides",
+                {
+                    "slide_url": slide_result["slide_url"],
+                    "agenda": await self._agenda_payload(job),
+                    "llm_config": job.llm_config
+                }
+            )
             
             # 完了
+            await self._stop_if_cancel_requested(job)
             job.status = SlideGenerationStatus.COMPLETED
             job.progress = 100
             job.current_step = "完了"
-            job.result_blob_url = slide_response.result["slide_url"]
+            job.result_blob_url = slide_result["slide_url"]
+            job.versions.append(DeckVersion(
+                version=len(job.versions) + 1,
+                agenda=job.agenda,
+                result_blob_url=job.result_blob_url,
+                information_blob_url=checkpoint.information_blob_url,
+                regenerated_pages=slide_result.get("regenerated_pages", [])
+            ))
             await self._update_job(job)
             
-            # 履歴に追加
-            history = GenerationHistory(
-                id=str(uuid.uuid4()),
-                user_id=job.user_id,
-                job_id=job.id,
-                title=job.agenda.slides[0].title if job.agenda and job.agenda.slides else "無題",
-                slide_count=len(job.agenda.slides) if job.agenda else 0,
-                blob_url=job.result_blob_url
-            )
-            cosmos_client.create_item("generation_history", history.dict())
+            if job.cache_key and not job.degradations:
+                self._result_cache.set(job.cache_key, {
+                    "agenda": job.agenda.dict(),
+                    "result_blob_url": job.result_blob_url,
+                })
             
+            await self._write_history(job)
+        
         except Exception as e:
             job.status = SlideGenerationStatus.FAILED
             job.error_message = str(e)
             job.current_step = "エラーが発生しました"
             await self._update_job(job)
+        finally:
+            self.prefetcher.discard(job.id)
+    
+    async def _agenda_payload(self, job: SlideGenerationJob) -> Any:
+        """下流エージェントに渡すアジェンダ（大きい場合は成果物ストアへの参照）"""
+        return await artifact_store.offload(job.agenda.dict(), job.user_id)
+    
+    async def _write_history(self, job: SlideGenerationJob):
+        """生成履歴に追加"""
+        history = GenerationHistory(
+            id=str(uuid.uuid4()),
+            user_id=job.user_id,
+            job_id=job.id,
+            title=job.agenda.slides[0].title if job.agenda and job.agenda.slides else "無題",
+            slide_count=len(job.agenda.slides) if job.agenda else 0,
+            blob_url=job.result_blob_url
+        )
+        await cosmos_client.create_item("generation_history", history.dict())
+    
+    async def _collect_and_create_slides(self, job: SlideGenerationJob) -> Dict[str, Any]:
+        """全スライドの情報収集を待ってからスライドを作成"""
+        job.status = SlideGenerationStatus.INFORMATION_COLLECTION
+        job.progress = 50
+        job.current_step = "情報収集中..."
+        await self._update_job(job)
+        
+        # 先行収集済みのスライドは再利用し、残りのスライドだけ収集する
+        information: Dict[str, Any] = {}
+        missing = []
+        for slide in job.agenda.slides:
+            prefetched = await self.prefetcher.take(job.id, slide)
+            if prefetched is None:
+                missing.append(slide)
+            else:
+                information[f"slide_{slide.page_number}"] = prefetched
+        
+        if missing:
+            payload = (
+                self._slide_information_payload(job, missing)
+                if information else {
+                    "agenda": await self._agenda_payload(job),
+                    "reference_urls": job.request.reference_urls,
+                    "batch_id": job.batch_id
+                }
+            )
+            info_response = await self._call_agent(
+                job, "information", "collect_information", payload
+            )
+            
+            if not info_response.success:
+                raise Exception(f"Information collection failed: {info_response.error}")
+            information.update(info_response.result)
+        
+        await self._save_information_checkpoint(job, information)
+        return await self._create_slides(job, information)
+    
+    def _slide_information_payload(self, job: SlideGenerationJob, slides: List[SlideContent]) -> Dict[str, Any]:
+        """一部のスライドだけを対象にした情報収集リクエスト"""
+        return {
+            "agenda": SlideAgenda(
+                slides=slides, total_pages=len(slides), estimated_duration=0
+            ).dict(),
+            "reference_urls": job.request.reference_urls,
+            "batch_id": job.batch_id
+        }
+    
+    async def _prefetch_slide_information(self, job: SlideGenerationJob, slide: SlideContent) -> Optional[Any]:
+        """承認待ちの間にスライド 1 枚分の情報を収集（投機的な処理のためリトライしない）"""
+        request_id = str(uuid.uuid4())
+        try:
+            response = await self.transport.call("information", AgentRequest(
+                request_id=request_id,
+                agent_type="collect_information",
+                payload=self._slide_information_payload(job, [slide]),
+                user_id=job.user_id,
+                session_key=self._session_key(job, "information")
+            ))
+        except asyncio.CancelledError:
+            await self._cancel_downstream("information", request_id, self._session_key(job, "information"))
+            raise
+        
+        if not response.success:
+            return None
+        return response.result.get(f"slide_{slide.page_number}")
+    
+    async def _create_slides(self, job: SlideGenerationJob, information: Dict[str, Any]) -> Dict[str, Any]:
+        """収集済みの情報からスライドを作成"""
+        job.status = SlideGenerationStatus.SLIDE_CREATION
+        job.progress = 75
+        job.current_step = "スライド作成中..."
+        await self._update_job(job)
+        
+        slide_response = await self._call_agent(
+            job, "slide", "create_slides",
+            {
+                "agenda": await self._agenda_payload(job),
+                "information": information,
+                "template_id": job.request.slide_template_id,
+                "include_images": job.request.include_images,
+                "include_tables": job.request.include_tables
+            }
+        )
+        
+        if not slide_response.success:
+            raise Exception(f"Slide creation failed: {slide_response.error}")
+        
+        return slide_response.result
+    
+    async def _save_information_checkpoint(self, job: SlideGenerationJob, information: Dict[str, Any]):
+        """収集した情報を Blob に保存し、参照をチェックポイントに記録"""
+        data = json.dumps(information, ensure_ascii=False).encode("utf-8")
+        job.checkpoint.information_blob_url = await blob_client.upload_bytes(
+            data, f"{job.id}_information.json", job.user_id, "checkpoints"
+        )
+        await self._update_job(job, full=True, immediate=True)
+    
+    async def _load_information(self, information_blob_url: str) -> Dict[str, Any]:
+        """Blob に保存した収集済みの情報を読み込む"""
+        data = await blob_client.download_file(information_blob_url)
+        if data is None:
+            raise Exception("Information checkpoint not found")
+        return json.loads(data)
+    
+    async def _regenerate_slides(self, job: SlideGenerationJob) -> Dict[str, Any]:
+        """前のバージョンとの差分だけ情報収集・描画し、変更のないスライドは前のデッキから流用する"""
+        previous = job.versions[-1]
+        reuse, changed = self._diff_agenda(previous.agenda, job.agenda)
+        
+        job.status = SlideGenerationStatus.INFORMATION_COLLECTION
+        job.progress = 50
+        job.current_step = f"変更されたスライドの情報収集中... ({len(changed)}/{len(job.agenda.slides)})"
+        await self._update_job(job)
+        
+        if job.checkpoint.information_blob_url:
+            information = await self._load_information(job.checkpoint.information_blob_url)
+        else:
+            # タイトルと内容が同じスライドは前のバージョンで収集した情報を使う
+            previous_information = (
+                await self._load_information(previous.information_blob_url)
+                if previous.information_blob_url else {}
+            )
+            collected = {
+                self.prefetcher.fingerprint(slide): previous_information[f"slide_{slide.page_number}"]
+                for slide in previous.agenda.slides
+                if f"slide_{slide.page_number}" in previous_information
+            }
+            information: Dict[str, Any] = {}
+            missing = []
+            for slide in job.agenda.slides:
+                key = self.prefetcher.fingerprint(slide)
+                if key in collected:
+                    information[f"slide_{slide.page_number}"] = collected[key]
+                elif slide in changed:
+                    missing.append(slide)
+            
+            if missing:
+                info_response = await self._call_agent(
+                    job, "information", "collect_information",
+                    self._slide_information_payload(job, missing)
+                )
+                
+                if not info_response.success:
+                    raise Exception(f"Information collection failed: {info_response.error}")
+                information.update(info_response.result)
+            
+            await self._save_information_checkpoint(job, information)
+        
+        job.status = SlideGenerationStatus.SLIDE_CREATION
+        job.progress = 75
+        job.current_step = "スライド作成中..."
+        await self._update_job(job)
+        
+        changed_keys = {f"slide_{slide.page_number}" for slide in changed}
+        slide_response = await self._call_agent(
+            job, "slide", "update_slides",
+            {
+                "base_slide_url": previous.result_blob_url,
+                "agenda": await self._agenda_payload(job),
+                "reuse": {str(index): previous_index for index, previous_index in reuse.items()},
+                "information": {key: value for key, value in information.items() if key in changed_keys},
+                "include_images": job.request.include_images,
+                "include_tables": job.request.include_tables
+            }
+        )
+        
+        if not slide_response.success:
+            raise Exception(f"Slide creation failed: {slide_response.error}")
+        
+        return {**slide_response.result, "regenerated_pages": [slide.page_number for slide in changed]}
+    
+    def _diff_agenda(
+        self,
+        previous: SlideAgenda,
+        agenda: SlideAgenda
+    ) -> Tuple[Dict[int, int], List[SlideContent]]:
+        """流用できるスライドの位置（新 → 旧）と、作り直すスライドを求める"""
+        def rendered_as(slide: SlideContent) -> str:
+            # 描画結果を左右する内容（1 ページ目はタイトルレイアウトで描画される）
+            return canonical_hash({
+                "title": slide.title,
+                "content": slide.content,
+                "notes": slide.notes,
+                "title_slide": slide.page_number == 1,
+            })
+        
+        available: Dict[str, List[int]] = {}
+        for index, slide in enumerate(previous.slides):
+            available.setdefault(rendered_as(slide), []).append(index)
+        
+        reuse: Dict[int, int] = {}
+        changed: List[SlideContent] = []
+        for index, slide in enumerate(agenda.slides):
+            candidates = available.get(rendered_as(slide))
+            if candidates:
+                reuse[index] = candidates.pop(0)
+            else:
+                changed.append(slide)
+        return reuse, changed
+    
+    async def _collect_and_create_slides_pipelined(self, job: SlideGenerationJob) -> Dict[str, Any]:
+        """スライド単位で情報収集し、情報が届いたスライドから順に描画"""
+        job.status = SlideGenerationStatus.INFORMATION_COLLECTION
+        job.progress = 50
+        job.current_step = "情報収集・スライド作成中..."
+        await self._update_job(job)
+        
+        begin_response = await self._call_agent(
+            job, "slide", "begin_slides",
+            {
+                "agenda": await self._agenda_payload(job),
+                "template_id": job.request.slide_template_id,
+                "include_images": job.request.include_images,
+                "include_tables": job.request.include_tables
+            }
+        )
+        
+        if not begin_response.success:
+            raise Exception(f"Slide creation failed: {begin_response.error}")
+        
+        session_id = begin_response.result["session_id"]
+        try:
+            return await self._fill_slide_session(job, session_id)
+        except BaseException:
+            # 途中で失敗・キャンセルしたセッションはスライドエージェントのメモリーから破棄させる
+            await self._cancel_downstream("slide", session_id, job.id)
+            raise
+    
+    async def _fill_slide_session(self, job: SlideGenerationJob, session_id: str) -> Dict[str, Any]:
+        """描画セッションに情報収集の結果を順に渡し、最後にデッキを確定する"""
+        slides = job.agenda.slides
+        semaphore = asyncio.Semaphore(settings.information_concurrency)
+        
+        async def collect(slide: SlideContent):
+            prefetched = await self.prefetcher.take(job.id, slide)
+            if prefetched is not None:
+                return slide, prefetched
+            
+            async with semaphore:
+                response = await self._call_agent(
+                    job, "information", "collect_information",
+                    self._slide_information_payload(job, [slide])
+                )
+            if not response.success:
+                raise Exception(f"Information collection failed: {response.error}")
+            return slide, response.result.get(f"slide_{slide.page_number}", {})
+        
+        tasks = [asyncio.create_task(collect(slide)) for slide in slides]
+        collected: Dict[str, Any] = {}
+        try:
+            # 情報が届いた順にスライドエージェントへ渡す（描画はアジェンダ順に進む）
+            for completed, future in enumerate(asyncio.as_completed(tasks), start=1):
+                slide, information = await future
+                collected[f"slide_{slide.page_number}"] = information
+                add_response = await self._call_agent(
+                    job, "slide", "add_slide_information",
+                    {
+                        "session_id": session_id,
+                        "page_number": slide.page_number,
+                        "information": information
+                    }
+                )
+                
+                if not add_response.success:
+                    raise Exception(f"Slide creation failed: {add_response.error}")
+                
+                job.progress = 50 + int(35 * completed / len(slides))
+                job.current_step = f"情報収集・スライド作成中... ({completed}/{len(slides)})"
+                await self._update_job(job)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # 描画の確定に失敗しても情報収集をやり直さずに済むよう保存しておく
+        await self._save_information_checkpoint(job, collected)
+        
+        job.status = SlideGenerationStatus.SLIDE_CREATION
+        job.current_step = "スライド作成中..."
+        await self._update_job(job)
+        
+        finalize_response = await self._call_agent(
+            job, "slide", "finalize_slides", {"session_id": session_id}
+        )
+        
+        if not finalize_response.success:
+            raise Exception(f"Slide creation failed: {finalize_response.error}")
+        
+        return finalize_response.result
     
     async def _handle_agenda_approval(self, request: AgentRequest) -> AgentResponse:
         """アジェンダ承認処理"""
@@ -197,7 +1122,7 @@ class OrchestrationExecutor(AgentExecutor):
         approved = request.payload.get("approved", False)
         updated_agenda = request.payload.get("agenda")
         
-        job_data = cosmos_client.read_item("slide_jobs", job_id, request.user_id)
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, request.user_id)
         if not job_data:
             return AgentResponse(
                 request_id=request.request_id,
@@ -206,12 +1131,33 @@ class OrchestrationExecutor(AgentExecutor):
             )
         
         job = SlideGenerationJob(**job_data)
+        if job.status != SlideGenerationStatus.AGENDA_APPROVAL:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error=f"Job is not awaiting approval: {job.status}"
+            )
         
         if approved:
+            job.checkpoint.agenda_approved = True
+            # 承認待ちの時間は期限に含めない（最後の書き込みは承認待ちへの遷移時）
+            if job.deadline:
+                job.deadline += datetime.utcnow() - job.updated_at
             if updated_agenda:
-                job.agenda = updated_agenda
-            asyncio.create_task(self._continue_after_approval(job))
+                agenda = SlideAgenda(**updated_agenda)
+                # 編集されたアジェンダの結果はプロンプトだけでは再現できないためキャッシュしない
+                if agenda != job.agenda:
+                    job.cache_key = None
+                job.agenda = agenda
+            # 承認待ちから外して、重ねて届いた承認が再びキューに入れたり期限を延ばしたりしないようにする
+            job.status = SlideGenerationStatus.PENDING
+            job.current_step = "処理待機中..."
+            job.owner_id = self.instance_id
+            # ワーカーが最新のアジェンダを読めるよう、キュー投入前に書き込む
+            await self._update_job(job, full=True, immediate=True)
+            await self._enqueue(job, "continue_after_approval")
         else:
+            self.prefetcher.discard(job.id)
             job.status = SlideGenerationStatus.FAILED
             job.error_message = "User rejected agenda"
             await self._update_job(job)
@@ -222,10 +1168,13 @@ class OrchestrationExecutor(AgentExecutor):
             result={"status": job.status}
         )
     
-    async def _update_job(self, job: SlideGenerationJob):
+    async def _update_job(self, job: SlideGenerationJob, full: bool = False, immediate: bool = False):
         """ジョブステータスを更新"""
+        # 購読者へは即座に配信し、Cosmos DB への書き込みはまとめて部分更新する
+        # アジェンダ等を変更した場合は full=True、直後に読み直す場合は immediate=True を指定
         job.updated_at = datetime.utcnow()
-        cosmos_client.update_item("slide_jobs", job.dict())
+        await job_event_broker.publish(job)
+        await self.state_writer.submit(job, full=full, immediate=immediate)
 
 
 # Agent setup
@@ -249,8 +1198,30 @@ agent_skills = [
 executor = OrchestrationExecutor()
 request_handler = DefaultRequestHandler(agent_card, agent_skills, executor)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """ストレージクライアント・エージェント（インプロセス時）・ワーカープール・エージェント接続プールの起動と停止"""
+    await cosmos_client.initialize()
+    await blob_client.initialize()
+    await artifact_store.initialize()
+    await executor.transport.start()
+    await executor.worker_pool.start()
+    if settings.job_resume_on_startup:
+        resumed = await executor.resume_interrupted_jobs()
+        if resumed:
+            logger.info(f"Resumed {resumed} interrupted job(s)")
+    yield
+    await executor.worker_pool.stop()
+    await executor.state_writer.flush_all()
+    await executor.transport.aclose()
+    await artifact_store.close()
+    await blob_client.close()
+    await cosmos_client.close()
+
+
 # FastAPI app
-app = FastAPI(title="PowerPoint Slide Generation Orchestrator")
+app = FastAPI(title="PowerPoint Slide Generation Orchestrator", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -275,26 +1246,102 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> str:
     return user_id
 
 
+def overloaded(error: AdmissionRejectedError) -> HTTPException:
+    """受け付けの拒否を 429 と Retry-After に変換し、再試行を促す"""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def admit_request():
+    """下流エージェントの劣化時やキュー滞留時は 429 で受け付けを断る"""
+    try:
+        executor.admission.admit()
+    except AdmissionRejectedError as e:
+        raise overloaded(e)
+
+
+@app.get("/health")
+async def health():
+    """ヘルスチェック（下流エージェントのサーキットブレーカーとキューの状態）"""
+    breakers = {
+        agent: executor.stage_caller.breaker(agent).snapshot() for agent in AGENT_NAMES
+    }
+    rejection = executor.admission.evaluate() if settings.admission_enabled else None
+    return {
+        "status": "degraded" if rejection else "ok",
+        "admission": {"accepting": rejection is None, "reason": rejection[0] if rejection else None},
+        "breakers": breakers,
+        "queue": {
+            "depth": executor.job_queue.depth,
+            "oldest_wait_seconds": round(executor.job_queue.oldest_wait_seconds(), 1),
+            "active_workers": executor.worker_pool.active,
+        },
+    }
+
+
 @app.post("/generate-slides")
 async def generate_slides(
     request: SlideGenerationRequest,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    """スライド生成を開始"""
+    """スライド生成を開始（Idempotency-Key ヘッダーまたは同一内容の再投稿は既存ジョブを返す）"""
     agent_request = AgentRequest(
         request_id=str(uuid.uuid4()),
         agent_type="slide_generation",
-        payload=request.dict(),
+        payload={**request.dict(), "idempotency_key": idempotency_key},
         user_id=user_id
     )
     
-    response = await executor.execute(agent_request)
+    try:
+        response = await executor.execute(agent_request)
+    except AdmissionRejectedError as e:
+        raise overloaded(e)
     if not response.success:
         raise HTTPException(status_code=500, detail=response.error)
     
     return response.result
 
 
+@app.post("/generate-slides/batch")
+async def generate_slides_batch(
+    request: SlideGenerationBatchRequest,
+    user_id: str = Depends(get_current_user)
+):
+    """複数のスライド生成を一括で開始（参照URL・検索結果の取得はバッチ内で共有）"""
+    if not request.requests:
+        raise HTTPException(status_code=400, detail="No requests in batch")
+    if len(request.requests) > settings.batch_max_jobs:
+        raise HTTPException(
+            status_code=400, detail=f"Batch exceeds the limit of {settings.batch_max_jobs} jobs"
+        )
+    
+    try:
+        batch_id, jobs = await executor.create_batch(user_id, request.requests)
+    except AdmissionRejectedError as e:
+        raise overloaded(e)
+    return {
+        "batch_id": batch_id,
+        "job_ids": [job.id for job in jobs],
+        "total": len(jobs),
+    }
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch_status(
+    batch_id: str,
+    user_id: str = Depends(get_current_user)
+):
+    """バッチ全体の進捗を取得"""
+    batch = await executor.get_batch(batch_id, user_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
 @app.post("/approve-agenda")
 async def approve_agenda(
     job_id: str,
@@ -327,24 +1374,104 @@ async def get_job_status(
     user_id: str = Depends(get_current_user)
 ):
     """ジョブステータスを取得"""
-    job_data = cosmos_client.read_item("slide_jobs", job_id, user_id)
+    job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
     if not job_data:
         raise HTTPException(status_code=404, detail="Job not found")
     
     return job_data
 
 
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    last_event_id: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    """ジョブの進捗を Server-Sent Events で配信（Last-Event-ID で再開可能）"""
+    owner = job_event_broker.owner(job_id)
+    if owner is None:
+        # このプロセスで未配信のジョブは一度だけ Cosmos DB から読み込んで初期状態とする
+        job_data = await cosmos_client.read_item("slide_jobs", job_id, user_id)
+        if not job_data:
+            raise HTTPException(status_code=404, detail="Job not found")
+        await job_event_broker.publish(SlideGenerationJob(**job_data))
+    elif owner != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    async def event_stream():
+        async for event_id, event_type, data in job_event_broker.subscribe(job_id, resume_from):
+            yield format_sse(event_id, event_type, data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user)
+):
+    """ジョブをキャンセル"""
+    job = await executor.cancel_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status != SlideGenerationStatus.CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job already finished: {job.status}")
+    
+    return {"job_id": job_id, "status": job.status}
+
+
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user)
+):
+    """失敗・キャンセルしたジョブを最初の未完了ステージから再開"""
+    job = await executor.retry_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status not in (SlideGenerationStatus.PENDING, SlideGenerationStatus.AGENDA_APPROVAL):
+        raise HTTPException(status_code=409, detail=f"Job is not retryable: {job.status}")
+    
+    return {"job_id": job_id, "status": job.status}
+
+
+@app.post("/jobs/{job_id}/regenerate")
+async def regenerate_job(
+    job_id: str,
+    agenda: SlideAgenda,
+    user_id: str = Depends(get_current_user)
+):
+    """完了したジョブを編集後のアジェンダで再生成（変更したスライドだけ作り直す）"""
+    admit_request()
+    job = await executor.regenerate_job(job_id, user_id, agenda)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status != SlideGenerationStatus.PENDING:
+        raise HTTPException(status_code=409, detail=f"Job is not regeneratable: {job.status}")
+    
+    return {"job_id": job_id, "status": job.status, "version": len(job.versions) + 1}
+
+
 @app.get("/jobs")
 async def get_user_jobs(user_id: str = Depends(get_current_user)):
     """ユーザーのジョブ一覧を取得"""
-    jobs = cosmos_client.get_user_items("slide_jobs", user_id)
+    jobs = await cosmos_client.get_user_items("slide_jobs", user_id)
     return jobs
 
 
 @app.get("/history")
 async def get_generation_history(user_id: str = Depends(get_current_user)):
     """生成履歴を取得"""
-    history = cosmos_client.get_user_items("generation_history", user_id)
+    history = await cosmos_client.get_user_items("generation_history", user_id)
     return history
 
 
@@ -360,7 +1487,7 @@ async def upload_template(
     if not file.filename.endswith('.pptx'):
         raise HTTPException(status_code=400, detail="Only .pptx files are allowed")
     
-    blob_url = blob_client.upload_file(
+    blob_url = await blob_client.upload_file(
         file.file, file.filename, user_id, "templates"
     )
     
@@ -372,14 +1499,14 @@ async def upload_template(
         user_id=user_id
     )
     
-    cosmos_client.create_item("slide_templates", template.dict())
+    await cosmos_client.create_item("slide_templates", template.dict())
     return template.dict()
 
 
 @app.get("/templates")
 async def get_templates(user_id: str = Depends(get_current_user)):
     """ユーザーのテンプレート一覧を取得"""
-    templates = cosmos_client.get_user_items("slide_templates", user_id)
+    templates = await cosmos_client.get_user_items("slide_templates", user_id)
     return templates
 
 
@@ -389,15 +1516,15 @@ async def delete_template(
     user_id: str = Depends(get_current_user)
 ):
     """テンプレートを削除"""
-    template_data = cosmos_client.read_item("slide_templates", template_id, user_id)
+    template_data = await cosmos_client.read_item("slide_templates", template_id, user_id)
     if not template_data:
         raise HTTPException(status_code=404, detail="Template not found")
     
     # Blob Storage からファイルを削除
-    blob_client.delete_file(template_data["blob_url"])
+    await blob_client.delete_file(template_data["blob_url"])
     
     # データベースから削除
-    cosmos_client.delete_item("slide_templates", template_id, user_id)
+    await cosmos_client.delete_item("slide_templates", template_id, user_id)
     
     return {"message": "Template deleted successfully"}
 
@@ -406,7 +1533,7 @@ async def delete_template(
 @app.get("/prompt-templates")
 async def get_prompt_templates(user_id: str = Depends(get_current_user)):
     """プロンプトテンプレート一覧を取得"""
-    templates = cosmos_client.get_user_items("prompt_templates", user_id)
+    templates = await cosmos_client.get_user_items("prompt_templates", user_id)
     return templates
 
 
@@ -425,7 +1552,7 @@ async def create_prompt_template(
         is_default=template.get("is_default", False)
     )
     
-    cosmos_client.create_item("prompt_templates", prompt_template.dict())
+    await cosmos_client.create_item("prompt_templates", prompt_template.dict())
     return prompt_template.dict()
 
 
@@ -436,7 +1563,7 @@ async def update_prompt_template(
     user_id: str = Depends(get_current_user)
 ):
     """プロンプトテンプレートを更新"""
-    existing_template = cosmos_client.read_item("prompt_templates", template_id, user_id)
+    existing_template = await cosmos_client.read_item("prompt_templates", template_id, user_id)
     if not existing_template:
         raise HTTPException(status_code=404, detail="Template not found")
     
@@ -444,7 +1571,7 @@ async def update_prompt_template(
     existing_template.update(template)
     existing_template["updated_at"] = datetime.utcnow().isoformat()
     
-    cosmos_client.update_item("prompt_templates", existing_template)
+    await cosmos_client.update_item("prompt_templates", existing_template)
     return existing_template
 
 
@@ -454,11 +1581,11 @@ async def delete_prompt_template(
     user_id: str = Depends(get_current_user)
 ):
     """プロンプトテンプレートを削除"""
-    template_data = cosmos_client.read_item("prompt_templates", template_id, user_id)
+    template_data = await cosmos_client.read_item("prompt_templates", template_id, user_id)
     if not template_data:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    cosmos_client.delete_item("prompt_templates", template_id, user_id)
+    await cosmos_client.delete_item("prompt_templates", template_id, user_id)
     return {"message": "Prompt template deleted successfully"}
 
 
@@ -466,7 +1593,7 @@ async def delete_prompt_template(
 @app.get("/llm-configs")
 async def get_llm_configs(user_id: str = Depends(get_current_user)):
     """LLM設定一覧を取得"""
-    configs = cosmos_client.get_user_items("llm_configs", user_id)
+    configs = await cosmos_client.get_user_items("llm_configs", user_id)
     return configs
 
 
@@ -487,7 +1614,7 @@ async def create_llm_config(
         is_default=config.get("is_default", False)
     )
     
-    cosmos_client.create_item("llm_configs", llm_config.dict())
+    await cosmos_client.create_item("llm_configs", llm_config.dict())
     return llm_config.dict()
 
 
@@ -498,14 +1625,14 @@ async def update_llm_config(
     user_id: str = Depends(get_current_user)
 ):
     """LLM設定を更新"""
-    existing_config = cosmos_client.read_item("llm_configs", config_id, user_id)
+    existing_config = await cosmos_client.read_item("llm_configs", config_id, user_id)
     if not existing_config:
         raise HTTPException(status_code=404, detail="Config not found")
     
     existing_config.update(config)
     existing_config["updated_at"] = datetime.utcnow().isoformat()
     
-    cosmos_client.update_item("llm_configs", existing_config)
+    await cosmos_client.update_item("llm_configs", existing_config)
     return existing_config
 
 
@@ -515,11 +1642,11 @@ async def delete_llm_config(
     user_id: str = Depends(get_current_user)
 ):
     """LLM設定を削除"""
-    config_data = cosmos_client.read_item("llm_configs", config_id, user_id)
+    config_data = await cosmos_client.read_item("llm_configs", config_id, user_id)
     if not config_data:
         raise HTTPException(status_code=404, detail="Config not found")
     
-    cosmos_client.delete_item("llm_configs", config_id, user_id)
+    await cosmos_client.delete_item("llm_configs", config_id, user_id)
     return {"message": "LLM config deleted successfully"}
 
 
@@ -527,7 +1654,7 @@ async def delete_llm_config(
 @app.get("/user-settings")
 async def get_user_settings(user_id: str = Depends(get_current_user)):
     """ユーザー設定を取得"""
-    settings_data = cosmos_client.read_item("users", user_id, user_id)
+    settings_data = await cosmos_client.read_item("users", user_id, user_id)
     if not settings_data:
         # デフォルト設定を作成
         default_settings = UserSettings(
@@ -535,7 +1662,7 @@ async def get_user_settings(user_id: str = Depends(get_current_user)):
             auto_approval=False,
             notification_enabled=True
         )
-        cosmos_client.create_item("users", default_settings.dict())
+        await cosmos_client.create_item("users", default_settings.dict())
         return default_settings.dict()
     
     return settings_data
@@ -547,20 +1674,20 @@ async def update_user_settings(
     user_id: str = Depends(get_current_user)
 ):
     """ユーザー設定を更新"""
-    existing_settings = cosmos_client.read_item("users", user_id, user_id)
+    existing_settings = await cosmos_client.read_item("users", user_id, user_id)
     if not existing_settings:
         # 新規作成
         user_settings = UserSettings(
             user_id=user_id,
             **settings
         )
-        cosmos_client.create_item("users", user_settings.dict())
+        await cosmos_client.create_item("users", user_settings.dict())
         return user_settings.dict()
     else:
         # 既存設定を更新
         existing_settings.update(settings)
         existing_settings["updated_at"] = datetime.utcnow().isoformat()
-        cosmos_client.update_item("users", existing_settings)
+        await cosmos_client.update_item("users", existing_settings)
         return existing_settings
 
 
@@ -0,0 +1,143 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import time
+
+from ...shared.models import SlideContent
+from ...shared.config import settings
+from ...shared.cache import canonical_hash
+from ...shared.telemetry import telemetry_manager
+
+
+class _JobPrefetch:
+    """1 ジョブ分の先行収集結果"""
+    
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.running: Set[str] = set()
+        self.used: Set[str] = set()
+        self.created_at = time.monotonic()
+
+
+class SpeculativePrefetcher:
+    """アジェンダ承認待ちの間に情報収集を低優先度で先行実行し、承認後に変更のないスライドで再利用する"""
+    
+    def __init__(self, is_idle: Callable[[], bool]):
+        # 投機的な処理は全ジョブ合計で同時実行数を制限し、通常のジョブが待っている間は始めない
+        self.is_idle = is_idle
+        self._budget = asyncio.Semaphore(settings.speculative_max_inflight)
+        self._jobs: Dict[str, _JobPrefetch] = {}
+        
+        self._prefetches = telemetry_manager.create_counter(
+            "speculative_prefetch_total",
+            "先行情報収集の件数（result=started/skipped/reused/awaited/wasted）"
+        )
+    
+    @staticmethod
+    def fingerprint(slide: SlideContent) -> str:
+        """情報収集の結果を左右するスライドの内容（ページ番号の変更は影響しない）"""
+        return canonical_hash({"title": slide.title, "content": slide.content})
+    
+    def start(self, job_id: str, slides: List[SlideContent], collect: Callable[[SlideContent], Awaitable[Any]]):
+        """スライドごとの先行収集を開始"""
+        if not settings.speculative_prefetch_enabled:
+            return
+        
+        self._evict_expired()
+        prefetch = self._jobs.setdefault(job_id, _JobPrefetch())
+        for slide in slides:
+            key = self.fingerprint(slide)
+            if key in prefetch.results or key in prefetch.tasks:
+                continue
+            prefetch.tasks[key] = asyncio.create_task(self._run(prefetch, key, slide, collect))
+    
+    async def take(self, job_id: str, slide: SlideContent) -> Optional[Any]:
+        """先行収集の結果を取得（実行中なら完了を待ち、予算待ちのものは取り消して None）"""
+        prefetch = self._jobs.get(job_id)
+        if prefetch is None:
+            return None
+        
+        key = self.fingerprint(slide)
+        if key in prefetch.results:
+            prefetch.used.add(key)
+            self._prefetches.add(1, {"result": "reused"})
+            return prefetch.results[key]
+        
+        task = prefetch.tasks.get(key)
+        if task is None:
+            return None
+        if key not in prefetch.running:
+            # 予算待ちのまま承認された場合は通常の収集に任せる
+            task.cancel()
+            return None
+        
+        try:
+            result = await asyncio.shield(task)
+        except (asyncio.CancelledError, Exception):
+            return None
+        if result is not None:
+            prefetch.used.add(key)
+            self._prefetches.add(1, {"result": "awaited"})
+        return result
+    
+    def retain(self, job_id: str, slides: List[SlideContent]):
+        """承認されたアジェンダにないスライドの先行収集を取り消す"""
+        prefetch = self._jobs.get(job_id)
+        if prefetch is None:
+            return
+        
+        keep = {self.fingerprint(slide) for slide in slides}
+        for key, task in list(prefetch.tasks.items()):
+            if key not in keep:
+                task.cancel()
+        for key in [key for key in prefetch.results if key not in keep]:
+            del prefetch.results[key]
+            self._prefetches.add(1, {"result": "wasted"})
+    
+    def discard(self, job_id: str):
+        """ジョブの先行収集を破棄（承認後の処理完了・却下・キャンセル時）"""
+        prefetch = self._jobs.pop(job_id, None)
+        if prefetch is None:
+            return
+        
+        for task in prefetch.tasks.values():
+            task.cancel()
+        wasted = len(set(prefetch.results) - prefetch.used)
+        if wasted:
+            self._prefetches.add(wasted, {"result": "wasted"})
+    
+    async def _run(
+        self,
+        prefetch: _JobPrefetch,
+        key: str,
+        slide: SlideContent,
+        collect: Callable[[SlideContent], Awaitable[Any]]
+    ) -> Optional[Any]:
+        try:
+            async with self._budget:
+                if not self.is_idle():
+                    self._prefetches.add(1, {"result": "skipped"})
+                    return None
+                
+                prefetch.running.add(key)
+                self._prefetches.add(1, {"result": "started"})
+                try:
+                    result = await collect(slide)
+                except Exception:
+                    return None
+                if result is not None:
+                    prefetch.results[key] = result
+                return result
+        finally:
+            prefetch.running.discard(key)
+            prefetch.tasks.pop(key, None)
+    
+    def _evict_expired(self):
+        """承認されないまま放置されたジョブの先行収集を破棄"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, prefetch in self._jobs.items()
+            if now - prefetch.created_at > settings.speculative_ttl_seconds
+        ]
+        for job_id in expired:
+            self.discard(job_id)
@@ -1,9 +1,9 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.prompt_template import PromptTemplateConfig
 from semantic_kernel.functions import KernelArguments
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
 
 from a2a_python_sdk import (
@@ -13,19 +13,19 @@ from a2a_python_sdk import (
 
 from ...shared.models import AgentRequest, AgentResponse
 from ...shared.config import settings
+from ...shared.storage import artifact_store, blob_client
+from ...shared.cancellation import CancellationRegistry, RequestCancelledError
+from ...shared.deadlines import RequestBudget
+from ...shared.llm_clients import LLMClientPool, create_execution_settings, resolve_llm_config
+from ...shared.llm_gateway import llm_gateway
+from ...shared.llm_output import LLMJsonParser, response_format
 
 
 class ReviewExecutor(AgentExecutor):
     def __init__(self):
-        self.kernel = Kernel()
-        
-        # Azure OpenAI service setup
-        self.chat_service = AzureChatCompletion(
-            deployment_name=settings.default_llm_model,
-            endpoint=settings.azure_ai_foundry_endpoint,
-            api_key=settings.azure_ai_foundry_key
-        )
-        self.kernel.add_service(self.chat_service)
+        self.cancellation = CancellationRegistry()
+        # リクエストの LLM 設定ごとに Kernel・チャットサービスを作り置きして再利用する
+        self.llm_clients = LLMClientPool("review", self._register_functions)
         
         self._setup_prompts()
     
@@ -80,26 +80,47 @@ class ReviewExecutor(AgentExecutor):
 
 レビューを実行してください：
 """
-        
+
+        self.review_prompt = review_prompt
+        self.json_parser = LLMJsonParser("review")
+        # レビュー結果はスライドごとのノートなど自由な形のため JSON モードで出力させる
+        self.review_format = response_format("slide_review")
+    
+    def _register_functions(self, kernel: Kernel, llm_config: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM 設定用の Kernel にレビュー関数を登録（設定ごとに最初の 1 回だけ呼ばれる）"""
         prompt_config = PromptTemplateConfig(
-            template=review_prompt,
+            template=self.review_prompt,
             name="slide_review",
             description="スライド品質レビューとハルシネーション検出",
-            input_variables=["slide_url", "agenda"]
+            input_variables=["slide_url", "agenda"],
+            execution_settings={"default": create_execution_settings(llm_config, self.review_format)}
         )
         
-        self.review_function = self.kernel.add_function(
-            plugin_name="ReviewPlugin",
-            function_name="review_slides",
-            prompt_template_config=prompt_config
-        )
+        return {
+            "review": kernel.add_function(
+                plugin_name="ReviewPlugin",
+                function_name="review_slides",
+                prompt_template_config=prompt_config
+            )
+        }
     
     async def execute(self, request: AgentRequest) -> AgentResponse:
         """スライドレビューを実行"""
+        try:
+            return await self.cancellation.run(request.request_id, self._execute(request))
+        except RequestCancelledError:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Cancelled"
+            )
+    
+    async def _execute(self, request: AgentRequest) -> AgentResponse:
         try:
             payload = request.payload
             slide_url = payload.get("slide_url", "")
-            agenda = payload.get("agenda", {})
+            agenda = await artifact_store.resolve(payload.get("agenda", {}), request.user_id)
+            budget = RequestBudget(request.deadline)
             
             if not slide_url:
                 return AgentResponse(
@@ -108,6 +129,9 @@ class ReviewExecutor(AgentExecutor):
                     error="Slide URL is required"
                 )
             
+            # 期限までの残り時間が少ない場合は一部のスライドだけをレビューする
+            agenda = self._sample_within_budget(agenda, budget)
+            
             # スライドの内容を分析（実際にはPowerPointファイルを読み込む必要がある）
             slide_content = await self._analyze_slide_content(slide_url)
             
@@ -117,35 +141,38 @@ class ReviewExecutor(AgentExecutor):
                 agenda=json.dumps(agenda, ensure_ascii=False, indent=2)
             )
             
-            result = await self.kernel.invoke(self.review_function, arguments)
-            review_text = str(result)
+            llm_config = resolve_llm_config(payload.get("llm_config"))
+            review_data = self._parse_review(await self._review(llm_config, arguments))
             
-            # JSON パース
-            try:
-                if "```json" in review_text:
-                    start = review_text.find("```json") + 7
-                    end = review_text.find("```", start)
-                    review_text = review_text[start:end].strip()
-                
-                review_data = json.loads(review_text)
-                
-                # ハルシネーション警告をノートとして追加
-                await self._add_warning_notes(slide_url, review_data)
-                
-                return AgentResponse(
-                    request_id=request.request_id,
-                    success=True,
-                    result=review_data
-                )
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                # フォールバック: 基本的なレビュー結果
-                fallback_review = self._create_fallback_review()
+            # 解析できない応答は期限に余裕がある場合だけ再レビューする
+            reinvocations = 0
+            while (
+                review_data is None
+                and reinvocations < settings.llm_json_max_reinvocations
+                and budget.allows(settings.deadline_full_review_seconds)
+            ):
+                reinvocations += 1
+                review_data = self._parse_review(await self._review(llm_config, arguments))
+            
+            if review_data is None:
+                # フォールバック: 基本的なレビュー結果（実際にはレビューしていないことを呼び出し元に伝える）
+                budget.degrade("レビュー結果を解析できなかったため既定の評価を使用")
                 return AgentResponse(
                     request_id=request.request_id,
                     success=True,
-                    result=fallback_review
+                    result=self._create_fallback_review(),
+                    degradations=budget.degradations
                 )
+            
+            # ハルシネーション警告をノートとして追加
+            await self._add_warning_notes(slide_url, review_data)
+            
+            return AgentResponse(
+                request_id=request.request_id,
+                success=True,
+                result=review_data,
+                degradations=budget.degradations
+            )
         
         except Exception as e:
             return AgentResponse(
@@ -154,26 +181,52 @@ class ReviewExecutor(AgentExecutor):
                 error=str(e)
             )
     
+    async def _review(self, llm_config: Dict[str, Any], arguments: KernelArguments) -> str:
+        """LLM でレビューを実行（バックグラウンドのレーンで対話的な呼び出しに予算を譲る）"""
+        async with self.llm_clients.lease(llm_config) as llm:
+            return str(await llm_gateway.invoke(
+                llm.kernel, llm.functions["review"], arguments, lane="background",
+                deployment=llm.deployment, max_tokens=llm_config["max_tokens"]
+            ))
+    
+    def _parse_review(self, text: str) -> Optional[Dict[str, Any]]:
+        """LLM の応答をレビュー結果として読み込む（読み込めない場合は None）"""
+        try:
+            data, _ = self.json_parser.parse(text)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    
+    def _sample_within_budget(self, agenda: Dict[str, Any], budget: RequestBudget) -> Dict[str, Any]:
+        """残り時間が少ない場合はアジェンダから均等に抜き出したスライドだけを残す"""
+        slides = agenda.get("slides", [])
+        sample_size = settings.deadline_review_sample_slides
+        if len(slides) <= sample_size or budget.allows(settings.deadline_full_review_seconds):
+            return agenda
+        
+        step = len(slides) / sample_size
+        budget.degrade(f"{len(slides)} 枚中 {sample_size} 枚のみレビュー")
+        return {**agenda, "slides": [slides[int(i * step)] for i in range(sample_size)]}
+    
     async def cancel(self, request_id: str) -> bool:
-        """処理をキャンセル"""
-        return True
+        """処理をキャンセル（実行中の LLM 呼び出しや HTTP リクエストも中断される）"""
+        return self.cancellation.cancel(request_id)
     
     async def _analyze_slide_content(self, slide_url: str) -> Dict[str, Any]:
         """スライドの内容を分析"""
         try:
             # 実際の実装では、Blob Storage からファイルをダウンロードして
             # python-pptx で内容を解析する
-            from ...shared.storage import blob_client
             
             # ファイルダウンロード
-            file_data = blob_client.download_file(slide_url)
+            file_data = await blob_client.download_file(slide_url)
             if not file_data:
                 return {"error": "Failed to download slide file"}
             
             # PowerPoint ファイル解析
             slide_content = await self._parse_powerpoint_content(file_data)
             return slide_content
-            
+        
         except Exception as e:
             print(f"Failed to analyze slide content: {e}")
             return {"error": str(e)}
@@ -207,7 +260,7 @@ class ReviewExecutor(AgentExecutor):
                 "total_slides": len(prs.slides),
                 "slides": slides_content
             }
-            
+        
         except Exception as e:
             print(f"Failed to parse PowerPoint: {e}")
             return {"error": "Failed to parse PowerPoint file"}
@@ -222,12 +275,11 @@ class ReviewExecutor(AgentExecutor):
             # 実際の実装では、PowerPointファイルを再度開いて
             # ノートスライドに警告を追加し、ファイルを更新する
             
-            from ...shared.storage import blob_client
             from pptx import Presentation
             import io
             
             # ファイルダウンロード
-            file_data = blob_client.download_file(slide_url)
+            file_data = await blob_client.download_file(slide_url)
             if not file_data:
                 return
             
@@ -256,10 +308,10 @@ class ReviewExecutor(AgentExecutor):
             filename = slide_url.split("/")[-1]
             user_id = slide_url.split("/")[-4]  # URL構造から推定
             
-            blob_client.upload_bytes(
+            await blob_client.upload_bytes(
                 output.getvalue(), filename, user_id, "presentations"
             )
-            
+        
         except Exception as e:
             print(f"Failed to add warning notes: {e}")
     
@@ -300,8 +352,23 @@ agent_skills = [
 executor = ReviewExecutor()
 request_handler = DefaultRequestHandler(agent_card, agent_skills, executor)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """共有ストレージクライアントと LLM クライアントの初期化と終了"""
+    await blob_client.initialize()
+    yield
+    await executor.llm_clients.aclose()
+    await blob_client.close()
+
+
 # FastAPI app
-app = FastAPI(title="Review Agent")
+app = FastAPI(title="Review Agent", lifespan=lifespan)
+
+
+@app.post("/cancel/{request_id}")
+async def cancel_request(request_id: str):
+    """実行中のリクエストをキャンセル"""
+    return {"cancelled": await executor.cancel(request_id)}
 
 # Create A2A application
 a2a_app = A2AStarletteApplication(app, request_handler)
@@ -1,14 +1,15 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 import io
+import asyncio
 from typing import Dict, Any, List, Optional
-import requests
+import httpx
 from PIL import Image
-import tempfile
-import os
+import time
 
 from a2a_python_sdk import (
     AgentCard, AgentSkill, AgentExecutor, DefaultRequestHandler,
@@ -16,41 +17,87 @@ from a2a_python_sdk import (
 )
 
 from ...shared.models import AgentRequest, AgentResponse, SlideContent, SlideAgenda
-from ...shared.storage import blob_client
+from ...shared.storage import artifact_store, blob_client
 from ...shared.config import settings
+from ...shared.cancellation import CancellationRegistry, RequestCancelledError
+from ...shared.deadlines import RequestBudget
+
+
+class _SlideSession:
+    """情報が届いたスライドから順に描画するためのセッション
+    
+    描画途中のデッキはこのプロセスのメモリーにだけあるため、複数レプリカで動かす場合は
+    X-Session-Key ヘッダー（ジョブID）で同じレプリカへ振り分ける必要がある（docs/deployment.md）。
+    """
+    
+    def __init__(
+        self,
+        prs: Presentation,
+        agenda: SlideAgenda,
+        user_id: str,
+        include_images: bool,
+        include_tables: bool
+    ):
+        self.prs = prs
+        self.agenda = agenda
+        self.user_id = user_id
+        self.include_images = include_images
+        self.include_tables = include_tables
+        self.pending: Dict[int, Dict[str, Any]] = {}
+        self.next_index = 0
+        self.lock = asyncio.Lock()
+        self.touched_at = time.monotonic()
 
 
 class SlideCreationExecutor(AgentExecutor):
     def __init__(self):
-        pass
+        self.cancellation = CancellationRegistry()
+        self._sessions: Dict[str, _SlideSession] = {}
     
     async def execute(self, request: AgentRequest) -> AgentResponse:
         """スライド作成を実行"""
         try:
+            return await self.cancellation.run(request.request_id, self._execute(request))
+        except RequestCancelledError:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Cancelled"
+            )
+    
+    async def _execute(self, request: AgentRequest) -> AgentResponse:
+        try:
+            if request.agent_type == "begin_slides":
+                return await self._begin_slides(request)
+            elif request.agent_type == "add_slide_information":
+                return await self._add_slide_information(request)
+            elif request.agent_type == "finalize_slides":
+                return await self._finalize_slides(request)
+            elif request.agent_type == "update_slides":
+                return await self._update_slides(request)
+            
             payload = request.payload
             agenda_data = payload.get("agenda", {})
             information = payload.get("information", {})
             template_id = payload.get("template_id")
             include_images = payload.get("include_images", True)
             include_tables = payload.get("include_tables", True)
+            budget = RequestBudget(request.deadline)
             
-            agenda = SlideAgenda(**agenda_data)
+            agenda = SlideAgenda(**await artifact_store.resolve(agenda_data, request.user_id))
+            information = await artifact_store.resolve(information, request.user_id)
             
             # スライド作成
             pptx_data = await self._create_presentation(
-                agenda, information, template_id, include_images, include_tables
-            )
-            
-            # Blob Storage にアップロード
-            filename = f"presentation_{agenda.slides[0].title[:20]}.pptx"
-            blob_url = blob_client.upload_bytes(
-                pptx_data, filename, request.user_id, "presentations"
+                agenda, information, request.user_id, template_id,
+                self._images_within_budget(include_images, budget), include_tables
             )
             
             return AgentResponse(
                 request_id=request.request_id,
                 success=True,
-                result={"slide_url": blob_url, "filename": filename}
+                result=await self._upload_presentation(pptx_data, agenda, request.user_id),
+                degradations=budget.degradations
             )
         
         except Exception as e:
@@ -60,46 +107,233 @@ class SlideCreationExecutor(AgentExecutor):
                 error=str(e)
             )
     
+    async def _begin_slides(self, request: AgentRequest) -> AgentResponse:
+        """パイプライン描画のセッションを開始"""
+        self._evict_expired_sessions()
+        
+        payload = request.payload
+        agenda = SlideAgenda(**await artifact_store.resolve(payload.get("agenda", {}), request.user_id))
+        prs = await self._open_presentation(payload.get("template_id"))
+        
+        session_id = request.request_id
+        self._sessions[session_id] = _SlideSession(
+            prs,
+            agenda,
+            request.user_id,
+            payload.get("include_images", True),
+            payload.get("include_tables", True)
+        )
+        
+        return AgentResponse(
+            request_id=request.request_id,
+            success=True,
+            result={"session_id": session_id}
+        )
+    
+    async def _add_slide_information(self, request: AgentRequest) -> AgentResponse:
+        """1 スライド分の情報を受け取り、描画可能になったスライドを描画"""
+        payload = request.payload
+        session = self._sessions.get(payload.get("session_id", ""))
+        if not session:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Slide session not found"
+            )
+        
+        budget = RequestBudget(request.deadline)
+        async with session.lock:
+            session.touched_at = time.monotonic()
+            session.include_images = self._images_within_budget(session.include_images, budget)
+            session.pending[payload.get("page_number", 0)] = payload.get("information", {})
+            try:
+                rendered = await self._render_ready_slides(session, flush=False)
+            except BaseException:
+                # 描画の途中で失敗・キャンセルしたデッキは続きを描画できないため破棄する
+                self._sessions.pop(payload.get("session_id", ""), None)
+                raise
+        
+        return AgentResponse(
+            request_id=request.request_id,
+            success=True,
+            result={"rendered": rendered, "total": len(session.agenda.slides)},
+            degradations=budget.degradations
+        )
+    
+    async def _finalize_slides(self, request: AgentRequest) -> AgentResponse:
+        """残りのスライドを描画して保存・アップロード"""
+        session = self._sessions.pop(request.payload.get("session_id", ""), None)
+        if not session:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Slide session not found"
+            )
+        
+        budget = RequestBudget(request.deadline)
+        async with session.lock:
+            session.include_images = self._images_within_budget(session.include_images, budget)
+            await self._render_ready_slides(session, flush=True)
+        
+        pptx_data = await asyncio.to_thread(self._save_presentation, session.prs)
+        
+        return AgentResponse(
+            request_id=request.request_id,
+            success=True,
+            result=await self._upload_presentation(pptx_data, session.agenda, request.user_id),
+            degradations=budget.degradations
+        )
+    
+    async def _update_slides(self, request: AgentRequest) -> AgentResponse:
+        """前のデッキを元に、変更されたスライドだけ描画し直して新しいデッキを作成"""
+        payload = request.payload
+        agenda = SlideAgenda(**await artifact_store.resolve(payload.get("agenda", {}), request.user_id))
+        information = await artifact_store.resolve(payload.get("information", {}), request.user_id)
+        # 新しいアジェンダでの位置 → 前のデッキでの位置
+        reuse = {int(index): previous_index for index, previous_index in payload.get("reuse", {}).items()}
+        budget = RequestBudget(request.deadline)
+        include_images = self._images_within_budget(payload.get("include_images", True), budget)
+        
+        data = await blob_client.download_file(payload.get("base_slide_url", ""))
+        if data is None:
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Previous presentation not found"
+            )
+        
+        prs = await asyncio.to_thread(Presentation, io.BytesIO(data))
+        slide_ids = prs.slides._sldIdLst
+        previous_ids = list(slide_ids)
+        if any(previous_index >= len(previous_ids) for previous_index in reuse.values()):
+            return AgentResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Previous presentation does not match its agenda"
+            )
+        
+        # 変更されたスライドは末尾に描画し、最後にアジェンダ順へ並べ替える
+        ordered = []
+        for index, slide_content in enumerate(agenda.slides):
+            if index in reuse:
+                ordered.append(previous_ids[reuse[index]])
+                continue
+            await self._create_slide(
+                prs, slide_content, information, request.user_id,
+                include_images, payload.get("include_tables", True),
+                prs.slide_layouts
+            )
+            ordered.append(slide_ids[-1])
+            await asyncio.sleep(0)
+        
+        for slide_id in list(slide_ids):
+            slide_ids.remove(slide_id)
+            if slide_id not in ordered:
+                prs.part.drop_rel(slide_id.rId)
+        for slide_id in ordered:
+            slide_ids.append(slide_id)
+        
+        pptx_data = await asyncio.to_thread(self._save_presentation, prs)
+        
+        result = await self._upload_presentation(pptx_data, agenda, request.user_id)
+        result["reused"] = len(reuse)
+        result["rendered"] = len(agenda.slides) - len(reuse)
+        return AgentResponse(
+            request_id=request.request_id,
+            success=True,
+            result=result,
+            degradations=budget.degradations
+        )
+    
+    async def _render_ready_slides(self, session: _SlideSession, flush: bool) -> int:
+        """アジェンダ順に、情報が揃っているスライドを描画（flush 時は情報なしでも描画）"""
+        slides = session.agenda.slides
+        while session.next_index < len(slides):
+            slide_content = slides[session.next_index]
+            if slide_content.page_number not in session.pending and not flush:
+                break
+            
+            # 参照で届いた情報は描画する直前に取得する
+            information = await artifact_store.resolve(
+                session.pending.pop(slide_content.page_number, {}), session.user_id
+            )
+            await self._create_slide(
+                session.prs, slide_content,
+                {f"slide_{slide_content.page_number}": information}, session.user_id,
+                session.include_images, session.include_tables, session.prs.slide_layouts
+            )
+            session.next_index += 1
+            await asyncio.sleep(0)
+        
+        return session.next_index
+    
+    def _images_within_budget(self, include_images: bool, budget: RequestBudget) -> bool:
+        """期限までの残り時間が少ない場合は時間のかかる画像のダウンロードを省略する"""
+        if include_images and not budget.allows(settings.deadline_image_download_seconds):
+            budget.degrade("画像のダウンロードを省略")
+            return False
+        return include_images
+    
+    def _evict_expired_sessions(self):
+        """中断されたまま放置されたセッションを削除"""
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if now - session.touched_at > settings.slide_session_ttl_seconds
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+    
+    async def _upload_presentation(self, pptx_data: bytes, agenda: SlideAgenda, user_id: str) -> Dict[str, Any]:
+        """Blob Storage にアップロード"""
+        filename = f"presentation_{agenda.slides[0].title[:20]}.pptx"
+        blob_url = await blob_client.upload_bytes(
+            pptx_data, filename, user_id, "presentations"
+        )
+        return {"slide_url": blob_url, "filename": filename}
+    
     async def cancel(self, request_id: str) -> bool:
-        """処理をキャンセル"""
-        return True
+        """処理をキャンセル（実行中の LLM 呼び出しや HTTP リクエストも中断される。セッションIDの場合はセッションを破棄）"""
+        discarded = self._sessions.pop(request_id, None) is not None
+        return self.cancellation.cancel(request_id) or discarded
     
     async def _create_presentation(
         self, 
         agenda: SlideAgenda, 
         information: Dict[str, Any],
+        user_id: str,
         template_id: Optional[str],
         include_images: bool,
         include_tables: bool
     ) -> bytes:
         """PowerPoint プレゼンテーションを作成"""
-        
-        # テンプレートまたは新規プレゼンテーション
-        if template_id:
-            prs = await self._load_template(template_id)
-        else:
-            prs = Presentation()
-        
-        # 既存のスライドをクリア（テンプレートの場合）
-        if template_id and len(prs.slides) > 0:
-            # 最初のスライドをマスターとして保持
-            slide_layouts = prs.slide_layouts
-        else:
-            slide_layouts = prs.slide_layouts
+        prs = await self._open_presentation(template_id)
+        slide_layouts = prs.slide_layouts
         
         # スライド作成
         for slide_content in agenda.slides:
-            self._create_slide(
-                prs, slide_content, information, 
+            await self._create_slide(
+                prs, slide_content, information, user_id,
                 include_images, include_tables, slide_layouts
             )
+            # スライドごとにイベントループへ制御を戻し、キャンセルを受け付ける
+            await asyncio.sleep(0)
         
         # バイナリデータとして出力
+        return await asyncio.to_thread(self._save_presentation, prs)
+    
+    def _save_presentation(self, prs: Presentation) -> bytes:
+        """プレゼンテーションをバイナリデータとして出力（イベントループを止めないようスレッドで実行する）"""
         output = io.BytesIO()
         prs.save(output)
-        output.seek(0)
         return output.getvalue()
     
+    async def _open_presentation(self, template_id: Optional[str]) -> Presentation:
+        """テンプレートまたは新規プレゼンテーションを開く"""
+        if template_id:
+            return await self._load_template(template_id)
+        return await asyncio.to_thread(Presentation)
+    
     async def _load_template(self, template_id: str) -> Presentation:
         """テンプレートを読み込み"""
         # Cosmos DB からテンプレート情報を取得
@@ -107,18 +341,44 @@ class SlideCreationExecutor(AgentExecutor):
         
         # 簡略化のため、直接 Presentation を作成
         # 実際の実装では template_id から Blob URL を取得してダウンロード
-        return Presentation()
+        return await asyncio.to_thread(Presentation)
     
-    def _create_slide(
+    async def _create_slide(
         self, 
         prs: Presentation, 
         slide_content: SlideContent,
         information: Dict[str, Any],
+        user_id: str,
         include_images: bool,
         include_tables: bool,
         slide_layouts
     ):
-        """個別スライドを作成"""
+        """個別スライドを作成（詳細情報と画像を取得してから、python-pptx の処理をスレッドで実行）"""
+        detailed_content = await artifact_store.resolve(
+            information.get(f"slide_{slide_content.page_number}", {}), user_id
+        )
+        
+        images: List[bytes] = []
+        if detailed_content and include_images and "images" in detailed_content:
+            for image_url in detailed_content["images"][:2]:  # 最大2つの画像
+                image_data = await self._download_image(image_url)
+                if image_data is not None:
+                    images.append(image_data)
+        
+        await asyncio.to_thread(
+            self._render_slide, prs, slide_content, detailed_content, images, include_tables, slide_layouts
+        )
+    
+    def _render_slide(
+        self,
+        prs: Presentation,
+        slide_content: SlideContent,
+        detailed_content: Dict[str, Any],
+        images: List[bytes],
+        include_tables: bool,
+        slide_layouts
+    ):
+        """個別スライドを描画"""
         
         # スライドレイアウトを選択
         if slide_content.page_number == 1:
@@ -144,9 +404,8 @@ class SlideCreationExecutor(AgentExecutor):
                 self._format_content(content_placeholder)
         
         # 詳細情報があれば追加
-        detailed_content = information.get(f"slide_{slide_content.page_number}", {})
         if detailed_content:
-            self._add_detailed_content(slide, detailed_content, include_images, include_tables)
+            self._add_detailed_content(slide, detailed_content, images, include_tables)
         
         # ノート追加（ハルシネーション警告等）
         if slide_content.notes:
@@ -175,7 +434,7 @@ class SlideCreationExecutor(AgentExecutor):
         self, 
         slide, 
         detailed_content: Dict[str, Any],
-        include_images: bool,
+        images: List[bytes],
         include_tables: bool
     ):
         """詳細コンテンツを追加"""
@@ -189,39 +448,38 @@ class SlideCreationExecutor(AgentExecutor):
             else:
                 content_placeholder.text = text_content
         
-        # 画像の追加
-        if include_images and "images" in detailed_content:
-            for i, image_url in enumerate(detailed_content["images"][:2]):  # 最大2つの画像
-                self._add_image_to_slide(slide, image_url, i)
+        # 画像の追加（ダウンロード済みのもの）
+        for i, image_data in enumerate(images):
+            self._add_image_to_slide(slide, image_data, i)
         
         # テーブルの追加
         if include_tables and "tables" in detailed_content:
             for table_data in detailed_content["tables"][:1]:  # 最大1つのテーブル
                 self._add_table_to_slide(slide, table_data)
     
-    def _add_image_to_slide(self, slide, image_url: str, position: int):
-        """スライドに画像を追加"""
+    async def _download_image(self, image_url: str) -> Optional[bytes]:
+        """画像をダウンロード（非同期のためキャンセル時は即座に中断される。失敗した場合は None）"""
         try:
-            # 画像をダウンロード
-            response = requests.get(image_url, timeout=10)
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(image_url)
             if response.status_code == 200:
-                # 一時ファイルに保存
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-                    tmp_file.write(response.content)
-                    tmp_file_path = tmp_file.name
-                
-                # 画像サイズと位置を計算
-                left = Inches(6) if position == 0 else Inches(6)
-                top = Inches(2 + position * 2.5)
-                width = Inches(3)
-                
-                # スライドに画像を追加
-                slide.shapes.add_picture(tmp_file_path, left, top, width=width)
-                
-                # 一時ファイルを削除
-                os.unlink(tmp_file_path)
+                return response.content
+        except Exception as e:
+            print(f"Failed to download image {image_url}: {e}")
+        return None
+    
+    def _add_image_to_slide(self, slide, image_data: bytes, position: int):
+        """スライドに画像を追加"""
+        try:
+            # 画像サイズと位置を計算
+            left = Inches(6) if position == 0 else Inches(6)
+            top = Inches(2 + position * 2.5)
+            width = Inches(3)
+            
+            # スライドに画像を追加
+            slide.shapes.add_picture(io.BytesIO(image_data), left, top, width=width)
         except Exception as e:
-            print(f"Failed to add image {image_url}: {e}")
+            print(f"Failed to add image: {e}")
     
     def _add_table_to_slide(self, slide, table_data: Dict[str, Any]):
         """スライドにテーブルを追加"""
@@ -272,14 +530,44 @@ agent_skills = [
     AgentSkill(
         name="create_slides",
         description="アジェンダと情報からPowerPointスライドを作成"
+    ),
+    AgentSkill(
+        name="begin_slides",
+        description="スライド単位で情報を受け取りながら描画するセッションを開始"
+    ),
+    AgentSkill(
+        name="add_slide_information",
+        description="1 スライド分の情報を受け取り、描画可能なスライドを描画"
+    ),
+    AgentSkill(
+        name="finalize_slides",
+        description="セッションの残りのスライドを描画してアップロード"
+    ),
+    AgentSkill(
+        name="update_slides",
+        description="前のデッキを元に、変更されたスライドだけ描画し直して新しいデッキを作成"
     )
 ]
 
 executor = SlideCreationExecutor()
 request_handler = DefaultRequestHandler(agent_card, agent_skills, executor)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """共有ストレージクライアントの初期化と終了"""
+    await blob_client.initialize()
+    yield
+    await blob_client.close()
+
+
 # FastAPI app
-app = FastAPI(title="Slide Creation Agent")
+app = FastAPI(title="Slide Creation Agent", lifespan=lifespan)
+
+
+@app.post("/cancel/{request_id}")
+async def cancel_request(request_id: str):
+    """実行中のリクエストをキャンセル"""
+    return {"cancelled": await executor.cancel(request_id)}
 
 # Create A2A application
 a2a_app = A2AStarletteApplication(app, request_handler)
@@ -8,8 +8,8 @@ __all__ = [
     # Models
     "SlideGenerationStatus", "LLMProvider", "SlideTemplate", "PromptTemplate",
     "LLMConfig", "SlideContent", "SlideAgenda", "SlideGenerationRequest",
-    "SlideGenerationJob", "UserSettings", "GenerationHistory",
-    "AgentRequest", "AgentResponse",
+    "JobCheckpoint", "DeckVersion", "SlideGenerationJob", "UserSettings", "GenerationHistory",
+    "SlideGenerationBatchRequest", "AgentRequest", "AgentResponse", "JobQueueEntry",
     
     # Configuration
     "settings",
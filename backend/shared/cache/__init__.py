@@ -0,0 +1,13 @@
+from .ttl_cache import TTLCache, canonical_hash
+from .single_flight import SingleFlight
+from .similarity_index import MinHashLSHIndex
+from .response_cache import (
+    ResponseCacheTier, MemoryResponseTier, DiskResponseTier, LLMResponseCache,
+    create_llm_response_cache
+)
+
+__all__ = [
+    "TTLCache", "canonical_hash", "SingleFlight", "MinHashLSHIndex",
+    "ResponseCacheTier", "MemoryResponseTier", "DiskResponseTier", "LLMResponseCache",
+    "create_llm_response_cache",
+]
@@ -0,0 +1,144 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+import asyncio
+import json
+import os
+import time
+
+from ..config import settings
+from ..telemetry import telemetry_manager
+from .ttl_cache import TTLCache, canonical_hash
+
+
+class ResponseCacheTier(ABC):
+    """LLM 応答キャッシュの保存先"""
+    
+    name = "tier"
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """取得（期限切れ・未登録の場合は None）"""
+    
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        """保存"""
+
+
+class MemoryResponseTier(ResponseCacheTier):
+    """プロセス内の LRU キャッシュ"""
+    
+    name = "memory"
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._cache: TTLCache[str] = TTLCache(max_entries, ttl_seconds)
+    
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+    
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        self._cache.set(key, value, ttl_seconds)
+
+
+class DiskResponseTier(ResponseCacheTier):
+    """ローカルディスクのキャッシュ（再起動後も残り、同じボリュームを使うレプリカ間で共有できる）"""
+    
+    name = "disk"
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+    
+    async def get(self, key: str) -> Optional[str]:
+        def read():
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return None
+            if entry.get("expires_at", 0) <= time.time():
+                # 期限切れのファイルは読んだときに削除する
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                return None
+            return entry.get("value")
+        return await asyncio.to_thread(read)
+    
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        def write():
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 書き込み途中のファイルを読まれないよう、一時ファイルから置き換える
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": time.time() + ttl_seconds, "value": value}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        await asyncio.to_thread(write)
+
+
+class LLMResponseCache:
+    """プロンプトとモデルパラメータをキーに LLM の応答を再利用するキャッシュ（上位の保存先から順に参照）"""
+    
+    def __init__(
+        self,
+        name: str,
+        tiers: List[ResponseCacheTier],
+        ttl_seconds: float,
+        max_temperature: float
+    ):
+        self.name = name
+        self.tiers = tiers
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        
+        self._requests = telemetry_manager.create_counter(
+            "llm_cache_requests_total",
+            "LLM 応答キャッシュの参照数（result=hit/miss/skipped、tier=ヒットした保存先）"
+        )
+    
+    @staticmethod
+    def key(prompt: str, **model_params: Any) -> str:
+        """描画済みのプロンプトとモデルパラメータからキーを作成"""
+        return canonical_hash({"prompt": prompt, "model_params": model_params})
+    
+    def should_cache(self, temperature: float) -> bool:
+        """キャッシュを使うか（出力のばらつきが大きい温度ではキャッシュしない）"""
+        if not self.tiers or temperature > self.max_temperature:
+            self._requests.add(1, {"cache": self.name, "result": "skipped"})
+            return False
+        return True
+    
+    async def get(self, key: str) -> Optional[str]:
+        """応答を取得（下位の保存先でヒットした場合は上位にも登録）"""
+        for index, tier in enumerate(self.tiers):
+            value = await tier.get(key)
+            if value is None:
+                continue
+            for upper in self.tiers[:index]:
+                await upper.set(key, value, self.ttl_seconds)
+            self._requests.add(1, {"cache": self.name, "result": "hit", "tier": tier.name})
+            return value
+        
+        self._requests.add(1, {"cache": self.name, "result": "miss"})
+        return None
+    
+    async def set(self, key: str, value: str):
+        """応答を全ての保存先に登録"""
+        for tier in self.tiers:
+            await tier.set(key, value, self.ttl_seconds)
+
+
+def create_llm_response_cache(name: str) -> LLMResponseCache:
+    """設定に従って LLM 応答キャッシュを作成"""
+    tiers: List[ResponseCacheTier] = []
+    if settings.llm_cache_enabled:
+        tiers.append(MemoryResponseTier(settings.llm_cache_max_entries, settings.llm_cache_ttl_seconds))
+        if settings.llm_cache_disk_enabled:
+            tiers.append(DiskResponseTier(os.path.join(settings.llm_cache_disk_path, name)))
+    return LLMResponseCache(
+        name, tiers, settings.llm_cache_ttl_seconds, settings.llm_cache_max_temperature
+    )
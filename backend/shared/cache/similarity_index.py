@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+import hashlib
+import random
+import re
+import time
+
+
+V = TypeVar("V")
+
+# 2^61 - 1（ハッシュ関数族の法）
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+class _IndexEntry(Generic[V]):
+    def __init__(self, scope: Hashable, signature: Tuple[int, ...], value: V, expires_at: float):
+        self.scope = scope
+        self.signature = signature
+        self.value = value
+        self.expires_at = expires_at
+
+
+class MinHashLSHIndex(Generic[V]):
+    """文字 n-gram の MinHash と LSH で言い換えに近いテキストを探す、件数上限（LRU）と有効期限付きのインデックス"""
+    
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 3
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        
+        # プロセスをまたいでも同じシグネチャになるよう固定シードでハッシュ関数族を作る
+        rng = random.Random(0)
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._entries: "OrderedDict[Hashable, _IndexEntry[V]]" = OrderedDict()
+        self._buckets: Dict[Tuple[Hashable, int, Tuple[int, ...]], Set[Hashable]] = {}
+    
+    def add(self, key: Hashable, text: str, value: V, scope: Hashable = None):
+        """テキストを登録（scope が異なるエントリ同士は照合しない）"""
+        self.remove(key)
+        entry = _IndexEntry(scope, self.signature(text), value, time.monotonic() + self.ttl_seconds)
+        self._entries[key] = entry
+        for band in self._bands(entry.signature):
+            self._buckets.setdefault((scope,) + band, set()).add(key)
+        
+        while len(self._entries) > self.max_entries:
+            self.remove(next(iter(self._entries)))
+    
+    def query(self, text: str, scope: Hashable = None) -> Optional[Tuple[V, float]]:
+        """最も類似したエントリの値と推定 Jaccard 類似度（候補がない場合は None）"""
+        signature = self.signature(text)
+        candidates: Set[Hashable] = set()
+        for band in self._bands(signature):
+            candidates.update(self._buckets.get((scope,) + band, ()))
+        
+        best: Optional[Tuple[Hashable, float]] = None
+        now = time.monotonic()
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                self.remove(key)
+                continue
+            similarity = self.similarity(signature, entry.signature)
+            if best is None or similarity > best[1]:
+                best = (key, similarity)
+        
+        if best is None:
+            return None
+        self._entries.move_to_end(best[0])
+        return self._entries[best[0]].value, best[1]
+    
+    def remove(self, key: Hashable):
+        """エントリを削除"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in self._bands(entry.signature):
+            bucket_key = (entry.scope,) + band
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_key]
+    
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """テキストの MinHash シグネチャ"""
+        shingles = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for shingle in self._shingles(text)
+        ]
+        return tuple(
+            min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles)
+            for a, b in self._permutations
+        )
+    
+    @staticmethod
+    def similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+        """シグネチャから推定した Jaccard 類似度"""
+        return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+    
+    def _shingles(self, text: str) -> Set[str]:
+        # 大文字小文字・空白の違いは無視する（日本語は分かち書きしないため文字単位で切る）
+        normalized = re.sub(r"\s+", " ", text.lower()).strip()
+        if len(normalized) <= self.shingle_size:
+            return {normalized}
+        return {
+            normalized[i:i + self.shingle_size]
+            for i in range(len(normalized) - self.shingle_size + 1)
+        }
+    
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
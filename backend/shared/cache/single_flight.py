@@ -0,0 +1,49 @@
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+import asyncio
+
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """先行する呼び出しがキャンセルされた（待機中の呼び出しが代わりに実行する）"""
+
+
+class SingleFlight:
+    """同じキーの同時実行をまとめ、先行する呼び出しの結果を共有する"""
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """fn を実行して結果を返す（後続の呼び出しは先行結果を待ち、shared=True を返す）"""
+        future = self._inflight.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except _LeaderCancelled:
+                # 先行の呼び出しだけがキャンセルされた場合は、待機者の 1 つが実行を引き継ぐ
+                future = self._inflight.get(key)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # future.cancel() では待機者までキャンセル扱いになるため、引き継ぎを促す例外を設定する
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 待機者がいない場合に "exception was never retrieved" を出さない
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+import hashlib
+import json
+import time
+
+
+V = TypeVar("V")
+
+
+def canonical_hash(data: Any) -> str:
+    """キー順・空白に依存しない JSON 表現の SHA-256 ハッシュ"""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class TTLCache(Generic[V]):
+    """有効期限と件数上限（LRU）を持つプロセス内キャッシュ"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[V]:
+        """値を取得（期限切れ・未登録の場合は None）"""
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None):
+        """値を登録（上限を超えた場合は最も古く使われたものから破棄）"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> Optional[V]:
+        """値を削除して返す"""
+        item = self._entries.pop(key, None)
+        return item[1] if item else None
+    
+    def clear(self):
+        """全件削除"""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Dict
+import asyncio
+
+
+class RequestCancelledError(Exception):
+    """リクエストがキャンセルされたことを示す例外"""
+    
+    def __init__(self, request_id: str):
+        super().__init__(f"Request {request_id} was cancelled")
+        self.request_id = request_id
+
+
+class CancellationRegistry:
+    """実行中のリクエストをタスクとして管理し、request_id でキャンセルできるようにする"""
+    
+    def __init__(self, max_pending_cancels: int = 1000):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # 実行開始前に届いたキャンセルも記録しておく
+        self._cancelled: "OrderedDict[str, None]" = OrderedDict()
+        self._max_pending_cancels = max_pending_cancels
+    
+    async def run(self, request_id: str, coro: Awaitable[Any]) -> Any:
+        """コルーチンをキャンセル可能なタスクとして実行"""
+        if request_id in self._cancelled:
+            coro.close()
+            raise RequestCancelledError(request_id)
+        
+        task = asyncio.ensure_future(coro)
+        self._tasks[request_id] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # cancel() による中断のみ通常の結果に変換し、呼び出し元自体のキャンセルは伝播させる
+            if request_id in self._cancelled and task.cancelled():
+                raise RequestCancelledError(request_id)
+            raise
+        finally:
+            self._tasks.pop(request_id, None)
+            self._cancelled.pop(request_id, None)
+    
+    def cancel(self, request_id: str) -> bool:
+        """リクエストをキャンセル（実行中のタスクがあれば True）"""
+        self._cancelled[request_id] = None
+        while len(self._cancelled) > self._max_pending_cancels:
+            self._cancelled.popitem(last=False)
+        
+        task = self._tasks.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+    
+    def is_running(self, request_id: str) -> bool:
+        """リクエストが実行中かどうか"""
+        task = self._tasks.get(request_id)
+        return task is not None and not task.done()
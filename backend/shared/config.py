@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -17,10 +17,22 @@ class Settings(BaseSettings):
     blob_storage_connection_string: str
     blob_container_name: str = "slides"
     
+    # Artifact store（エージェント間の大きなペイロードを参照で受け渡す）
+    artifact_store_enabled: bool = True
+    artifact_store_backend: str = "blob"  # blob / local
+    artifact_store_path: str = "./data/artifacts"
+    artifact_inline_max_bytes: int = 16384
+    artifact_cache_max_entries: int = 256
+    artifact_cache_ttl_seconds: int = 3600
+    
     # Azure AI Foundry
     azure_ai_foundry_endpoint: str
     azure_ai_foundry_key: str
     
+    # Other LLM providers（LLM設定で provider に指定した場合に使用）
+    openai_api_key: Optional[str] = None
+    anthropic_api_key: Optional[str] = None
+    
     # OpenTelemetry
     otel_service_name: str = "pptx-generator"
     otel_exporter_endpoint: Optional[str] = None
@@ -30,10 +42,117 @@ class Settings(BaseSettings):
     a2a_host: str = "0.0.0.0"
     a2a_token_secret: str
     
+    # Agent endpoints / A2A connection pool
+    agent_transport: str = "a2a"  # a2a / inprocess（単一プロセスで全エージェントを実行）
+    agenda_agent_url: str = "http://agenda-agent:8001"
+    information_agent_url: str = "http://information-agent:8002"
+    slide_agent_url: str = "http://slide-agent:8003"
+    review_agent_url: str = "http://review-agent:8004"
+    a2a_http2: bool = False
+    a2a_timeout: float = 300.0
+    a2a_max_connections: int = 100
+    a2a_max_keepalive_connections: int = 20
+    a2a_keepalive_expiry: float = 30.0
+    a2a_agent_max_connections: Dict[str, int] = {}
+    
     # API Settings
     api_cors_origins: List[str] = ["http://localhost:3000"]
     api_debug: bool = False
     
+    # Job queue
+    job_queue_backend: str = "sqlite"  # sqlite / memory
+    job_queue_path: str = "./data/job_queue.db"
+    job_worker_concurrency: int = 4
+    job_max_running_per_user: int = 2  # 0 以下で無制限
+    job_state_debounce_seconds: float = 1.0
+    job_resume_on_startup: bool = True
+    # 起動時に再開するジョブの所有者（レプリカごとに永続キューと対応する固定の値を指定、未指定時はホスト名）
+    orchestrator_instance_id: str = ""
+    idempotency_window_seconds: int = 600
+    idempotency_max_entries: int = 10000
+    
+    # Result cache
+    result_cache_enabled: bool = True
+    result_cache_ttl_seconds: int = 86400
+    result_cache_max_entries: int = 1000
+    
+    # LLM response cache（温度が llm_cache_max_temperature を超える呼び出しはキャッシュしない）
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1000
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_disk_enabled: bool = False
+    llm_cache_disk_path: str = "./data/llm_cache"
+    llm_cache_max_temperature: float = 0.7
+    
+    # Structured LLM output（json_schema / json_object / none、解析できない場合の再呼び出し回数）
+    llm_response_format: str = "json_schema"
+    llm_json_max_reinvocations: int = 1
+    
+    # LLM gateway（0 は無制限。デプロイメント別の上限は {"gpt-4": {"rpm": 300, "tpm": 60000, "concurrency": 20}} の形式）
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    llm_max_concurrency: int = 0
+    llm_deployment_limits: Dict[str, Dict[str, int]] = {}
+    llm_rate_limit_max_retries: int = 3
+    llm_rate_limit_backoff_seconds: float = 2.0
+    
+    # LLM client pool（LLM設定ごとの Kernel・チャットサービスを再利用し、使われなくなったものは閉じる）
+    llm_client_pool_max_entries: int = 16
+    llm_client_idle_seconds: int = 600
+    
+    # Near-duplicate agenda drafts（言い換えたプロンプトに過去のアジェンダを下書きとして提示）
+    agenda_draft_enabled: bool = True
+    agenda_draft_similarity_threshold: float = 0.45
+    agenda_draft_max_entries: int = 2000
+    agenda_draft_ttl_seconds: int = 604800
+    agenda_draft_num_perm: int = 128
+    agenda_draft_bands: int = 32
+    
+    # Stage resilience（キーはステージ名: agenda / information / slide / review）
+    stage_timeouts: Dict[str, float] = {"agenda": 120.0, "information": 180.0, "slide": 300.0, "review": 120.0}
+    stage_max_retries: Dict[str, int] = {"agenda": 2, "information": 2, "slide": 0, "review": 1}
+    retry_backoff_base_seconds: float = 0.5
+    retry_backoff_max_seconds: float = 10.0
+    hedging_enabled: bool = False
+    hedged_stages: List[str] = ["agenda", "information"]
+    hedge_quantile: float = 0.95
+    hedge_min_delay_seconds: float = 1.0
+    
+    # Circuit breakers / admission control
+    circuit_breaker_failure_rate: float = 0.5
+    circuit_breaker_window_size: int = 20
+    circuit_breaker_window_seconds: float = 60.0
+    circuit_breaker_min_calls: int = 10
+    circuit_breaker_open_seconds: float = 30.0
+    circuit_breaker_half_open_max_calls: int = 1
+    admission_enabled: bool = True
+    admission_max_error_rate: float = 0.3
+    admission_max_queue_wait_seconds: float = 300.0
+    admission_retry_after_seconds: int = 30
+    
+    # Batch generation
+    batch_max_jobs: int = 100
+    batch_fetch_cache_max_entries: int = 512
+    batch_fetch_cache_ttl_seconds: int = 3600
+    
+    # Pipeline
+    slide_pipeline_enabled: bool = True
+    information_concurrency: int = 4
+    slide_session_ttl_seconds: int = 1800
+    
+    # Latency targets (0 = no deadline unless set per request or per user)
+    default_latency_target_seconds: int = 0
+    deadline_full_information_seconds: float = 60.0
+    deadline_reduced_reference_urls: int = 1
+    deadline_image_download_seconds: float = 30.0
+    deadline_full_review_seconds: float = 60.0
+    deadline_review_sample_slides: int = 3
+    
+    # Speculative prefetch
+    speculative_prefetch_enabled: bool = True
+    speculative_max_inflight: int = 8
+    speculative_ttl_seconds: int = 1800
+    
     # Default configurations
     default_llm_model: str = "gpt-4"
     default_temperature: float = 0.7
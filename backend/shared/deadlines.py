@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+
+def deadline_after(seconds: float) -> datetime:
+    """現在から seconds 秒後の期限"""
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+class RequestBudget:
+    """リクエストの期限までの残り時間と、期限に合わせて省略した処理の記録"""
+    
+    def __init__(self, deadline: Optional[datetime] = None):
+        self.deadline = deadline
+        self.degradations: List[str] = []
+    
+    def remaining(self) -> Optional[float]:
+        """期限までの残り秒数（期限がない場合は None）"""
+        if self.deadline is None:
+            return None
+        return (self.deadline - datetime.utcnow()).total_seconds()
+    
+    def allows(self, seconds: float) -> bool:
+        """残り時間が seconds 秒以上あるか（期限がない場合は常に True）"""
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+    
+    def degrade(self, description: str):
+        """期限に合わせて省略した処理を記録"""
+        if description not in self.degradations:
+            self.degradations.append(description)
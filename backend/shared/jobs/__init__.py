@@ -0,0 +1,14 @@
+from .queue import (
+    JobQueue, JobQueueBackend, MemoryJobQueueBackend, SQLiteJobQueueBackend,
+    create_job_queue
+)
+from .worker import JobWorkerPool
+from .events import TERMINAL_STATUSES, JobEventBroker, format_sse, job_event_broker
+from .state_writer import PATCH_FIELDS, JobStateWriter
+
+__all__ = [
+    "JobQueue", "JobQueueBackend", "MemoryJobQueueBackend", "SQLiteJobQueueBackend",
+    "create_job_queue", "JobWorkerPool",
+    "TERMINAL_STATUSES", "JobEventBroker", "format_sse", "job_event_broker",
+    "PATCH_FIELDS", "JobStateWriter",
+]
@@ -0,0 +1,158 @@
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+import asyncio
+import json
+import time
+
+from ..models import SlideGenerationJob, SlideGenerationStatus
+
+
+TERMINAL_STATUSES = (
+    SlideGenerationStatus.COMPLETED,
+    SlideGenerationStatus.FAILED,
+    SlideGenerationStatus.CANCELLED,
+)
+
+
+class _JobStream:
+    """1 ジョブ分のイベント履歴"""
+    
+    def __init__(self, user_id: str, history_size: int):
+        self.user_id = user_id
+        self.events: Deque[Tuple[int, str, Dict[str, Any]]] = deque(maxlen=history_size)
+        self.snapshot: Dict[str, Any] = {}
+        self.last_id = 0
+        self.agenda_hash: Optional[int] = None
+        self.terminal = False
+        self.touched_at = time.monotonic()
+        self.changed = asyncio.Condition()
+
+
+class JobEventBroker:
+    """_update_job の状態遷移をプロセス内で配信するブローカー（Cosmos DB を読まずに購読できる）"""
+    
+    def __init__(self, history_size: int = 100, retention_seconds: int = 3600):
+        self.history_size = history_size
+        self.retention_seconds = retention_seconds
+        self._streams: Dict[str, _JobStream] = {}
+    
+    def owner(self, job_id: str) -> Optional[str]:
+        """ジョブの所有ユーザーID（未登録の場合は None）"""
+        stream = self._streams.get(job_id)
+        return stream.user_id if stream else None
+    
+    async def publish(self, job: SlideGenerationJob):
+        """ジョブの状態をイベントとして配信"""
+        stream = self._streams.get(job.id)
+        if stream is None:
+            self._evict_expired()
+            stream = _JobStream(job.user_id, self.history_size)
+            self._streams[job.id] = stream
+        
+        job_data = json.loads(job.json())
+        event = {
+            "job_id": job.id,
+            "status": job_data["status"],
+            "progress": job_data["progress"],
+            "current_step": job_data["current_step"],
+            "result_blob_url": job_data["result_blob_url"],
+            "error_message": job_data["error_message"],
+            "queue_position": job_data["queue_position"],
+            "updated_at": job_data["updated_at"],
+        }
+        
+        # アジェンダは変化したときだけ送る（部分的なアジェンダも含む）
+        agenda_hash = hash(json.dumps(job_data["agenda"], sort_keys=True)) if job_data["agenda"] else None
+        if agenda_hash != stream.agenda_hash:
+            event["agenda"] = job_data["agenda"]
+            event["agenda_draft_similarity"] = job_data["agenda_draft_similarity"]
+            stream.agenda_hash = agenda_hash
+        
+        async with stream.changed:
+            stream.last_id += 1
+            stream.events.append((stream.last_id, "update", event))
+            stream.snapshot = job_data
+            stream.terminal = job.status in TERMINAL_STATUSES
+            stream.touched_at = time.monotonic()
+            stream.changed.notify_all()
+    
+    async def publish_fields(self, job_id: str, fields: Dict[str, Any]):
+        """ジョブの一部フィールドの変更を配信（未登録のジョブは無視）"""
+        stream = self._streams.get(job_id)
+        if stream is None or stream.terminal:
+            return
+        
+        async with stream.changed:
+            stream.last_id += 1
+            stream.events.append((stream.last_id, "update", {"job_id": job_id, **fields}))
+            stream.snapshot = {**stream.snapshot, **fields}
+            stream.touched_at = time.monotonic()
+            stream.changed.notify_all()
+    
+    async def subscribe(
+        self,
+        job_id: str,
+        last_event_id: Optional[int] = None,
+        keepalive_seconds: float = 15.0
+    ) -> AsyncIterator[Tuple[Optional[int], str, Dict[str, Any]]]:
+        """イベントを購読（last_event_id 以降から再開、欠落時はスナップショットを送る）"""
+        stream = self._streams.get(job_id)
+        if stream is None:
+            return
+        
+        oldest_id = stream.events[0][0] if stream.events else stream.last_id + 1
+        if last_event_id is None or last_event_id < oldest_id - 1 or last_event_id > stream.last_id:
+            yield stream.last_id, "snapshot", stream.snapshot
+            cursor = stream.last_id
+        else:
+            cursor = last_event_id
+        
+        while True:
+            pending = [e for e in stream.events if e[0] > cursor]
+            for event_id, event_type, data in pending:
+                yield event_id, event_type, data
+                cursor = event_id
+            
+            if stream.terminal and cursor >= stream.last_id:
+                return
+            
+            timed_out = False
+            async with stream.changed:
+                try:
+                    await asyncio.wait_for(
+                        stream.changed.wait_for(lambda: stream.last_id > cursor),
+                        timeout=keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    timed_out = True
+
+            # ロックを保持したまま yield すると配信側が待たされるため、ロック外で送る
+            if timed_out:
+                yield None, "keepalive", {}
+    
+    def _evict_expired(self):
+        """保持期間を過ぎたストリームを削除（未終了のジョブは長めに保持）"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, stream in self._streams.items()
+            if now - stream.touched_at > self.retention_seconds * (1 if stream.terminal else 24)
+        ]
+        for job_id in expired:
+            del self._streams[job_id]
+
+
+def format_sse(event_id: Optional[int], event_type: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 形式に整形"""
+    if event_type == "keepalive":
+        return ": keepalive\n\n"
+    
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Global instance
+job_event_broker = JobEventBroker()
@@ -0,0 +1,379 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+
+from ..models import JobQueueEntry
+from ..config import settings
+from ..telemetry import telemetry_manager
+from .scheduler import FairShareScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueBackend(ABC):
+    """ジョブキューの永続化バックエンド"""
+    
+    @abstractmethod
+    async def put(self, entry: JobQueueEntry):
+        """エントリを追加"""
+    
+    @abstractmethod
+    async def pending(self) -> List[JobQueueEntry]:
+        """待機中のエントリ一覧"""
+    
+    @abstractmethod
+    async def claim(self, entry_id: str) -> Optional[JobQueueEntry]:
+        """待機中のエントリを処理中にする（既に取得済みの場合は None）"""
+    
+    @abstractmethod
+    async def complete(self, entry_id: str):
+        """処理済みエントリを削除"""
+    
+    @abstractmethod
+    async def remove_job(self, job_id: str) -> List[str]:
+        """待機中のジョブをキューから取り除き、削除したエントリIDを返す"""
+    
+    @abstractmethod
+    async def depth(self) -> int:
+        """待機中のエントリ数"""
+    
+    @abstractmethod
+    async def job_ids(self) -> Set[str]:
+        """待機中・処理中のエントリを持つジョブID"""
+    
+    @abstractmethod
+    async def recover(self) -> int:
+        """再起動前に処理中だったエントリを待機状態に戻す"""
+
+
+class MemoryJobQueueBackend(JobQueueBackend):
+    """プロセス内メモリのバックエンド（開発・テスト用、永続化なし）"""
+    
+    def __init__(self):
+        self._queued: List[JobQueueEntry] = []
+        self._running: Dict[str, JobQueueEntry] = {}
+    
+    async def put(self, entry: JobQueueEntry):
+        self._queued.append(entry)
+    
+    async def pending(self) -> List[JobQueueEntry]:
+        return list(self._queued)
+    
+    async def claim(self, entry_id: str) -> Optional[JobQueueEntry]:
+        for index, entry in enumerate(self._queued):
+            if entry.id == entry_id:
+                del self._queued[index]
+                entry.started_at = datetime.utcnow()
+                self._running[entry.id] = entry
+                return entry
+        return None
+    
+    async def complete(self, entry_id: str):
+        self._running.pop(entry_id, None)
+    
+    async def remove_job(self, job_id: str) -> List[str]:
+        removed = [e.id for e in self._queued if e.job_id == job_id]
+        self._queued = [e for e in self._queued if e.job_id != job_id]
+        return removed
+    
+    async def depth(self) -> int:
+        return len(self._queued)
+    
+    async def job_ids(self) -> Set[str]:
+        return {e.job_id for e in self._queued} | {e.job_id for e in self._running.values()}
+    
+    async def recover(self) -> int:
+        recovered = list(self._running.values())
+        self._running.clear()
+        self._queued = recovered + self._queued
+        return len(recovered)
+
+
+class SQLiteJobQueueBackend(JobQueueBackend):
+    """ローカル SQLite ファイルによる永続キュー"""
+    
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_queue (
+                id TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                enqueued_at TEXT NOT NULL,
+                started_at TEXT,
+                weight REAL NOT NULL DEFAULT 1.0
+            )
+            """
+        )
+        # 重み列がない旧スキーマのキューファイルを移行
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(job_queue)")]
+        if "weight" not in columns:
+            self._conn.execute("ALTER TABLE job_queue ADD COLUMN weight REAL NOT NULL DEFAULT 1.0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_job_queue_status ON job_queue (status, enqueued_at)"
+        )
+        self._conn.commit()
+    
+    async def _run(self, func, *args):
+        """SQLite 操作をスレッドで実行してイベントループをブロックしない"""
+        def locked():
+            with self._lock:
+                return func(*args)
+        return await asyncio.to_thread(locked)
+    
+    async def put(self, entry: JobQueueEntry):
+        def insert():
+            self._conn.execute(
+                "INSERT INTO job_queue (id, job_id, user_id, kind, status, enqueued_at, weight) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (
+                    entry.id, entry.job_id, entry.user_id, entry.kind,
+                    entry.enqueued_at.isoformat(), entry.weight
+                )
+            )
+            self._conn.commit()
+        await self._run(insert)
+    
+    async def pending(self) -> List[JobQueueEntry]:
+        def select():
+            rows = self._conn.execute(
+                "SELECT id, job_id, user_id, kind, enqueued_at, weight FROM job_queue "
+                "WHERE status = 'queued' ORDER BY enqueued_at"
+            ).fetchall()
+            return [self._to_entry(row) for row in rows]
+        return await self._run(select)
+    
+    async def claim(self, entry_id: str) -> Optional[JobQueueEntry]:
+        def update():
+            started_at = datetime.utcnow()
+            cursor = self._conn.execute(
+                "UPDATE job_queue SET status = 'running', started_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (started_at.isoformat(), entry_id)
+            )
+            self._conn.commit()
+            if cursor.rowcount == 0:
+                return None
+            row = self._conn.execute(
+                "SELECT id, job_id, user_id, kind, enqueued_at, weight FROM job_queue WHERE id = ?",
+                (entry_id,)
+            ).fetchone()
+            entry = self._to_entry(row)
+            entry.started_at = started_at
+            return entry
+        return await self._run(update)
+    
+    def _to_entry(self, row) -> JobQueueEntry:
+        return JobQueueEntry(
+            id=row[0],
+            job_id=row[1],
+            user_id=row[2],
+            kind=row[3],
+            enqueued_at=datetime.fromisoformat(row[4]),
+            weight=row[5]
+        )
+    
+    async def complete(self, entry_id: str):
+        def delete():
+            self._conn.execute("DELETE FROM job_queue WHERE id = ?", (entry_id,))
+            self._conn.commit()
+        await self._run(delete)
+    
+    async def remove_job(self, job_id: str) -> List[str]:
+        def delete():
+            rows = self._conn.execute(
+                "SELECT id FROM job_queue WHERE job_id = ? AND status = 'queued'", (job_id,)
+            ).fetchall()
+            self._conn.execute(
+                "DELETE FROM job_queue WHERE job_id = ? AND status = 'queued'", (job_id,)
+            )
+            self._conn.commit()
+            return [row[0] for row in rows]
+        return await self._run(delete)
+    
+    async def depth(self) -> int:
+        def count():
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM job_queue WHERE status = 'queued'"
+            ).fetchone()[0]
+        return await self._run(count)
+    
+    async def job_ids(self) -> Set[str]:
+        def select():
+            return {row[0] for row in self._conn.execute("SELECT DISTINCT job_id FROM job_queue")}
+        return await self._run(select)
+    
+    async def recover(self) -> int:
+        def reset():
+            cursor = self._conn.execute(
+                "UPDATE job_queue SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            )
+            self._conn.commit()
+            return cursor.rowcount
+        return await self._run(reset)
+
+
+class JobQueue:
+    """バックエンドをラップし、公平スケジューリング・待機通知とメトリクスを提供するキュー"""
+    
+    def __init__(self, backend: JobQueueBackend, scheduler: Optional[FairShareScheduler] = None):
+        self.backend = backend
+        self.scheduler = scheduler or FairShareScheduler()
+        # 待機順位が変わったジョブを通知するコールバック（{job_id: (user_id, 順位 or None)}）
+        self.on_positions_changed: Optional[
+            Callable[[Dict[str, Tuple[str, Optional[int]]]], Awaitable[None]]
+        ] = None
+        self._available = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        self._depth = 0
+        self._positions: Dict[str, Tuple[str, int]] = {}
+        self._oldest_startable: Optional[datetime] = None
+        
+        self._wait_time = telemetry_manager.create_histogram(
+            "job_queue_wait_time_seconds",
+            "ジョブがキューで待機した時間"
+        )
+        self._enqueued = telemetry_manager.create_counter(
+            "job_queue_enqueued_total",
+            "キューに投入されたジョブ数"
+        )
+        telemetry_manager.create_observable_gauge(
+            "job_queue_depth",
+            lambda: self._depth,
+            "キューで待機中のジョブ数"
+        )
+    
+    async def start(self) -> int:
+        """起動時に中断されたエントリを復旧する"""
+        recovered = await self.backend.recover()
+        await self._refresh()
+        self._available.set()
+        return recovered
+    
+    async def put(
+        self,
+        job_id: str,
+        user_id: str,
+        kind: str,
+        entry_id: str,
+        weight: float = 1.0
+    ) -> JobQueueEntry:
+        """ジョブをキューに投入（weight はユーザーの重み）"""
+        entry = JobQueueEntry(id=entry_id, job_id=job_id, user_id=user_id, kind=kind, weight=weight)
+        self.scheduler.assign(entry)
+        await self.backend.put(entry)
+        self._enqueued.add(1, {"kind": kind})
+        await self._refresh()
+        self._available.set()
+        return entry
+    
+    async def get(self) -> JobQueueEntry:
+        """次に処理すべきエントリを取得（開始可能なエントリがない場合は待機）"""
+        while True:
+            # 取得前にクリアすることで、取得失敗後の投入・完了通知を取りこぼさない
+            self._available.clear()
+            async with self._claim_lock:
+                entry = await self._claim_next()
+            if entry:
+                await self._refresh()
+                wait_seconds = (entry.started_at - entry.enqueued_at).total_seconds()
+                self._wait_time.record(wait_seconds, {"kind": entry.kind})
+                return entry
+            
+            await self._available.wait()
+    
+    async def task_done(self, entry: JobQueueEntry):
+        """処理完了を記録し、上限で待っていたエントリを起こす"""
+        await self.backend.complete(entry.id)
+        self.scheduler.on_finish(entry)
+        self._available.set()
+    
+    async def remove_job(self, job_id: str) -> bool:
+        """待機中のジョブを取り除く"""
+        removed = await self.backend.remove_job(job_id)
+        for entry_id in removed:
+            self.scheduler.forget(entry_id)
+        await self._refresh()
+        return bool(removed)
+    
+    async def job_ids(self) -> Set[str]:
+        """キューに載っている（待機中・処理中の）ジョブID"""
+        return await self.backend.job_ids()
+    
+    def position(self, job_id: str) -> Optional[int]:
+        """待機順位（1 始まり、待機中でない場合は None）"""
+        position = self._positions.get(job_id)
+        return position[1] if position else None
+    
+    @property
+    def depth(self) -> int:
+        """最後に観測した待機数"""
+        return self._depth
+    
+    def oldest_wait_seconds(self) -> float:
+        """開始可能な待機エントリのうち最も長い待ち時間"""
+        if self._oldest_startable is None:
+            return 0.0
+        return (datetime.utcnow() - self._oldest_startable).total_seconds()
+    
+    async def _claim_next(self) -> Optional[JobQueueEntry]:
+        for candidate in self.scheduler.select(await self.backend.pending()):
+            entry = await self.backend.claim(candidate.id)
+            if entry:
+                self.scheduler.on_start(entry)
+                return entry
+        return None
+    
+    async def _refresh(self):
+        """待機数と待機順位を更新し、変化した順位を通知"""
+        pending = self.scheduler.order(await self.backend.pending())
+        self._depth = len(pending)
+        # ユーザー上限で止まっているエントリはシステム全体の混雑を表さないため除く
+        startable = [entry.enqueued_at for entry in pending if self.scheduler.can_start(entry)]
+        self._oldest_startable = min(startable) if startable else None
+        
+        positions: Dict[str, Tuple[str, int]] = {}
+        for entry in pending:
+            if entry.job_id not in positions:
+                positions[entry.job_id] = (entry.user_id, len(positions) + 1)
+        
+        changed: Dict[str, Tuple[str, Optional[int]]] = {
+            job_id: position for job_id, position in positions.items()
+            if self._positions.get(job_id) != position
+        }
+        for job_id, (user_id, _) in self._positions.items():
+            if job_id not in positions:
+                changed[job_id] = (user_id, None)
+        self._positions = positions
+        
+        if changed and self.on_positions_changed:
+            try:
+                await self.on_positions_changed(changed)
+            except Exception as e:
+                logger.warning(f"Failed to publish queue positions: {e}")
+
+
+def create_job_queue() -> JobQueue:
+    """設定に応じたバックエンドでキューを作成"""
+    if settings.job_queue_backend == "memory":
+        backend = MemoryJobQueueBackend()
+    elif settings.job_queue_backend == "sqlite":
+        backend = SQLiteJobQueueBackend(settings.job_queue_path)
+    else:
+        raise ValueError(f"Unknown job queue backend: {settings.job_queue_backend}")
+    return JobQueue(backend, FairShareScheduler(settings.job_max_running_per_user))
@@ -0,0 +1,67 @@
+from typing import Dict, List, Tuple
+
+from ..models import JobQueueEntry
+
+
+class FairShareScheduler:
+    """ユーザー単位の重み付き公平キューイング（WFQ）と同時実行数の上限を管理するスケジューラー"""
+    
+    def __init__(self, max_running_per_user: int = 0):
+        # 0 以下の場合はユーザー単位の上限なし
+        self.max_running_per_user = max_running_per_user
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._tags: Dict[str, Tuple[float, float]] = {}
+        self._running: Dict[str, int] = {}
+    
+    def assign(self, entry: JobQueueEntry):
+        """エントリに仮想開始・終了タグを割り当てる（重みが大きいほど早く順番が回る）"""
+        if entry.id in self._tags:
+            return
+        start = max(self._virtual_time, self._last_finish.get(entry.user_id, 0.0))
+        finish = start + 1.0 / max(entry.weight, 0.01)
+        self._last_finish[entry.user_id] = finish
+        self._tags[entry.id] = (start, finish)
+    
+    def order(self, pending: List[JobQueueEntry]) -> List[JobQueueEntry]:
+        """待機中エントリを処理順に並べる"""
+        # 再起動後に復旧したエントリはタグがないため投入順に割り当てる
+        for entry in sorted(pending, key=lambda e: e.enqueued_at):
+            self.assign(entry)
+        return sorted(pending, key=lambda e: (self._tags[e.id][1], e.enqueued_at))
+    
+    def can_start(self, entry: JobQueueEntry) -> bool:
+        """ユーザー単位の同時実行上限に達していないか"""
+        if self.max_running_per_user <= 0:
+            return True
+        return self._running.get(entry.user_id, 0) < self.max_running_per_user
+    
+    def select(self, pending: List[JobQueueEntry]) -> List[JobQueueEntry]:
+        """開始可能なエントリを処理順に返す"""
+        return [entry for entry in self.order(pending) if self.can_start(entry)]
+    
+    def on_start(self, entry: JobQueueEntry):
+        """エントリの処理開始を記録し、仮想時刻を進める"""
+        start, _ = self._tags.get(entry.id, (self._virtual_time, self._virtual_time))
+        self._virtual_time = max(self._virtual_time, start)
+        self._running[entry.user_id] = self._running.get(entry.user_id, 0) + 1
+    
+    def on_finish(self, entry: JobQueueEntry):
+        """エントリの処理完了を記録"""
+        self._tags.pop(entry.id, None)
+        running = self._running.get(entry.user_id, 0) - 1
+        if running > 0:
+            self._running[entry.user_id] = running
+        else:
+            self._running.pop(entry.user_id, None)
+            # 仮想時刻より過去の終了タグは順序に影響しないため破棄する
+            if self._last_finish.get(entry.user_id, 0.0) <= self._virtual_time:
+                self._last_finish.pop(entry.user_id, None)
+    
+    def forget(self, entry_id: str):
+        """キューから取り除かれたエントリのタグを破棄"""
+        self._tags.pop(entry_id, None)
+    
+    def running(self, user_id: str) -> int:
+        """ユーザーの実行中ジョブ数"""
+        return self._running.get(user_id, 0)
@@ -0,0 +1,154 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+
+from ..models import SlideGenerationJob
+from ..config import settings
+from ..storage import cosmos_client
+from ..telemetry import telemetry_manager
+from .events import TERMINAL_STATUSES
+
+
+logger = logging.getLogger(__name__)
+
+# 部分更新で書き込むフィールド（それ以外の変更は full=True で全体を置き換える）
+PATCH_FIELDS = ("status", "progress", "current_step", "updated_at")
+
+
+class _PendingWrite:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.full: Optional[Dict[str, Any]] = None
+        self.fields: Dict[str, Any] = {}
+
+
+class _JobLock:
+    """ジョブごとの書き込みロック（待機中の呼び出しがいなくなったら破棄する）"""
+    
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class JobStateWriter:
+    """ジョブ状態の書き込みをジョブ単位でまとめ、進捗は Cosmos DB の部分更新で反映するライター"""
+    
+    def __init__(self, container_name: str = "slide_jobs", debounce_seconds: Optional[float] = None):
+        self.container_name = container_name
+        self.debounce_seconds = (
+            settings.job_state_debounce_seconds if debounce_seconds is None else debounce_seconds
+        )
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, _JobLock] = {}
+        
+        self._writes = telemetry_manager.create_counter(
+            "job_state_writes_total",
+            "Cosmos DB へのジョブ状態書き込み数（mode=patch/replace）"
+        )
+        self._coalesced = telemetry_manager.create_counter(
+            "job_state_coalesced_total",
+            "まとめられて書き込みを省略したジョブ状態更新数"
+        )
+        self._write_latency = telemetry_manager.create_histogram(
+            "job_state_write_latency_seconds",
+            "ジョブ状態書き込みのレイテンシ"
+        )
+    
+    async def submit(self, job: SlideGenerationJob, full: bool = False, immediate: bool = False):
+        """ジョブ状態の書き込みを登録（終了状態と immediate 指定は即座に書き込む）"""
+        data = json.loads(job.json())
+        terminal = job.status in TERMINAL_STATUSES
+        pending = self._pending.get(job.id)
+        if pending is None:
+            pending = _PendingWrite(job.user_id)
+            self._pending[job.id] = pending
+        else:
+            self._coalesced.add(1)
+        
+        if full or terminal:
+            # 全体置き換えはそれ以前の部分更新を包含する（終了状態は結果やエラーも含めて書き込む）
+            pending.full = data
+            pending.fields = {}
+        else:
+            pending.fields.update({field: data[field] for field in PATCH_FIELDS})
+        
+        if immediate or terminal:
+            await self.flush(job.id)
+        elif job.id not in self._timers:
+            self._timers[job.id] = asyncio.create_task(self._flush_later(job.id))
+    
+    async def submit_fields(self, job_id: str, user_id: str, fields: Dict[str, Any]):
+        """ジョブオブジェクトを持たない呼び出し元からの部分更新を登録（キュー順位など）"""
+        pending = self._pending.get(job_id)
+        if pending is None:
+            pending = _PendingWrite(user_id)
+            self._pending[job_id] = pending
+        else:
+            self._coalesced.add(1)
+        pending.fields.update(fields)
+        
+        if job_id not in self._timers:
+            self._timers[job_id] = asyncio.create_task(self._flush_later(job_id))
+    
+    async def flush(self, job_id: str):
+        """ジョブの保留中の書き込みを即座に反映"""
+        timer = self._timers.pop(job_id, None)
+        if timer:
+            timer.cancel()
+        await self._flush(job_id)
+    
+    async def flush_all(self):
+        """保留中の書き込みをすべて反映（シャットダウン時）"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*(self._flush(job_id) for job_id in list(self._pending)))
+    
+    async def _flush_later(self, job_id: str):
+        try:
+            await asyncio.sleep(self.debounce_seconds)
+        except asyncio.CancelledError:
+            return
+        self._timers.pop(job_id, None)
+        await self._flush(job_id)
+    
+    async def _flush(self, job_id: str):
+        # ロックを待っている呼び出しがいる間は破棄しない（新しいロックで書き込みが並行しないように）
+        job_lock = self._locks.get(job_id)
+        if job_lock is None:
+            job_lock = self._locks[job_id] = _JobLock()
+        job_lock.users += 1
+        try:
+            async with job_lock.lock:
+                await self._write(job_id)
+        finally:
+            job_lock.users -= 1
+            if job_lock.users == 0:
+                self._locks.pop(job_id, None)
+    
+    async def _write(self, job_id: str):
+        pending = self._pending.pop(job_id, None)
+        if pending is None:
+            return
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            if pending.full is not None:
+                await cosmos_client.update_item(self.container_name, pending.full)
+                self._writes.add(1, {"mode": "replace"})
+            if pending.fields:
+                await cosmos_client.patch_item(
+                    self.container_name, job_id, pending.user_id,
+                    self._patch_operations(pending.fields)
+                )
+                self._writes.add(1, {"mode": "patch"})
+        except Exception as e:
+            logger.warning(f"Failed to write job state for {job_id}: {e}")
+        finally:
+            self._write_latency.record(loop.time() - started)
+    
+    def _patch_operations(self, fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{"op": "set", "path": f"/{field}", "value": value} for field, value in fields.items()]
@@ -0,0 +1,74 @@
+from typing import Awaitable, Callable, List
+import asyncio
+import logging
+
+from ..models import JobQueueEntry
+from ..telemetry import telemetry_manager
+from .queue import JobQueue
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorkerPool:
+    """キューを一定数のワーカーで処理するプール"""
+    
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[JobQueueEntry], Awaitable[None]],
+        concurrency: int
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self._workers: List[asyncio.Task] = []
+        self._active = 0
+        
+        self._processing_time = telemetry_manager.create_histogram(
+            "job_processing_time_seconds",
+            "ワーカーがジョブを処理した時間"
+        )
+        telemetry_manager.create_observable_gauge(
+            "job_workers_active",
+            lambda: self._active,
+            "処理中のワーカー数"
+        )
+    
+    async def start(self):
+        """ワーカーを起動"""
+        recovered = await self.queue.start()
+        if recovered:
+            logger.info(f"Recovered {recovered} interrupted job(s) from the queue")
+        
+        for index in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._run(index)))
+    
+    async def stop(self):
+        """ワーカーを停止（処理中のエントリは次回起動時に再開される）"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+    
+    @property
+    def active(self) -> int:
+        """処理中のワーカー数"""
+        return self._active
+    
+    async def _run(self, index: int):
+        while True:
+            entry = await self.queue.get()
+            self._active += 1
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                await self.handler(entry)
+            except Exception as e:
+                logger.exception(f"Worker {index} failed to process job {entry.job_id}: {e}")
+            finally:
+                self._active -= 1
+                self._processing_time.record(loop.time() - started, {"kind": entry.kind})
+            
+            # キャンセル（停止）時はエントリを残し、再起動後に再処理する
+            await self.queue.task_done(entry)
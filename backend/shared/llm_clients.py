@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.open_ai import (
+    AzureChatCompletion, AzureChatPromptExecutionSettings,
+    OpenAIChatCompletion, OpenAIChatPromptExecutionSettings
+)
+
+from .config import settings
+from .models import LLMProvider
+from .telemetry import telemetry_manager
+
+
+logger = logging.getLogger(__name__)
+
+# エージェントに渡す LLM 設定の項目（プールのキーにもなる）
+LLM_CONFIG_FIELDS = ("provider", "model_name", "temperature", "max_tokens")
+
+
+def resolve_llm_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """LLM 設定の未指定項目を既定値で補う（設定がない場合は既定のモデル）"""
+    config = config or {}
+    temperature = config.get("temperature")
+    return {
+        "provider": LLMProvider(config.get("provider") or LLMProvider.AZURE_OPENAI).value,
+        "model_name": config.get("model_name") or settings.default_llm_model,
+        "temperature": float(settings.default_temperature if temperature is None else temperature),
+        "max_tokens": int(config.get("max_tokens") or settings.default_max_tokens),
+    }
+
+
+def create_chat_service(config: Dict[str, Any]) -> Any:
+    """LLM 設定のプロバイダーに対応するチャットサービスを作成"""
+    provider = config["provider"]
+    if provider == LLMProvider.AZURE_OPENAI:
+        return AzureChatCompletion(
+            deployment_name=config["model_name"],
+            endpoint=settings.azure_ai_foundry_endpoint,
+            api_key=settings.azure_ai_foundry_key
+        )
+    if provider == LLMProvider.OPENAI:
+        return OpenAIChatCompletion(ai_model_id=config["model_name"], api_key=settings.openai_api_key)
+    if provider == LLMProvider.ANTHROPIC:
+        # Anthropic コネクタは semantic-kernel[anthropic] が必要なため使う場合だけ読み込む
+        from semantic_kernel.connectors.ai.anthropic import AnthropicChatCompletion
+        return AnthropicChatCompletion(ai_model_id=config["model_name"], api_key=settings.anthropic_api_key)
+    raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+def create_execution_settings(config: Dict[str, Any], response_format: Optional[Dict[str, Any]] = None) -> Any:
+    """LLM 設定の temperature・max_tokens と構造化出力の指定をプロバイダーの実行設定にする"""
+    options = {"temperature": config["temperature"], "max_tokens": config["max_tokens"]}
+    provider = config["provider"]
+    if provider == LLMProvider.ANTHROPIC:
+        # Anthropic は response_format に対応しないため、JSON の修復に任せる
+        from semantic_kernel.connectors.ai.anthropic import AnthropicChatPromptExecutionSettings
+        return AnthropicChatPromptExecutionSettings(**options)
+    if response_format:
+        options["response_format"] = response_format
+    if provider == LLMProvider.OPENAI:
+        return OpenAIChatPromptExecutionSettings(**options)
+    return AzureChatPromptExecutionSettings(**options)
+
+
+class LLMClient:
+    """LLM 設定 1 つ分の Kernel・チャットサービスと、そこに登録したエージェントの関数"""
+    
+    def __init__(self, config: Dict[str, Any], kernel: Kernel, service: Any, functions: Dict[str, Any]):
+        self.config = config
+        self.kernel = kernel
+        self.service = service
+        self.functions = functions
+        self.leases = 0
+        self.last_used = time.monotonic()
+    
+    @property
+    def deployment(self) -> str:
+        """レート制限の予算を共有する単位（モデル名）"""
+        return self.config["model_name"]
+    
+    async def aclose(self):
+        """チャットサービスの HTTP クライアントを閉じる"""
+        client = getattr(self.service, "client", None) or getattr(self.service, "async_client", None)
+        close = getattr(client, "close", None)
+        if close is None:
+            return
+        try:
+            await close()
+        except Exception as e:
+            logger.warning(f"Failed to close LLM client for {self.deployment}: {e}")
+
+
+class LLMClientPool:
+    """LLM 設定ごとに作成した Kernel・チャットサービスを再利用する LRU プール（アイドル状態が続いたものは閉じる）"""
+    
+    def __init__(
+        self,
+        name: str,
+        setup: Callable[[Kernel, Dict[str, Any]], Dict[str, Any]],
+        max_entries: Optional[int] = None,
+        idle_seconds: Optional[int] = None
+    ):
+        # setup は新しい Kernel にエージェントの関数を登録し、名前と関数の対応を返す
+        self.name = name
+        self.setup = setup
+        self.max_entries = settings.llm_client_pool_max_entries if max_entries is None else max_entries
+        self.idle_seconds = settings.llm_client_idle_seconds if idle_seconds is None else idle_seconds
+        self._clients: "OrderedDict[Tuple[Any, ...], LLMClient]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        
+        self._lookups = telemetry_manager.create_counter(
+            "llm_client_pool_total",
+            "LLM クライアントプールの参照数（result=hit/miss/evicted/idle_closed）"
+        )
+    
+    @asynccontextmanager
+    async def lease(self, config: Optional[Dict[str, Any]]) -> AsyncIterator[LLMClient]:
+        """LLM 設定に対応するクライアントを借りる（貸出中のクライアントは閉じない）"""
+        client = await self._get(resolve_llm_config(config))
+        try:
+            yield client
+        finally:
+            client.leases -= 1
+            client.last_used = time.monotonic()
+            # 貸出中に LRU から追い出されたクライアントは返却時に閉じる
+            if client.leases == 0 and self._clients.get(self._key(client.config)) is not client:
+                await client.aclose()
+    
+    async def close_idle(self):
+        """アイドル時間を過ぎたクライアントを閉じる"""
+        now = time.monotonic()
+        idle = [
+            (key, client) for key, client in self._clients.items()
+            if client.leases == 0 and now - client.last_used >= self.idle_seconds
+        ]
+        for key, client in idle:
+            del self._clients[key]
+            self._lookups.add(1, {"pool": self.name, "result": "idle_closed"})
+        for _, client in idle:
+            await client.aclose()
+    
+    async def aclose(self):
+        """すべてのクライアントを閉じる（シャットダウン時）"""
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+    
+    def _key(self, config: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(config[field] for field in LLM_CONFIG_FIELDS)
+    
+    async def _get(self, config: Dict[str, Any]) -> LLMClient:
+        """貸出数を増やした状態でクライアントを返す（作成直後に追い出されて閉じられないように）"""
+        key = self._key(config)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            client.leases += 1
+            self._lookups.add(1, {"pool": self.name, "result": "hit"})
+            return client
+        
+        self._lookups.add(1, {"pool": self.name, "result": "miss"})
+        kernel = Kernel()
+        service = create_chat_service(config)
+        kernel.add_service(service)
+        client = LLMClient(config, kernel, service, self.setup(kernel, config))
+        client.leases += 1
+        self._clients[key] = client
+        
+        while len(self._clients) > max(self.max_entries, 1):
+            _, evicted = self._clients.popitem(last=False)
+            self._lookups.add(1, {"pool": self.name, "result": "evicted"})
+            if evicted.leases == 0:
+                await evicted.aclose()
+        
+        if self.idle_seconds > 0 and (self._sweeper is None or self._sweeper.done()):
+            self._sweeper = asyncio.create_task(self._sweep())
+        return client
+    
+    async def _sweep(self):
+        """クライアントがある間、定期的にアイドル状態のものを閉じる"""
+        while self._clients:
+            await asyncio.sleep(max(self.idle_seconds / 2, 1))
+            await self.close_idle()
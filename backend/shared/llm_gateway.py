@@ -0,0 +1,299 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from .config import settings
+from .telemetry import telemetry_manager
+
+
+logger = logging.getLogger(__name__)
+
+# 優先度レーン（値が小さいほど先に処理する。対話的なアジェンダ生成をバックグラウンドのレビューより優先）
+LANES = {"interactive": 0, "background": 1}
+
+
+def estimate_tokens(text: str) -> int:
+    """文字列のおおよそのトークン数（UTF-8 で 4 バイトを 1 トークンとして見積もる）"""
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def rate_limit_retry_after(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """エラーがレート制限（429）かどうかと、Retry-After ヘッダーの秒数（ない場合は None）"""
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        response = getattr(current, "response", None)
+        status = getattr(current, "status_code", None) or getattr(response, "status_code", None)
+        if status == 429:
+            headers = getattr(response, "headers", None) or {}
+            for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+                try:
+                    return True, float(headers.get(header)) * scale
+                except (TypeError, ValueError):
+                    continue
+            return True, None
+        # Semantic Kernel は SDK の例外を包んで送出するため原因をたどる
+        current = current.__cause__ or current.__context__
+    return False, None
+
+
+class TokenBucket:
+    """1 分あたりの上限を連続的に補充するトークンバケット（上限 0 は無制限）"""
+    
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def delay(self, amount: float) -> float:
+        """amount を消費できるまでの秒数"""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        # 上限を超える要求はバケットが満杯になれば通す
+        missing = min(amount, self.capacity) - self._tokens
+        return max(0.0, missing * 60.0 / self.capacity)
+    
+    def consume(self, amount: float) -> float:
+        """amount を消費し、実際に差し引いた量を返す"""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        self._tokens -= amount
+        return amount
+    
+    def adjust(self, amount: float):
+        """見積もりと実績の差を戻す（負の場合は追加で差し引く）"""
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+
+class _DeploymentLimiter:
+    """デプロイメントごとの予算（RPM・TPM・同時実行数）と待機列"""
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+        self.changed = asyncio.Condition()
+    
+    def delay(self, tokens: float) -> Optional[float]:
+        """開始できるまでの秒数（同時実行数の空きを待つ場合は None）"""
+        if self.max_concurrency > 0 and self.running >= self.max_concurrency:
+            return None
+        return max(
+            self.blocked_until - time.monotonic(),
+            self.requests.delay(1),
+            self.tokens.delay(tokens)
+        )
+
+
+class LLMGateway:
+    """エージェントの LLM 呼び出しをデプロイメント単位の予算と優先度レーンで流量制御するゲートウェイ"""
+    
+    def __init__(self):
+        self._limiters: Dict[str, _DeploymentLimiter] = {}
+        self._sequence = itertools.count()
+        
+        self._queue_time = telemetry_manager.create_histogram(
+            "llm_gateway_queue_seconds",
+            "LLM 呼び出しが予算の空きを待った時間"
+        )
+        self._requests = telemetry_manager.create_counter(
+            "llm_gateway_requests_total",
+            "ゲートウェイ経由の LLM 呼び出し数（result=ok/retried/rate_limited/error）"
+        )
+        telemetry_manager.create_observable_gauge(
+            "llm_gateway_waiting",
+            lambda: sum(len(limiter.waiters) for limiter in self._limiters.values()),
+            "予算の空きを待っている LLM 呼び出し数"
+        )
+    
+    def limiter(self, deployment: str) -> _DeploymentLimiter:
+        """デプロイメントの予算（llm_deployment_limits で個別に上書きできる）"""
+        limiter = self._limiters.get(deployment)
+        if limiter is None:
+            limits = settings.llm_deployment_limits.get(deployment, {})
+            limiter = _DeploymentLimiter(
+                limits.get("rpm", settings.llm_requests_per_minute),
+                limits.get("tpm", settings.llm_tokens_per_minute),
+                limits.get("concurrency", settings.llm_max_concurrency)
+            )
+            self._limiters[deployment] = limiter
+        return limiter
+    
+    async def invoke(
+        self,
+        kernel: Any,
+        function: Any,
+        arguments: Any,
+        lane: str = "interactive",
+        deployment: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> Any:
+        """予算の範囲で LLM 関数を呼び出す（429 は Retry-After を待って再試行）"""
+        deployment = deployment or settings.default_llm_model
+        estimated = self._estimate(function, arguments, max_tokens)
+        # 再試行しても同じレーン内の順番を保つよう、到着順は最初の呼び出しで決める
+        sequence = next(self._sequence)
+        for attempt in itertools.count():
+            async with self._slot(deployment, lane, estimated, sequence) as (limiter, consumed):
+                try:
+                    result = await kernel.invoke(function, arguments)
+                except Exception as e:
+                    # 失敗した試行の見積もり分は使われていないため戻す
+                    limiter.tokens.adjust(consumed)
+                    self._on_error(deployment, lane, e, attempt)
+                    continue
+                used = self._usage_tokens(result)
+                if used is not None:
+                    limiter.tokens.adjust(consumed - used)
+                self._requests.add(1, {"deployment": deployment, "lane": lane, "result": "ok"})
+                return result
+    
+    async def invoke_stream(
+        self,
+        kernel: Any,
+        function: Any,
+        arguments: Any,
+        lane: str = "interactive",
+        deployment: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Any]:
+        """予算の範囲で LLM 関数をストリーミング呼び出し（受信開始前の 429 だけを再試行）"""
+        deployment = deployment or settings.default_llm_model
+        prompt_tokens = self._estimate_prompt(function, arguments)
+        estimated = prompt_tokens + (max_tokens or settings.default_max_tokens)
+        sequence = next(self._sequence)
+        for attempt in itertools.count():
+            async with self._slot(deployment, lane, estimated, sequence) as (limiter, consumed):
+                started = False
+                used: Optional[int] = None
+                streamed: List[str] = []
+                try:
+                    async for messages in kernel.invoke_stream(function, arguments):
+                        started = True
+                        used = self._messages_usage(messages) or used
+                        streamed.append(str(messages[0]) if messages else "")
+                        yield messages
+                except Exception as e:
+                    if started:
+                        self._requests.add(1, {"deployment": deployment, "lane": lane, "result": "error"})
+                        raise
+                    limiter.tokens.adjust(consumed)
+                    self._on_error(deployment, lane, e, attempt)
+                    continue
+                finally:
+                    if started:
+                        # 最終チャンクの使用トークン数（含まれない場合は受信したテキストからの見積もり）で精算する
+                        if used is None:
+                            used = prompt_tokens + estimate_tokens("".join(streamed))
+                        limiter.tokens.adjust(consumed - used)
+                self._requests.add(1, {"deployment": deployment, "lane": lane, "result": "ok"})
+                return
+    
+    @asynccontextmanager
+    async def _slot(self, deployment: str, lane: str, tokens: float, sequence: int):
+        """予算の空きを待って実行枠を確保する（sequence は同じレーン内の到着順）"""
+        limiter = self.limiter(deployment)
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        consumed = await self._acquire(limiter, (LANES.get(lane, len(LANES)), sequence), tokens)
+        self._queue_time.record(loop.time() - queued_at, {"deployment": deployment, "lane": lane})
+        try:
+            yield limiter, consumed
+        finally:
+            limiter.running -= 1
+            async with limiter.changed:
+                limiter.changed.notify_all()
+    
+    async def _acquire(self, limiter: _DeploymentLimiter, entry: Tuple[int, int], tokens: float) -> float:
+        """優先度順（同じレーンでは到着順）に先頭の呼び出しだけが予算を消費して開始する"""
+        async with limiter.changed:
+            heapq.heappush(limiter.waiters, entry)
+            try:
+                while True:
+                    delay: Optional[float] = None
+                    if limiter.waiters[0] is entry:
+                        delay = limiter.delay(tokens)
+                        if delay is not None and delay <= 0:
+                            heapq.heappop(limiter.waiters)
+                            limiter.requests.consume(1)
+                            limiter.running += 1
+                            limiter.changed.notify_all()
+                            return limiter.tokens.consume(tokens)
+                    try:
+                        await asyncio.wait_for(limiter.changed.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                # キャンセルされた呼び出しは待機列から外し、次の呼び出しに先頭を譲る
+                if entry in limiter.waiters:
+                    limiter.waiters.remove(entry)
+                    heapq.heapify(limiter.waiters)
+                    limiter.changed.notify_all()
+                raise
+    
+    def _on_error(self, deployment: str, lane: str, error: Exception, attempt: int):
+        """429 ならデプロイメント全体を Retry-After まで止めて再試行させ、それ以外は送出する"""
+        rate_limited, retry_after = rate_limit_retry_after(error)
+        if not rate_limited:
+            self._requests.add(1, {"deployment": deployment, "lane": lane, "result": "error"})
+            raise error
+        if attempt >= settings.llm_rate_limit_max_retries:
+            self._requests.add(1, {"deployment": deployment, "lane": lane, "result": "rate_limited"})
+            raise error
+        
+        if retry_after is None:
+            retry_after = settings.llm_rate_limit_backoff_seconds * (2 ** attempt)
+        limiter = self.limiter(deployment)
+        limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + retry_after)
+        self._requests.add(1, {"deployment": deployment, "lane": lane, "result": "retried"})
+        logger.warning(f"LLM deployment {deployment} is rate limited, retrying after {retry_after:.1f}s")
+    
+    def _estimate(self, function: Any, arguments: Any, max_tokens: Optional[int]) -> int:
+        """プロンプトテンプレートと引数、最大出力トークン数から消費トークンを見積もる"""
+        return self._estimate_prompt(function, arguments) + (max_tokens or settings.default_max_tokens)
+    
+    def _estimate_prompt(self, function: Any, arguments: Any) -> int:
+        """プロンプトテンプレートと引数から入力トークンを見積もる"""
+        config = getattr(getattr(function, "prompt_template", None), "prompt_template_config", None)
+        template = getattr(config, "template", "") or ""
+        values = "".join(str(value) for value in dict(arguments or {}).values())
+        return estimate_tokens(template + values)
+    
+    def _usage_tokens(self, result: Any) -> Optional[int]:
+        """応答に含まれる使用トークン数（取得できない場合は None）"""
+        value = getattr(result, "value", None)
+        return self._messages_usage(value if isinstance(value, list) else [value])
+    
+    def _messages_usage(self, messages: Any) -> Optional[int]:
+        """メッセージ（ストリーミングではチャンク）のメタデータにある使用トークン数の合計（ない場合は None）"""
+        total = None
+        for message in messages or []:
+            usage = (getattr(message, "metadata", None) or {}).get("usage")
+            if usage is not None:
+                prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+                total = (total or 0) + prompt_tokens + completion_tokens
+        return total
+
+
+# Global instance
+llm_gateway = LLMGateway()
@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+
+from .config import settings
+from .telemetry import telemetry_manager
+
+
+def response_format(name: str, schema: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """設定に応じた構造化出力の指定（json_schema はスキーマに沿った出力、json_object は JSON のみの出力）"""
+    mode = settings.llm_response_format
+    if mode == "json_schema" and schema is not None:
+        return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": False}}
+    if mode in ("json_schema", "json_object"):
+        return {"type": "json_object"}
+    return None
+
+
+def extract_json_text(text: str) -> str:
+    """コードブロックや前置きを除いた JSON 部分"""
+    fenced = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    return text[min(starts):].strip() if starts else text.strip()
+
+
+def repair_json(text: str) -> str:
+    """末尾のカンマ・閉じ忘れ・途中で切れた出力を修復した JSON 文字列（途中で切れた配列要素のオブジェクトは捨てる）"""
+    out: List[str] = []
+    closers: List[str] = []
+    in_string = False
+    escaped = False
+    # 最後に要素が完結していた位置（そこで切って閉じれば有効な JSON になる）
+    safe_length, safe_closers = 0, []
+    # 閉じていない配列要素のオブジェクトを開いたときの括弧の深さ（その中では要素が完結しても切る位置にしない）
+    element_depth: Optional[int] = None
+    
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in "{[":
+            if ch == "{" and element_depth is None and closers and closers[-1] == "]":
+                # 途中で切れた場合に要素ごと捨てられるよう、開く前の位置を記録する
+                safe_length, safe_closers = len(out), list(closers)
+                element_depth = len(closers)
+            closers.append("}" if ch == "{" else "]")
+            out.append(ch)
+            if element_depth is None:
+                safe_length, safe_closers = len(out), list(closers)
+        elif ch in "}]":
+            # 末尾のカンマを取り除き、対応しない閉じ括弧は期待される方に置き換える
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if not closers:
+                break
+            out.append(closers.pop())
+            if element_depth == len(closers):
+                element_depth = None
+            if element_depth is None:
+                safe_length, safe_closers = len(out), list(closers)
+            if not closers:
+                break
+        elif ch == ",":
+            if element_depth is None:
+                safe_length, safe_closers = len(out), list(closers)
+            out.append(ch)
+        else:
+            out.append(ch)
+    
+    if not closers and not in_string:
+        return "".join(out)
+    
+    body = "".join(out[:safe_length]).rstrip().rstrip(",")
+    return body + "".join(reversed(safe_closers))
+
+
+class LLMJsonParser:
+    """LLM の出力から JSON を取り出し、壊れている場合は修復して読み込むパーサー"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._parses = telemetry_manager.create_counter(
+            "llm_json_parse_total",
+            "LLM 出力の JSON 解析数（result=ok/repaired/failed、repaired は再呼び出しを回避できた件数）"
+        )
+    
+    def parse(self, text: str) -> Tuple[Any, bool]:
+        """JSON を読み込み、修復したかどうかと共に返す（修復できない場合は ValueError）"""
+        json_text = extract_json_text(text)
+        try:
+            data = json.loads(json_text)
+            self._parses.add(1, {"parser": self.name, "result": "ok"})
+            return data, False
+        except ValueError:
+            pass
+        
+        try:
+            data = json.loads(repair_json(json_text))
+        except ValueError:
+            self._parses.add(1, {"parser": self.name, "result": "failed"})
+            raise
+        self._parses.add(1, {"parser": self.name, "result": "repaired"})
+        return data, True
+
+
+class JsonArrayStreamParser:
+    """LLM のストリーミング出力から、トップレベルのオブジェクトの指定キーの配列要素を閉じた順に取り出すパーサー"""
+    
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+    
+    def feed(self, chunk: str) -> List[Any]:
+        """出力の断片を追加し、新たに閉じた配列要素を返す"""
+        self._text += chunk
+        items = []
+        while self._pos < len(self._text):
+            item = self._step(self._text[self._pos])
+            if item is not None:
+                items.append(item)
+            self._pos += 1
+        
+        # 要素の途中でなければ読み終えた部分は不要
+        if self._item_start is None and not self._in_string:
+            self._text = self._text[self._pos:]
+            self._pos = 0
+        return items
+    
+    def _step(self, ch: str) -> Optional[Any]:
+        # ```json などの前置きは最初の { まで読み飛ばす
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._depth = 1
+            return None
+        
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif ch == "\\":
+                self._escaped = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 1:
+                    self._last_string = self._text[self._string_start + 1:self._pos]
+            return None
+        
+        if ch == '"':
+            self._in_string = True
+            self._string_start = self._pos
+        elif ch == ":" and self._depth == 1:
+            self._current_key = self._last_string
+        elif ch == "," and self._depth == 1:
+            self._current_key = None
+        elif ch == "[":
+            if self._depth == 1 and self._array_depth is None and self._current_key == self.array_key:
+                self._array_depth = self._depth + 1
+            self._depth += 1
+        elif ch == "{":
+            if self._depth == self._array_depth:
+                self._item_start = self._pos
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if ch == "}" and self._item_start is not None and self._depth == self._array_depth:
+                text = self._text[self._item_start:self._pos + 1]
+                self._item_start = None
+                try:
+                    return json.loads(text)
+                except ValueError:
+                    return None
+            if ch == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                # 配列を読み終えたら、同じキーが再び現れても読まない
+                self._array_depth = -1
+        return None
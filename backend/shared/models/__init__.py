@@ -13,6 +13,7 @@ class SlideGenerationStatus(str, Enum):
     REVIEW = "review"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class LLMProvider(str, Enum):
@@ -76,6 +77,24 @@ class SlideGenerationRequest(BaseModel):
     auto_approval: bool = Field(default=False, description="自動承認")
     include_images: bool = Field(default=True, description="画像を含める")
     include_tables: bool = Field(default=True, description="テーブルを含める")
+    bypass_cache: bool = Field(default=False, description="結果キャッシュを使わずに生成する")
+    latency_target_seconds: Optional[int] = Field(None, description="レイテンシ目標（秒、未指定時はユーザー設定）")
+
+
+class JobCheckpoint(BaseModel):
+    agenda_generated: bool = Field(default=False, description="アジェンダ生成済み（生成途中のアジェンダではない）")
+    agenda_approved: bool = Field(default=False, description="アジェンダ承認済み")
+    information_blob_url: Optional[str] = Field(None, description="収集済み情報（JSON）の Blob URL")
+    slide_url: Optional[str] = Field(None, description="作成済みスライドの URL")
+
+
+class DeckVersion(BaseModel):
+    version: int = Field(..., description="バージョン番号（1始まり）")
+    agenda: SlideAgenda = Field(..., description="このバージョンのアジェンダ")
+    result_blob_url: str = Field(..., description="結果ファイルのURL")
+    information_blob_url: Optional[str] = Field(None, description="収集済み情報（JSON）の Blob URL")
+    regenerated_pages: List[int] = Field(default=[], description="前のバージョンから作り直したページ番号")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class SlideGenerationJob(BaseModel):
@@ -88,16 +107,37 @@ class SlideGenerationJob(BaseModel):
     current_step: str = Field(default="", description="現在の処理ステップ")
     result_blob_url: Optional[str] = Field(None, description="結果ファイルのURL")
     error_message: Optional[str] = Field(None, description="エラーメッセージ")
+    queue_position: Optional[int] = Field(None, description="キューでの待機順位（1始まり）")
+    cache_key: Optional[str] = Field(None, description="結果キャッシュのキー（アジェンダ編集時は None）")
+    checkpoint: JobCheckpoint = Field(default_factory=JobCheckpoint, description="完了済みステージの出力")
+    batch_id: Optional[str] = Field(None, description="バッチ生成のバッチID")
+    versions: List[DeckVersion] = Field(default=[], description="完成したデッキのバージョン履歴")
+    latency_target_seconds: Optional[int] = Field(None, description="適用したレイテンシ目標（秒）")
+    deadline: Optional[datetime] = Field(None, description="処理の期限（アジェンダ承認待ちの時間は含まない）")
+    degradations: List[str] = Field(default=[], description="期限に合わせて省略した処理")
+    agenda_draft_similarity: Optional[float] = Field(
+        None, description="類似プロンプトのアジェンダを下書きとして使った場合の類似度"
+    )
+    owner_id: Optional[str] = Field(None, description="ジョブを処理するオーケストレーターのインスタンスID")
+    llm_config: Optional[Dict[str, Any]] = Field(
+        None, description="エージェントに渡す LLM 設定（provider・model_name・temperature・max_tokens、未指定時は既定のモデル）"
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class SlideGenerationBatchRequest(BaseModel):
+    requests: List[SlideGenerationRequest] = Field(..., description="生成リクエスト一覧")
+
+
 class UserSettings(BaseModel):
     user_id: str = Field(..., description="ユーザーID")
     default_llm_config_id: Optional[str] = Field(None, description="デフォルトLLM設定ID")
     default_template_id: Optional[str] = Field(None, description="デフォルトテンプレートID")
     auto_approval: bool = Field(default=False, description="自動承認設定")
     notification_enabled: bool = Field(default=True, description="通知有効")
+    scheduling_weight: float = Field(default=1.0, description="ジョブキューでの優先度の重み")
+    latency_target_seconds: Optional[int] = Field(None, description="ジョブのレイテンシ目標（秒）")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -118,6 +158,8 @@ class AgentRequest(BaseModel):
     agent_type: str = Field(..., description="エージェントタイプ")
     payload: Dict[str, Any] = Field(..., description="ペイロード")
     user_id: str = Field(..., description="ユーザーID")
+    deadline: Optional[datetime] = Field(None, description="処理の期限（残り時間に合わせて処理を省略する）")
+    session_key: Optional[str] = Field(None, description="同じレプリカへ振り分けるためのキー（ジョブID）")
 
 
 class AgentResponse(BaseModel):
@@ -125,4 +167,16 @@ class AgentResponse(BaseModel):
     success: bool = Field(..., description="成功フラグ")
     result: Optional[Dict[str, Any]] = Field(None, description="結果")
     error: Optional[str] = Field(None, description="エラーメッセージ")
-    progress: int = Field(default=100, description="進捗率")
\ No newline at end of file
+    progress: int = Field(default=100, description="進捗率")
+    degradations: List[str] = Field(default=[], description="期限に合わせて省略した処理")
+
+
+# Job queue models
+class JobQueueEntry(BaseModel):
+    id: str = Field(..., description="キューエントリID")
+    job_id: str = Field(..., description="ジョブID")
+    user_id: str = Field(..., description="ユーザーID")
+    kind: str = Field(..., description="処理種別（slide_generation / continue_after_approval）")
+    enqueued_at: datetime = Field(default_factory=datetime.utcnow, description="キュー投入日時")
+    started_at: Optional[datetime] = Field(None, description="処理開始日時")
+    weight: float = Field(default=1.0, description="公平スケジューリングの重み")
\ No newline at end of file
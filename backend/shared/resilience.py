@@ -0,0 +1,388 @@
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+
+from .config import settings
+from .telemetry import telemetry_manager
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """直近の所要時間からパーセンタイルを求めるスライディングウィンドウ"""
+    
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+    
+    def record(self, seconds: float):
+        """所要時間を記録"""
+        self._samples.append(seconds)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """パーセンタイル（サンプル不足の場合は None）"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いているため呼び出しを拒否した"""
+    
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker for {name} is open (retry after {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AdmissionRejectedError(Exception):
+    """過負荷のため新規ジョブの受け付けを拒否した"""
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Service is overloaded: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """直近一定時間の呼び出し結果のエラー率で開閉するサーキットブレーカー（closed → open → half_open）"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._state = self.CLOSED
+        # (記録時刻, 成功したか)。circuit_breaker_window_seconds を過ぎた結果はエラー率に含めない
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=settings.circuit_breaker_window_size)
+        self._opened_at = 0.0
+        self._probes = 0
+        
+        self._transitions = telemetry_manager.create_counter(
+            "circuit_breaker_transitions_total",
+            "サーキットブレーカーの状態遷移数"
+        )
+    
+    @property
+    def state(self) -> str:
+        """現在の状態（open の保持時間を過ぎていれば half_open）"""
+        if self._state == self.OPEN and self.retry_after() <= 0:
+            self._transition(self.HALF_OPEN)
+        return self._state
+    
+    @property
+    def calls(self) -> int:
+        """直近ウィンドウの呼び出し数"""
+        self._expire_outcomes()
+        return len(self._outcomes)
+    
+    def error_rate(self) -> float:
+        """直近ウィンドウのエラー率"""
+        self._expire_outcomes()
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+    
+    def retry_after(self) -> float:
+        """half_open になるまでの秒数"""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + settings.circuit_breaker_open_seconds - time.monotonic())
+    
+    def allow(self) -> bool:
+        """呼び出しを許可するか（half_open では試行数を制限）"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._probes < settings.circuit_breaker_half_open_max_calls:
+            self._probes += 1
+            return True
+        return False
+    
+    def record_success(self):
+        """成功を記録"""
+        self._release_probe()
+        if self._state == self.HALF_OPEN:
+            self._outcomes.clear()
+            self._transition(self.CLOSED)
+        self._outcomes.append((time.monotonic(), True))
+    
+    def record_failure(self):
+        """失敗を記録し、閾値を超えたら開く"""
+        self._release_probe()
+        self._outcomes.append((time.monotonic(), False))
+        if self._state == self.HALF_OPEN:
+            self._open()
+        elif (
+            self._state == self.CLOSED
+            and self.calls >= settings.circuit_breaker_min_calls
+            and self.error_rate() >= settings.circuit_breaker_failure_rate
+        ):
+            self._open()
+    
+    def record_cancelled(self):
+        """結果の出なかった呼び出しの試行枠を返す"""
+        self._release_probe()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """ヘルスチェック用の状態"""
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls": self.calls,
+            "retry_after": math.ceil(self.retry_after()),
+        }
+    
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._transition(self.OPEN)
+    
+    def _expire_outcomes(self):
+        """ウィンドウの時間を過ぎた結果を捨てる（障害が終わった後も古い失敗で拒否し続けないように）"""
+        cutoff = time.monotonic() - settings.circuit_breaker_window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+    
+    def _release_probe(self):
+        if self._probes:
+            self._probes -= 1
+    
+    def _transition(self, state: str):
+        if state != self._state:
+            logger.warning(f"Circuit breaker for {self.name}: {self._state} -> {state}")
+            self._state = state
+            self._transitions.add(1, {"name": self.name, "state": state})
+
+
+class StageCaller:
+    """ステージ単位のタイムアウト・ジッター付きリトライ・ヘッジリクエストを適用して呼び出す"""
+    
+    def __init__(self):
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        
+        self._latency = telemetry_manager.create_histogram(
+            "stage_latency_seconds",
+            "ステージ呼び出し（1 試行）の所要時間"
+        )
+        self._attempts = telemetry_manager.create_counter(
+            "stage_attempts_total",
+            "ステージ呼び出しの試行数（outcome=success/failure/timeout/error）"
+        )
+        self._retries = telemetry_manager.create_counter(
+            "stage_retries_total",
+            "ステージ呼び出しのリトライ数"
+        )
+        self._hedges = telemetry_manager.create_counter(
+            "stage_hedges_total",
+            "ヘッジリクエスト数（outcome=launched/won）"
+        )
+    
+    def breaker(self, stage: str) -> CircuitBreaker:
+        """ステージ（下流エージェント）ごとのサーキットブレーカー"""
+        breaker = self.breakers.get(stage)
+        if breaker is None:
+            breaker = CircuitBreaker(stage)
+            self.breakers[stage] = breaker
+        return breaker
+    
+    def timeout(self, stage: str) -> Optional[float]:
+        """ステージのタイムアウト秒数（未設定の場合は None）"""
+        return settings.stage_timeouts.get(stage)
+    
+    def max_retries(self, stage: str) -> int:
+        """ステージの最大リトライ回数"""
+        return settings.stage_max_retries.get(stage, 0)
+    
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """ヘッジリクエストを送るまでの待ち時間（p95 ベース、対象外の場合は None）"""
+        if not settings.hedging_enabled or stage not in settings.hedged_stages:
+            return None
+        window = self._latencies.get(stage)
+        observed = window.quantile(settings.hedge_quantile) if window else None
+        if observed is None:
+            return None
+        return max(observed, settings.hedge_min_delay_seconds)
+    
+    async def call(
+        self,
+        stage: str,
+        attempt: Callable[[str], Awaitable[T]],
+        cancel: Callable[[str], Awaitable[None]],
+        is_success: Callable[[T], bool] = lambda result: True
+    ) -> T:
+        """attempt(request_id) を呼び出す（失敗時は最後の結果または例外を返す）"""
+        retries = self.max_retries(stage)
+        breaker = self.breaker(stage)
+        for attempt_number in range(retries + 1):
+            if attempt_number:
+                self._retries.add(1, {"stage": stage})
+                await asyncio.sleep(self._backoff(attempt_number))
+            
+            # 開いているブレーカーは待たずに失敗させる（リトライもしない）
+            if not breaker.allow():
+                self._attempts.add(1, {"stage": stage, "outcome": "rejected"})
+                raise CircuitOpenError(stage, breaker.retry_after())
+            
+            try:
+                result = await self._call_once(stage, attempt, cancel)
+            except asyncio.TimeoutError:
+                breaker.record_failure()
+                self._attempts.add(1, {"stage": stage, "outcome": "timeout"})
+                if attempt_number == retries:
+                    raise Exception(f"{stage} stage timed out after {self.timeout(stage)}s")
+                continue
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                self._attempts.add(1, {"stage": stage, "outcome": "error"})
+                if attempt_number == retries:
+                    raise
+                logger.warning(f"{stage} stage attempt {attempt_number + 1} failed: {e}")
+                continue
+            
+            succeeded = is_success(result)
+            if succeeded:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            self._attempts.add(1, {"stage": stage, "outcome": "success" if succeeded else "failure"})
+            if succeeded or attempt_number == retries:
+                return result
+    
+    async def _call_once(
+        self,
+        stage: str,
+        attempt: Callable[[str], Awaitable[T]],
+        cancel: Callable[[str], Awaitable[None]]
+    ) -> T:
+        """1 回分の試行（必要に応じてヘッジし、先に完了した方を採用して残りをキャンセル）"""
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout(stage)
+        deadline = loop.time() + timeout if timeout else None
+        pending: Dict[asyncio.Task, Tuple[str, str, float]] = {}
+        
+        def launch(kind: str):
+            request_id = str(uuid.uuid4())
+            pending[asyncio.create_task(attempt(request_id))] = (kind, request_id, loop.time())
+        
+        def remaining(limit: Optional[float] = None) -> Optional[float]:
+            left = None if deadline is None else max(0.0, deadline - loop.time())
+            if limit is None:
+                return left
+            return limit if left is None else min(limit, left)
+        
+        launch("primary")
+        try:
+            hedge_delay = self.hedge_delay(stage)
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(list(pending), timeout=remaining(hedge_delay))
+                if not done and (deadline is None or loop.time() < deadline):
+                    launch("hedge")
+                    self._hedges.add(1, {"stage": stage, "outcome": "launched"})
+            
+            error: Optional[BaseException] = None
+            while pending:
+                done, _ = await asyncio.wait(
+                    list(pending), timeout=remaining(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                
+                for task in done:
+                    kind, _, started = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    
+                    elapsed = loop.time() - started
+                    self._latencies.setdefault(stage, LatencyWindow()).record(elapsed)
+                    self._latency.record(elapsed, {"stage": stage})
+                    if kind == "hedge":
+                        self._hedges.add(1, {"stage": stage, "outcome": "won"})
+                    return task.result()
+            raise error
+        finally:
+            # 負けた・タイムアウトしたリクエストは下流でも中断させる
+            for task, (_, request_id, _) in pending.items():
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                await asyncio.gather(
+                    *(cancel(request_id) for _, request_id, _ in pending.values()),
+                    return_exceptions=True
+                )
+    
+    def _backoff(self, attempt_number: int) -> float:
+        """フルジッター付き指数バックオフ"""
+        ceiling = min(
+            settings.retry_backoff_max_seconds,
+            settings.retry_backoff_base_seconds * (2 ** (attempt_number - 1))
+        )
+        return random.uniform(0, ceiling)
+
+
+class AdmissionController:
+    """ブレーカーの状態・エラー率・キュー待ち時間から新規ジョブの受け付け可否を判断する"""
+    
+    def __init__(self, stage_caller: StageCaller, queue_wait: Callable[[], float]):
+        self.stage_caller = stage_caller
+        self.queue_wait = queue_wait
+        
+        self._rejections = telemetry_manager.create_counter(
+            "admission_rejections_total",
+            "受け付けを拒否したスライド生成リクエスト数（reason=circuit_open/error_rate/queue_wait）"
+        )
+    
+    def check(self) -> Optional[Tuple[str, int]]:
+        """受け付け可能なら None、拒否する場合は（理由, Retry-After 秒）"""
+        if not settings.admission_enabled:
+            return None
+        
+        rejection = self.evaluate()
+        if rejection:
+            self._rejections.add(1, {"reason": rejection[0]})
+        return rejection
+    
+    def admit(self):
+        """受け付けを拒否する場合は AdmissionRejectedError を送出"""
+        rejection = self.check()
+        if rejection:
+            raise AdmissionRejectedError(*rejection)
+    
+    def evaluate(self) -> Optional[Tuple[str, int]]:
+        """メトリクスを記録せずに受け付け可否を評価"""
+        breakers = list(self.stage_caller.breakers.values())
+        
+        open_breakers = [b for b in breakers if b.state == CircuitBreaker.OPEN]
+        if open_breakers:
+            retry_after = max(b.retry_after() for b in open_breakers)
+            return "circuit_open", max(1, math.ceil(retry_after))
+        
+        # half_open のブレーカーは試行の呼び出しを通すため、エラー率では拒否しない
+        degraded = [
+            b for b in breakers
+            if b.state == CircuitBreaker.CLOSED
+            and b.calls >= settings.circuit_breaker_min_calls
+            and b.error_rate() >= settings.admission_max_error_rate
+        ]
+        if degraded:
+            return "error_rate", settings.admission_retry_after_seconds
+        
+        queue_wait = self.queue_wait()
+        if queue_wait >= settings.admission_max_queue_wait_seconds:
+            return "queue_wait", max(settings.admission_retry_after_seconds, math.ceil(queue_wait / 2))
+        
+        return None
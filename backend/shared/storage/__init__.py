@@ -1,4 +1,12 @@
 from .cosmos_client import cosmos_client, CosmosDBClient
 from .blob_client import blob_client, BlobStorageClient
+from .artifact_store import (
+    ARTIFACT_REF_KEY, ArtifactBackend, ArtifactStore, BlobArtifactBackend, LocalArtifactBackend,
+    artifact_store, create_artifact_store
+)
 
-__all__ = ["cosmos_client", "CosmosDBClient", "blob_client", "BlobStorageClient"]
\ No newline at end of file
+__all__ = [
+    "cosmos_client", "CosmosDBClient", "blob_client", "BlobStorageClient",
+    "ARTIFACT_REF_KEY", "ArtifactBackend", "ArtifactStore", "BlobArtifactBackend",
+    "LocalArtifactBackend", "artifact_store", "create_artifact_store",
+]
\ No newline at end of file
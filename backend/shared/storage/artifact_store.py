@@ -0,0 +1,209 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+from ..config import settings
+from ..telemetry import telemetry_manager
+from ..cache import TTLCache
+from .blob_client import blob_client
+
+
+# 参照を表す辞書のキー（{"$artifact": "<スコープ>/<sha256>", "size": <bytes>}）
+ARTIFACT_REF_KEY = "$artifact"
+
+# スコープ（ユーザーID）と内容ハッシュの形式（保存先のディレクトリや Blob 名の外を指す参照を拒否する）
+SCOPE_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class ArtifactBackend(ABC):
+    """成果物の保存先"""
+    
+    async def initialize(self):
+        """保存先を準備"""
+    
+    async def close(self):
+        """保存先のリソースを解放"""
+    
+    @abstractmethod
+    async def put(self, key: str, data: bytes) -> bool:
+        """保存（key は "<スコープ>/<sha256>"。既に存在する場合は更新日時だけ進めて False）"""
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """取得（存在しない場合は None）"""
+
+
+class LocalArtifactBackend(ArtifactBackend):
+    """ローカルディスクへの保存（コンテナー間で共有する場合は共有ボリュームを使う）"""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, key: str) -> str:
+        scope, digest = key.split("/")
+        return os.path.join(self.root, scope, digest[:2], digest)
+    
+    async def put(self, key: str, data: bytes) -> bool:
+        def write():
+            path = self._path(key)
+            if os.path.exists(path):
+                # 再利用された成果物が保持期間の削除対象にならないよう更新日時を進める
+                os.utime(path)
+                return False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 書き込み途中のファイルを読まれないよう、一時ファイルから置き換える
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            return True
+        return await asyncio.to_thread(write)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        def read():
+            try:
+                with open(self._path(key), "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                return None
+        return await asyncio.to_thread(read)
+
+
+class BlobArtifactBackend(ArtifactBackend):
+    """Blob Storage への保存"""
+    
+    def __init__(self, prefix: str = "artifacts"):
+        self.prefix = prefix
+    
+    async def initialize(self):
+        await blob_client.initialize()
+    
+    async def close(self):
+        await blob_client.close()
+    
+    async def put(self, key: str, data: bytes) -> bool:
+        stored = await blob_client.upload_blob_if_absent(f"{self.prefix}/{key}", data)
+        if not stored:
+            # 再利用された成果物が保持期間の削除対象にならないよう最終更新日時を進める
+            await blob_client.touch_blob(f"{self.prefix}/{key}")
+        return stored
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return await blob_client.download_blob(f"{self.prefix}/{key}")
+
+
+class ArtifactStore:
+    """エージェント間の大きなペイロードをユーザーごとのスコープに内容ハッシュで保存し、参照で受け渡すストア"""
+    
+    def __init__(self, backend: ArtifactBackend):
+        self.backend = backend
+        # 保存・取得済みの成果物（内容アドレスなので無効化は不要、件数と期限で破棄する）
+        self._cache: TTLCache[Any] = TTLCache(
+            settings.artifact_cache_max_entries, settings.artifact_cache_ttl_seconds
+        )
+        
+        self._bytes = telemetry_manager.create_counter(
+            "artifact_bytes_total",
+            "成果物ストアで読み書きしたバイト数（op=put/get）"
+        )
+        self._requests = telemetry_manager.create_counter(
+            "artifact_requests_total",
+            "成果物ストアの操作数（op=put/get, result=stored/exists/cached/inline/fetched）"
+        )
+    
+    async def initialize(self):
+        """保存先を準備（アプリ起動時に呼び出す）"""
+        await self.backend.initialize()
+    
+    async def close(self):
+        """保存先のリソースを解放（アプリ終了時に呼び出す）"""
+        await self.backend.close()
+    
+    @staticmethod
+    def is_ref(value: Any) -> bool:
+        """成果物への参照かどうか"""
+        return isinstance(value, dict) and ARTIFACT_REF_KEY in value
+    
+    async def put(self, data: Any, scope: str) -> Dict[str, Any]:
+        """JSON で表せるデータをスコープ（ユーザーID）に保存して参照を返す"""
+        return await self._store(data, self._encode(data), scope)
+    
+    async def offload(self, data: Any, scope: str) -> Any:
+        """しきい値以上の大きさのデータをスコープに保存して参照に置き換える（小さいものはそのまま）"""
+        if not settings.artifact_store_enabled or self.is_ref(data):
+            return data
+        encoded = self._encode(data)
+        if len(encoded) < settings.artifact_inline_max_bytes:
+            self._requests.add(1, {"op": "put", "result": "inline"})
+            return data
+        return await self._store(data, encoded, scope)
+    
+    async def resolve(self, value: Any, scope: str) -> Any:
+        """参照であれば成果物を取得し、そうでなければ値をそのまま返す（スコープ外の参照は ValueError）"""
+        if not self.is_ref(value):
+            return value
+        
+        key = str(value[ARTIFACT_REF_KEY])
+        ref_scope, _, digest = key.partition("/")
+        if ref_scope != self._check_scope(scope) or not DIGEST_PATTERN.fullmatch(digest):
+            raise ValueError(f"Artifact reference is outside of scope {scope}: {key}")
+        
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._requests.add(1, {"op": "get", "result": "cached"})
+            return cached
+        
+        data = await self.backend.get(key)
+        if data is None:
+            raise KeyError(f"Artifact not found: {key}")
+        self._bytes.add(len(data), {"op": "get"})
+        self._requests.add(1, {"op": "get", "result": "fetched"})
+        
+        resolved = json.loads(data)
+        self._cache.set(key, resolved)
+        return resolved
+    
+    def _encode(self, data: Any) -> bytes:
+        """キー順を正規化した JSON（同じ内容は同じキーになる）"""
+        return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    
+    def _check_scope(self, scope: str) -> str:
+        """スコープがパスや Blob 名の区切りを含まないことを確認"""
+        if not isinstance(scope, str) or not SCOPE_PATTERN.fullmatch(scope):
+            raise ValueError(f"Invalid artifact scope: {scope!r}")
+        return scope
+    
+    async def _store(self, data: Any, encoded: bytes, scope: str) -> Dict[str, Any]:
+        key = f"{self._check_scope(scope)}/{hashlib.sha256(encoded).hexdigest()}"
+        ref = {ARTIFACT_REF_KEY: key, "size": len(encoded)}
+        
+        if self._cache.get(key) is not None:
+            self._requests.add(1, {"op": "put", "result": "cached"})
+            return ref
+        
+        stored = await self.backend.put(key, encoded)
+        self._cache.set(key, data)
+        self._requests.add(1, {"op": "put", "result": "stored" if stored else "exists"})
+        if stored:
+            self._bytes.add(len(encoded), {"op": "put"})
+        return ref
+
+
+def create_artifact_store() -> ArtifactStore:
+    """設定に応じたバックエンドで成果物ストアを作成"""
+    if settings.artifact_store_backend == "blob":
+        backend = BlobArtifactBackend()
+    elif settings.artifact_store_backend == "local":
+        backend = LocalArtifactBackend(settings.artifact_store_path)
+    else:
+        raise ValueError(f"Unknown artifact store backend: {settings.artifact_store_backend}")
+    return ArtifactStore(backend)
+
+
+# Global instance
+artifact_store = create_artifact_store()
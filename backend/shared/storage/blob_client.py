@@ -1,5 +1,5 @@
-from azure.storage.blob import BlobServiceClient, BlobClient
-from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob.aio import BlobServiceClient
+from azure.core.exceptions import ResourceNotFoundError, ResourceExistsError
 from typing import Optional, BinaryIO
 import uuid
 from datetime import datetime, timedelta
@@ -9,75 +9,104 @@ from ..config import settings
 
 class BlobStorageClient:
     def __init__(self):
+        # 非同期クライアントはイベントループ上で initialize() により生成する
+        self.client: Optional[BlobServiceClient] = None
+        self.container_name = settings.blob_container_name
+    
+    async def initialize(self):
+        """クライアントを生成し、コンテナーを準備（アプリ起動時に呼び出す）"""
+        if self.client is not None:
+            return
+        
         self.client = BlobServiceClient.from_connection_string(
             settings.blob_storage_connection_string
         )
-        self.container_name = settings.blob_container_name
-        self._ensure_container()
+        await self._ensure_container()
     
-    def _ensure_container(self):
+    async def close(self):
+        """クライアントを閉じる（アプリ終了時に呼び出す）"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+    
+    async def _ensure_container(self):
         """コンテナーが存在しない場合は作成"""
         try:
-            self.client.get_container_client(self.container_name)
-        except ResourceNotFoundError:
-            self.client.create_container(self.container_name)
+            await self.client.create_container(self.container_name)
+        except ResourceExistsError:
+            pass
     
-    def upload_file(self, file_data: BinaryIO, file_name: str, user_id: str, file_type: str = "pptx") -> str:
-        """ファイルをアップロードして URL を返す"""
-        blob_name = f"{user_id}/{file_type}/{datetime.utcnow().strftime('%Y/%m/%d')}/{uuid.uuid4()}_{file_name}"
-        
-        blob_client = self.client.get_blob_client(
+    def _get_blob_client(self, blob_name: str):
+        if self.client is None:
+            raise RuntimeError("BlobStorageClient is not initialized")
+        return self.client.get_blob_client(
             container=self.container_name,
             blob=blob_name
         )
+    
+    async def upload_file(self, file_data: BinaryIO, file_name: str, user_id: str, file_type: str = "pptx") -> str:
+        """ファイルをアップロードして URL を返す"""
+        blob_name = f"{user_id}/{file_type}/{datetime.utcnow().strftime('%Y/%m/%d')}/{uuid.uuid4()}_{file_name}"
         
-        blob_client.upload_blob(file_data, overwrite=True)
+        blob_client = self._get_blob_client(blob_name)
+        await blob_client.upload_blob(file_data, overwrite=True)
         return blob_client.url
     
-    def upload_bytes(self, data: bytes, file_name: str, user_id: str, file_type: str = "pptx") -> str:
+    async def upload_bytes(self, data: bytes, file_name: str, user_id: str, file_type: str = "pptx") -> str:
         """バイトデータをアップロードして URL を返す"""
         blob_name = f"{user_id}/{file_type}/{datetime.utcnow().strftime('%Y/%m/%d')}/{uuid.uuid4()}_{file_name}"
         
-        blob_client = self.client.get_blob_client(
-            container=self.container_name,
-            blob=blob_name
-        )
-        
-        blob_client.upload_blob(data, overwrite=True)
+        blob_client = self._get_blob_client(blob_name)
+        await blob_client.upload_blob(data, overwrite=True)
         return blob_client.url
     
-    def download_file(self, blob_url: str) -> Optional[bytes]:
+    async def upload_blob_if_absent(self, blob_name: str, data: bytes) -> bool:
+        """名前を指定してアップロード（既に存在する場合は何もせず False）"""
+        try:
+            await self._get_blob_client(blob_name).upload_blob(data, overwrite=False)
+            return True
+        except ResourceExistsError:
+            return False
+    
+    async def touch_blob(self, blob_name: str):
+        """最終更新日時を更新（ライフサイクルポリシーで削除されないように）"""
+        try:
+            await self._get_blob_client(blob_name).set_blob_metadata({})
+        except ResourceNotFoundError:
+            pass
+    
+    async def download_blob(self, blob_name: str) -> Optional[bytes]:
+        """名前を指定してダウンロード"""
+        try:
+            downloader = await self._get_blob_client(blob_name).download_blob()
+            return await downloader.readall()
+        except ResourceNotFoundError:
+            return None
+    
+    async def download_file(self, blob_url: str) -> Optional[bytes]:
         """URL からファイルをダウンロード"""
         try:
             blob_name = blob_url.split(f"{self.container_name}/")[-1]
-            blob_client = self.client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            return blob_client.download_blob().readall()
+            blob_client = self._get_blob_client(blob_name)
+            downloader = await blob_client.download_blob()
+            return await downloader.readall()
         except ResourceNotFoundError:
             return None
     
-    def delete_file(self, blob_url: str) -> bool:
+    async def delete_file(self, blob_url: str) -> bool:
         """ファイルを削除"""
         try:
             blob_name = blob_url.split(f"{self.container_name}/")[-1]
-            blob_client = self.client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            blob_client.delete_blob()
+            blob_client = self._get_blob_client(blob_name)
+            await blob_client.delete_blob()
             return True
         except ResourceNotFoundError:
             return False
     
     def generate_sas_url(self, blob_url: str, expiry_hours: int = 24) -> str:
-        """SAS URL を生成（期限付きアクセス）"""
+        """SAS URL を生成（期限付きアクセス、ネットワーク呼び出しなし）"""
         blob_name = blob_url.split(f"{self.container_name}/")[-1]
-        blob_client = self.client.get_blob_client(
-            container=self.container_name,
-            blob=blob_name
-        )
+        blob_client = self._get_blob_client(blob_name)
         
         from azure.storage.blob import generate_blob_sas, BlobSasPermissions
         
@@ -1,4 +1,5 @@
-from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos import PartitionKey
+from azure.cosmos.aio import CosmosClient
 from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from typing import Dict, Any, List, Optional
 import json
@@ -9,11 +10,27 @@ from ..config import settings
 
 class CosmosDBClient:
     def __init__(self):
+        # 非同期クライアントはイベントループ上で initialize() により生成する
+        self.client: Optional[CosmosClient] = None
+        self.database = None
+    
+    async def initialize(self):
+        """クライアントを生成し、コンテナーを準備（アプリ起動時に呼び出す）"""
+        if self.client is not None:
+            return
+        
         self.client = CosmosClient(settings.cosmos_db_endpoint, settings.cosmos_db_key)
         self.database = self.client.get_database_client(settings.cosmos_db_database_name)
-        self._ensure_containers()
+        await self._ensure_containers()
     
-    def _ensure_containers(self):
+    async def close(self):
+        """クライアントを閉じる（アプリ終了時に呼び出す）"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self.database = None
+    
+    async def _ensure_containers(self):
         """コンテナーが存在しない場合は作成"""
         containers = [
             ("users", "/user_id"),
@@ -22,55 +39,104 @@ class CosmosDBClient:
             ("llm_configs", "/user_id"),
             ("slide_jobs", "/user_id"),
             ("generation_history", "/user_id"),
+            # 他のレプリカが処理中のジョブへのキャンセル要求
+            ("job_cancellations", "/user_id"),
         ]
         
         for container_name, partition_key in containers:
-            try:
-                self.database.get_container_client(container_name)
-            except CosmosResourceNotFoundError:
-                self.database.create_container(
-                    id=container_name,
-                    partition_key=PartitionKey(path=partition_key)
-                )
+            await self.database.create_container_if_not_exists(
+                id=container_name,
+                partition_key=PartitionKey(path=partition_key)
+            )
     
     def get_container(self, container_name: str):
+        if self.database is None:
+            raise RuntimeError("CosmosDBClient is not initialized")
         return self.database.get_container_client(container_name)
     
-    def create_item(self, container_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_item(self, container_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
         container = self.get_container(container_name)
         item["created_at"] = datetime.utcnow().isoformat()
         item["updated_at"] = datetime.utcnow().isoformat()
-        return container.create_item(body=item)
+        return await container.create_item(body=item)
     
-    def read_item(self, container_name: str, item_id: str, partition_key: str) -> Optional[Dict[str, Any]]:
+    async def create_items_batch(
+        self,
+        container_name: str,
+        partition_key: str,
+        items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """同一パーティションのアイテムをトランザクションバッチでまとめて作成"""
+        container = self.get_container(container_name)
+        now = datetime.utcnow().isoformat()
+        results = []
+        # トランザクションバッチは 1 回あたり最大 100 操作
+        for start in range(0, len(items), 100):
+            chunk = items[start:start + 100]
+            for item in chunk:
+                item["created_at"] = now
+                item["updated_at"] = now
+            results.extend(await container.execute_item_batch(
+                batch_operations=[("create", (item,)) for item in chunk],
+                partition_key=partition_key
+            ))
+        return results
+    
+    async def read_item(self, container_name: str, item_id: str, partition_key: str) -> Optional[Dict[str, Any]]:
         container = self.get_container(container_name)
         try:
-            return container.read_item(item=item_id, partition_key=partition_key)
+            return await container.read_item(item=item_id, partition_key=partition_key)
         except CosmosResourceNotFoundError:
             return None
     
-    def update_item(self, container_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_item(self, container_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
         container = self.get_container(container_name)
         item["updated_at"] = datetime.utcnow().isoformat()
-        return container.replace_item(item=item["id"], body=item)
+        return await container.replace_item(item=item["id"], body=item)
     
-    def delete_item(self, container_name: str, item_id: str, partition_key: str):
+    async def upsert_item(self, container_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """作成または置き換え"""
         container = self.get_container(container_name)
-        container.delete_item(item=item_id, partition_key=partition_key)
+        item["updated_at"] = datetime.utcnow().isoformat()
+        return await container.upsert_item(body=item)
     
-    def query_items(self, container_name: str, query: str, parameters: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async def patch_item(
+        self,
+        container_name: str,
+        item_id: str,
+        partition_key: str,
+        operations: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """部分ドキュメント更新（変更フィールドのみ送信して RU を節約）"""
         container = self.get_container(container_name)
-        items = list(container.query_items(
-            query=query,
-            parameters=parameters or [],
-            enable_cross_partition_query=True
-        ))
-        return items
+        return await container.patch_item(
+            item=item_id,
+            partition_key=partition_key,
+            patch_operations=operations
+        )
+    
+    async def delete_item(self, container_name: str, item_id: str, partition_key: str, missing_ok: bool = False):
+        container = self.get_container(container_name)
+        try:
+            await container.delete_item(item=item_id, partition_key=partition_key)
+        except CosmosResourceNotFoundError:
+            if not missing_ok:
+                raise
+    
+    async def query_items(self, container_name: str, query: str, parameters: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        container = self.get_container(container_name)
+        # 非同期クライアントではパーティション横断クエリが既定で有効
+        return [
+            item async for item in container.query_items(
+                query=query,
+                parameters=parameters or []
+            )
+        ]
     
-    def get_user_items(self, container_name: str, user_id: str) -> List[Dict[str, Any]]:
+    async def get_user_items(self, container_name: str, user_id: str) -> List[Dict[str, Any]]:
         query = "SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.created_at DESC"
         parameters = [{"name": "@user_id", "value": user_id}]
-        return self.query_items(container_name, query, parameters)
+        return await self.query_items(container_name, query, parameters)
 
 
 # Global instance
@@ -9,6 +9,7 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 from opentelemetry.instrumentation.requests import RequestsInstrumentor
 from opentelemetry.sdk.resources import Resource
+from opentelemetry.metrics import Observation
 import logging
 
 from .config import settings
@@ -123,6 +124,17 @@ class TelemetryManager:
             name=name,
             description=description
         )
+    
+    def create_observable_gauge(self, name: str, callback, description: str = ""):
+        """ゲージメトリクスを作成（callback は現在値を返す関数）"""
+        def observe(options):
+            return [Observation(callback())]
+        
+        return self._meter.create_observable_gauge(
+            name=name,
+            callbacks=[observe],
+            description=description
+        )
 
 
 # Global instance
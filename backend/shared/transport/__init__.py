@@ -0,0 +1,11 @@
+from .a2a_pool import AGENT_NAMES, SESSION_KEY_HEADER, A2AClientRegistry, a2a_clients
+from .base import AgentTransport
+from .a2a_transport import A2ATransport
+from .inprocess import AGENT_MODULES, InProcessTransport
+from .factory import create_agent_transport
+
+__all__ = [
+    "AGENT_NAMES", "SESSION_KEY_HEADER", "A2AClientRegistry", "a2a_clients",
+    "AgentTransport", "A2ATransport", "AGENT_MODULES", "InProcessTransport",
+    "create_agent_transport",
+]
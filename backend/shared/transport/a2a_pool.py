@@ -0,0 +1,124 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+import httpx
+
+from a2a_python_sdk import A2AClient
+
+from ..config import settings
+from ..telemetry import telemetry_manager
+
+
+AGENT_NAMES = ("agenda", "information", "slide", "review")
+
+# 同じジョブのリクエストを同じレプリカへ振り分けるためのヘッダー（ロードバランサーでハッシュのキーにする）
+SESSION_KEY_HEADER = "X-Session-Key"
+
+# 送信中のリクエストのセッションキー（A2A クライアントはリクエストごとのヘッダーを指定できないためフックで付与する）
+current_session_key: ContextVar[Optional[str]] = ContextVar("a2a_session_key", default=None)
+
+
+class A2AClientRegistry:
+    """エージェントごとに長寿命の A2A クライアントと HTTP コネクションプールを共有するレジストリ"""
+    
+    def __init__(self):
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._a2a_clients: Dict[str, Tuple[httpx.AsyncClient, A2AClient]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {
+            agent: {"requests": 0, "connections_opened": 0} for agent in AGENT_NAMES
+        }
+        
+        self._requests = telemetry_manager.create_counter(
+            "a2a_requests_total",
+            "エージェント間 HTTP リクエスト数"
+        )
+        self._connections = telemetry_manager.create_counter(
+            "a2a_connections_opened_total",
+            "エージェント間で新規に確立した TCP コネクション数"
+        )
+    
+    def agent_url(self, agent: str) -> str:
+        """設定からエージェントのベース URL を取得"""
+        urls = {
+            "agenda": settings.agenda_agent_url,
+            "information": settings.information_agent_url,
+            "slide": settings.slide_agent_url,
+            "review": settings.review_agent_url,
+        }
+        if agent not in urls:
+            raise ValueError(f"Unknown agent: {agent}")
+        return urls[agent]
+    
+    def http_client(self, agent: str) -> httpx.AsyncClient:
+        """エージェント用の共有 httpx クライアント（keep-alive・HTTP/2 対応）"""
+        client = self._http_clients.get(agent)
+        if client is None or client.is_closed:
+            max_connections = settings.a2a_agent_max_connections.get(
+                agent, settings.a2a_max_connections
+            )
+            client = httpx.AsyncClient(
+                base_url=self.agent_url(agent),
+                http2=settings.a2a_http2,
+                timeout=httpx.Timeout(settings.a2a_timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=min(
+                        settings.a2a_max_keepalive_connections, max_connections
+                    ),
+                    keepalive_expiry=settings.a2a_keepalive_expiry
+                ),
+                event_hooks={"request": [self._request_hook(agent)]}
+            )
+            self._http_clients[agent] = client
+        return client
+    
+    def get(self, agent: str) -> A2AClient:
+        """共有コネクションプールを使う A2A クライアントを取得"""
+        http_client = self.http_client(agent)
+        cached = self._a2a_clients.get(agent)
+        if cached is None or cached[0] is not http_client:
+            cached = (http_client, A2AClient(self.agent_url(agent), httpx_client=http_client))
+            self._a2a_clients[agent] = cached
+        return cached[1]
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """エージェントごとのリクエスト数・新規コネクション数・再利用率"""
+        result = {}
+        for agent, stats in self._stats.items():
+            requests = stats["requests"]
+            opened = stats["connections_opened"]
+            result[agent] = {
+                "requests": requests,
+                "connections_opened": opened,
+                "reuse_ratio": round(1 - opened / requests, 3) if requests else None,
+            }
+        return result
+    
+    async def aclose(self):
+        """全コネクションを閉じる"""
+        for client in self._http_clients.values():
+            await client.aclose()
+        self._http_clients.clear()
+        self._a2a_clients.clear()
+    
+    def _request_hook(self, agent: str):
+        """リクエスト数を数え、httpcore のトレースで新規コネクション確立を検知するフック"""
+        stats = self._stats.setdefault(agent, {"requests": 0, "connections_opened": 0})
+        
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                stats["connections_opened"] += 1
+                self._connections.add(1, {"agent": agent})
+        
+        async def on_request(request: httpx.Request):
+            stats["requests"] += 1
+            self._requests.add(1, {"agent": agent})
+            request.extensions["trace"] = trace
+            session_key = current_session_key.get()
+            if session_key and SESSION_KEY_HEADER not in request.headers:
+                request.headers[SESSION_KEY_HEADER] = session_key
+        
+        return on_request
+
+
+# Global instance
+a2a_clients = A2AClientRegistry()
@@ -0,0 +1,50 @@
+from typing import AsyncIterator, Dict, Optional
+import json
+
+from ..models import AgentRequest, AgentResponse
+from .a2a_pool import SESSION_KEY_HEADER, A2AClientRegistry, a2a_clients, current_session_key
+from .base import AgentTransport
+
+
+class A2ATransport(AgentTransport):
+    """共有コネクションプール上の A2A（HTTP/JSON）でエージェントを呼び出すトランスポート"""
+    
+    # 途中経過を NDJSON で返す /stream エンドポイントを持つエージェント
+    STREAMING_AGENTS = ("agenda",)
+    
+    def __init__(self, clients: A2AClientRegistry = a2a_clients):
+        self.clients = clients
+    
+    async def call(self, agent: str, request: AgentRequest) -> AgentResponse:
+        token = current_session_key.set(request.session_key)
+        try:
+            return await self.clients.get(agent).call_agent(request)
+        finally:
+            current_session_key.reset(token)
+    
+    async def stream(self, agent: str, request: AgentRequest) -> AsyncIterator[AgentResponse]:
+        if agent not in self.STREAMING_AGENTS:
+            yield await self.call(agent, request)
+            return
+        
+        async with self.clients.http_client(agent).stream(
+            "POST", "/stream", json=json.loads(request.json()),
+            headers=self._session_headers(request.session_key)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield AgentResponse(**json.loads(line))
+    
+    async def cancel(self, agent: str, request_id: str, session_key: Optional[str] = None) -> bool:
+        response = await self.clients.http_client(agent).post(
+            f"/cancel/{request_id}", timeout=5.0, headers=self._session_headers(session_key)
+        )
+        return response.is_success and response.json().get("cancelled", False)
+    
+    async def aclose(self):
+        await self.clients.aclose()
+    
+    def _session_headers(self, session_key: Optional[str]) -> Dict[str, str]:
+        """セッションキーのヘッダー（キーがない場合は付与しない）"""
+        return {SESSION_KEY_HEADER: session_key} if session_key else {}
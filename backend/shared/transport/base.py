@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+from ..models import AgentRequest, AgentResponse
+
+
+class AgentTransport(ABC):
+    """オーケストレーターから下流エージェントを呼び出すトランスポート"""
+    
+    @abstractmethod
+    async def call(self, agent: str, request: AgentRequest) -> AgentResponse:
+        """エージェントを呼び出す"""
+    
+    async def stream(self, agent: str, request: AgentRequest) -> AsyncIterator[AgentResponse]:
+        """途中経過（progress < 100）を返しながら呼び出す（対応しない場合は最終結果のみ）"""
+        yield await self.call(agent, request)
+    
+    @abstractmethod
+    async def cancel(self, agent: str, request_id: str, session_key: Optional[str] = None) -> bool:
+        """エージェントで実行中のリクエストをキャンセル（session_key は呼び出し時と同じレプリカへ届けるためのキー）"""
+    
+    async def start(self):
+        """エージェントの起動処理を実行（アプリ起動時に呼び出す）"""
+    
+    async def aclose(self):
+        """接続などのリソースを解放"""
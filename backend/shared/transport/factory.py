@@ -0,0 +1,14 @@
+from ..config import settings
+from .base import AgentTransport
+from .a2a_transport import A2ATransport
+from .inprocess import InProcessTransport
+
+
+def create_agent_transport() -> AgentTransport:
+    """設定に応じたトランスポートを作成"""
+    if settings.agent_transport == "a2a":
+        return A2ATransport()
+    elif settings.agent_transport == "inprocess":
+        return InProcessTransport()
+    else:
+        raise ValueError(f"Unknown agent transport: {settings.agent_transport}")
@@ -0,0 +1,74 @@
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Dict, Optional
+import importlib
+
+from a2a_python_sdk import AgentExecutor
+
+from ..models import AgentRequest, AgentResponse
+from .base import AgentTransport
+
+
+# エージェント名 → エグゼキューターを定義するモジュール（共有モジュールを二重に読み込まないよう、このパッケージからの相対名）
+AGENT_MODULES = {
+    "agenda": "...agents.agenda_agent.main",
+    "information": "...agents.information_agent.main",
+    "slide": "...agents.slide_agent.main",
+    "review": "...agents.review_agent.main",
+}
+
+
+class InProcessTransport(AgentTransport):
+    """同一プロセス内のエグゼキューターを直接呼び出すトランスポート（HTTP・JSON 変換なし）"""
+    
+    def __init__(self):
+        self._executors: Dict[str, AgentExecutor] = {}
+        self._lifespans: Optional[AsyncExitStack] = None
+    
+    def executor(self, agent: str) -> AgentExecutor:
+        """エージェントのエグゼキューター（初回呼び出し時にモジュールを読み込む）"""
+        executor = self._executors.get(agent)
+        if executor is None:
+            executor = self._module(agent).executor
+            self._executors[agent] = executor
+        return executor
+    
+    async def start(self):
+        """各エージェントの lifespan（LLM クライアントプールや成果物ストアの初期化と終了）に入る"""
+        if self._lifespans is not None:
+            return
+        lifespans = AsyncExitStack()
+        try:
+            for agent in AGENT_MODULES:
+                module = self._module(agent)
+                await lifespans.enter_async_context(module.lifespan(module.app))
+        except BaseException:
+            await lifespans.aclose()
+            raise
+        self._lifespans = lifespans
+    
+    async def aclose(self):
+        """各エージェントの終了処理を起動時と逆の順に実行"""
+        lifespans, self._lifespans = self._lifespans, None
+        if lifespans is not None:
+            await lifespans.aclose()
+    
+    def _module(self, agent: str):
+        """エージェントのモジュールを読み込む"""
+        if agent not in AGENT_MODULES:
+            raise ValueError(f"Unknown agent: {agent}")
+        return importlib.import_module(AGENT_MODULES[agent], __package__)
+    
+    async def call(self, agent: str, request: AgentRequest) -> AgentResponse:
+        # リクエスト・レスポンスの Pydantic オブジェクトをそのまま受け渡す
+        return await self.executor(agent).execute(request)
+    
+    async def stream(self, agent: str, request: AgentRequest) -> AsyncIterator[AgentResponse]:
+        executor = self.executor(agent)
+        if not hasattr(executor, "execute_stream"):
+            yield await executor.execute(request)
+            return
+        async for response in executor.execute_stream(request):
+            yield response
+    
+    async def cancel(self, agent: str, request_id: str, session_key: Optional[str] = None) -> bool:
+        return await self.executor(agent).cancel(request_id)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# エージェントは backend パッケージからの相対インポートを使うため、リポジトリのルートを import パスに追加する
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+# 必須の設定項目（テストでは外部サービスに接続しない）
+for name, value in {
+    "AZURE_TENANT_ID": "test-tenant",
+    "AZURE_CLIENT_ID": "test-client",
+    "AZURE_CLIENT_SECRET": "test-secret",
+    "COSMOS_DB_ENDPOINT": "https://localhost:8081/",
+    "COSMOS_DB_KEY": "dGVzdA==",
+    "BLOB_STORAGE_CONNECTION_STRING": "UseDevelopmentStorage=true",
+    "AZURE_AI_FOUNDRY_ENDPOINT": "https://localhost/",
+    "AZURE_AI_FOUNDRY_KEY": "test-key",
+    "A2A_TOKEN_SECRET": "test-secret",
+    "JOB_QUEUE_BACKEND": "memory",
+    "ARTIFACT_STORE_BACKEND": "local",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,44 @@
+import pytest
+
+from backend.shared.storage import ARTIFACT_REF_KEY, ArtifactStore, LocalArtifactBackend
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(LocalArtifactBackend(str(tmp_path)))
+
+
+@pytest.mark.asyncio
+async def test_put_stores_under_user_prefix(store, tmp_path):
+    ref = await store.put({"text": "内容"}, "user-1")
+    
+    scope, digest = ref[ARTIFACT_REF_KEY].split("/")
+    assert scope == "user-1"
+    assert (tmp_path / "user-1" / digest[:2] / digest).exists()
+    assert await store.resolve(ref, "user-1") == {"text": "内容"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("key", [
+    "user-2/" + "0" * 64,
+    "0" * 64,
+    "user-1/../user-2/" + "0" * 64,
+    "user-1/" + "../" * 3 + "etc/passwd",
+])
+async def test_resolve_rejects_references_outside_prefix(store, key):
+    with pytest.raises(ValueError):
+        await store.resolve({ARTIFACT_REF_KEY: key, "size": 1}, "user-1")
+
+
+@pytest.mark.asyncio
+async def test_resolve_rejects_other_users_artifact(store):
+    ref = await store.put({"text": "内容"}, "user-1")
+    
+    with pytest.raises(ValueError):
+        await store.resolve(ref, "user-2")
+
+
+@pytest.mark.asyncio
+async def test_put_rejects_scope_with_path_separators(store):
+    with pytest.raises(ValueError):
+        await store.put({"text": "内容"}, "../user-1")
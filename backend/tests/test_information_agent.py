@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from backend.agents.information_agent import main
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    # AI Foundry への接続を作らずに初期化する
+    monkeypatch.setattr(main, "AIProjectsClient", lambda **kwargs: None)
+    monkeypatch.setattr(main, "DefaultAzureCredential", lambda: None)
+    return main.InformationCollectionExecutor()
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_shared_in_batch(executor):
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return None
+    
+    assert await executor._shared_in_batch("batch-1", ("url", "https://example.com"), fetch) is None
+    assert await executor._shared_in_batch("batch-1", ("url", "https://example.com"), fetch) is None
+    # 取得に失敗した URL もバッチ内では 1 回だけ取得する
+    assert calls == [1]
+    
+    assert await executor._shared_in_batch("batch-2", ("url", "https://example.com"), fetch) is None
+    assert calls == [1, 1]
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend.shared.llm_gateway import LLMGateway, estimate_tokens
+
+
+class Chunk:
+    """ストリーミング応答のチャンク（最終チャンクだけ使用トークン数を持つ場合がある）"""
+    
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.metadata = {"usage": usage} if usage else {}
+    
+    def __str__(self):
+        return self.text
+
+
+class StreamingKernel:
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    async def invoke_stream(self, function, arguments):
+        for chunk in self.chunks:
+            yield [chunk]
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    from backend.shared.llm_gateway import settings
+    monkeypatch.setattr(settings, "llm_deployment_limits", {})
+    monkeypatch.setattr(settings, "llm_requests_per_minute", 0)
+    monkeypatch.setattr(settings, "llm_tokens_per_minute", 10000)
+    monkeypatch.setattr(settings, "llm_max_concurrency", 0)
+    return LLMGateway()
+
+
+async def _consume(gateway, chunks):
+    kernel = StreamingKernel(chunks)
+    return [
+        messages async for messages in gateway.invoke_stream(
+            kernel, None, {}, deployment="test-model", max_tokens=1000
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_settles_tokens_with_reported_usage(gateway):
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=20)
+    await _consume(gateway, [Chunk("hello "), Chunk("world", usage)])
+    
+    # 見積もり（入力 + max_tokens）ではなく実際の 30 トークンだけが差し引かれる
+    assert gateway.limiter("test-model").tokens._tokens == pytest.approx(10000 - 30, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_stream_settles_tokens_with_streamed_text(gateway):
+    await _consume(gateway, [Chunk("hello "), Chunk("world")])
+    
+    used = estimate_tokens("") + estimate_tokens("hello world")
+    assert gateway.limiter("test-model").tokens._tokens == pytest.approx(10000 - used, abs=1)
+
+
+class RateLimited(Exception):
+    """Retry-After を持つ 429 応答"""
+    
+    def __init__(self):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after-ms": "0"})
+
+
+class FlakyKernel:
+    """最初の呼び出しだけ 429 で失敗するカーネル"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def invoke(self, function, arguments):
+        self.calls += 1
+        if self.calls == 1:
+            raise RateLimited()
+        return SimpleNamespace(value=[Chunk("ok", SimpleNamespace(prompt_tokens=10, completion_tokens=20))])
+    
+    async def invoke_stream(self, function, arguments):
+        self.calls += 1
+        if self.calls == 1:
+            raise RateLimited()
+        yield [Chunk("ok", SimpleNamespace(prompt_tokens=10, completion_tokens=20))]
+
+
+@pytest.fixture
+def acquired(gateway, monkeypatch):
+    """_acquire に渡された待機列のエントリを記録する"""
+    entries = []
+    acquire = gateway._acquire
+    
+    async def record(limiter, entry, tokens):
+        entries.append(entry)
+        return await acquire(limiter, entry, tokens)
+    
+    monkeypatch.setattr(gateway, "_acquire", record)
+    return entries
+
+
+@pytest.mark.asyncio
+async def test_retry_refunds_failed_attempt_and_keeps_sequence(gateway, acquired):
+    kernel = FlakyKernel()
+    await gateway.invoke(kernel, None, {}, deployment="test-model", max_tokens=1000)
+    
+    assert kernel.calls == 2
+    # 429 で失敗した試行の見積もりは戻され、成功した試行の実績だけが差し引かれる
+    assert gateway.limiter("test-model").tokens._tokens == pytest.approx(10000 - 30, abs=1)
+    # 再試行しても最初の到着順のまま待機列に並ぶ
+    assert acquired[0] == acquired[1]
+
+
+@pytest.mark.asyncio
+async def test_stream_retry_refunds_failed_attempt_and_keeps_sequence(gateway, acquired):
+    kernel = FlakyKernel()
+    async for _ in gateway.invoke_stream(kernel, None, {}, deployment="test-model", max_tokens=1000):
+        pass
+    
+    assert kernel.calls == 2
+    assert gateway.limiter("test-model").tokens._tokens == pytest.approx(10000 - 30, abs=1)
+    assert acquired[0] == acquired[1]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from backend.shared.llm_output import JsonArrayStreamParser, LLMJsonParser, repair_json
+
+
+def _feed_all(parser: JsonArrayStreamParser, chunks) -> list:
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def _chunked(text: str, size: int) -> list:
+    return [text[index:index + size] for index in range(0, len(text), size)]
+
+
+SLIDES = [
+    {"title": "概要 \"引用\" と \\ 記号", "content": "改行\nと {波括弧} と [角括弧]"},
+    {"title": "表", "table": {"headers": ["a", "b"], "rows": [[1, 2], [3, [4, 5]]]}},
+    {"title": "入れ子", "meta": {"notes": {"text": "}]"}, "tags": []}},
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_items_are_returned_for_any_chunk_size(size):
+    text = "```json\n" + json.dumps({"title": "デッキ", "slides": SLIDES}, ensure_ascii=False) + "\n```"
+    
+    assert _feed_all(JsonArrayStreamParser("slides"), _chunked(text, size)) == SLIDES
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = JsonArrayStreamParser("slides")
+    
+    assert parser.feed('{"slides": [{"title": "1"}, {"title": "2') == [{"title": "1"}]
+    assert parser.feed('"}') == [{"title": "2"}]
+    assert parser.feed("]}") == []
+
+
+def test_braces_and_key_name_inside_strings_are_ignored():
+    text = '{"intro": "{\\"slides\\": [{\\"x\\": 1}]}", "note": "slides", "slides": [{"title": "[}{"}]}'
+    
+    assert _feed_all(JsonArrayStreamParser("slides"), _chunked(text, 1)) == [{"title": "[}{"}]
+
+
+def test_chunk_boundary_inside_escaped_string():
+    chunks = ['{"slides": [{"title": "a\\', '"b\\', '\\', 'c"}, {"ti', 'tle": "d"}]}']
+    
+    assert _feed_all(JsonArrayStreamParser("slides"), chunks) == [{"title": 'a"b\\c'}, {"title": "d"}]
+
+
+def test_nested_array_with_same_key_is_not_read():
+    text = '{"meta": {"slides": [{"title": "x"}]}, "other": [{"slides": []}], "slides": [{"title": "y"}]}'
+    
+    assert _feed_all(JsonArrayStreamParser("slides"), [text]) == [{"title": "y"}]
+
+
+def test_repeated_key_is_read_only_once():
+    text = '{"slides": [{"title": "1"}], "slides": [{"title": "2"}]}'
+    
+    assert _feed_all(JsonArrayStreamParser("slides"), _chunked(text, 4)) == [{"title": "1"}]
+
+
+def test_non_object_items_are_skipped():
+    text = '{"slides": [1, "two", [3], {"title": "4"}]}'
+    
+    assert _feed_all(JsonArrayStreamParser("slides"), [text]) == [{"title": "4"}]
+
+
+@pytest.mark.parametrize("text, expected", [
+    # 途中で切れた配列要素のオブジェクトは、完結していたキーがあっても要素ごと捨てる
+    ('{"slides":[{"a":1},{"a":2,"b":"hal', {"slides": [{"a": 1}]}),
+    ('{"slides":[{"a":1},{"a":{"b":[1,2', {"slides": [{"a": 1}]}),
+    ('{"slides":[{"a":', {"slides": []}),
+    ('[{"a":1},{"a":2}', [{"a": 1}, {"a": 2}]),
+    # 配列要素ではないオブジェクトは完結したキーまで残す
+    ('{"title":"x","meta":{"a":1,"b":"tr', {"title": "x", "meta": {"a": 1}}),
+    ('{"title":"x","slides":[1,2,', {"title": "x", "slides": [1, 2]}),
+    ('{"a":[1,2,],}', {"a": [1, 2]}),
+    ('{"a":[1,2}', {"a": [1, 2]}),
+    # エスケープされた引用符や括弧は文字列の一部として扱う
+    (r'{"a":"x\"}', {}),
+    (r'{"slides":[{"a":"x\"y]"},{"b', {"slides": [{"a": 'x"y]'}]}),
+    ('{"a":1} 以上です', {"a": 1}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_parser_reads_fenced_json_without_repair():
+    data, repaired = LLMJsonParser("test").parse('以下です。\n```json\n{"slides": [{"a": 1}]}\n```')
+    
+    assert data == {"slides": [{"a": 1}]}
+    assert not repaired
+
+
+def test_parser_repairs_truncated_output():
+    data, repaired = LLMJsonParser("test").parse('```json\n{"slides": [{"a": 1}, {"a": 2, "b": "ha')
+    
+    assert data == {"slides": [{"a": 1}]}
+    assert repaired
+
+
+def test_parser_raises_when_repair_fails():
+    with pytest.raises(ValueError):
+        LLMJsonParser("test").parse("JSON はありません")
@@ -0,0 +1,289 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.agents.orchestration_agent import main
+from backend.shared.models import (
+    AgentRequest, JobQueueEntry, SlideAgenda, SlideContent, SlideGenerationJob, SlideGenerationRequest,
+    SlideGenerationStatus, UserSettings
+)
+from backend.shared.resilience import AdmissionRejectedError
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    """Cosmos DB とキューを置き換えたオーケストレーター"""
+    executor = main.OrchestrationExecutor()
+    created = []
+    
+    async def create_item(container_name, item):
+        # Cosmos SDK と同じく本文を json.dumps で送れることを確認する
+        json.dumps(item)
+        created.append((container_name, item))
+        return item
+    
+    async def read_item(container_name, item_id, partition_key):
+        return None
+    
+    async def enqueue(job, kind, weight=None):
+        return None
+    
+    monkeypatch.setattr(main.cosmos_client, "create_item", create_item)
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    monkeypatch.setattr(main.settings, "result_cache_enabled", False)
+    monkeypatch.setattr(executor, "_enqueue", enqueue)
+    executor.created = created
+    return executor
+
+
+@pytest.mark.asyncio
+async def test_create_job_with_request_latency_target(orchestrator):
+    job = await orchestrator._create_job(
+        "key-request", "user-1", SlideGenerationRequest(prompt="テスト", latency_target_seconds=60)
+    )
+    
+    assert job.deadline is not None
+    container_name, item = orchestrator.created[0]
+    assert container_name == "slide_jobs"
+    assert item["latency_target_seconds"] == 60
+    assert isinstance(item["deadline"], str)
+
+
+@pytest.mark.asyncio
+async def test_create_job_with_user_latency_target(orchestrator, monkeypatch):
+    async def user_settings(user_id):
+        return UserSettings(user_id=user_id, latency_target_seconds=120)
+    
+    monkeypatch.setattr(orchestrator, "_user_settings", user_settings)
+    job = await orchestrator._create_job("key-user", "user-1", SlideGenerationRequest(prompt="テスト"))
+    
+    assert job.latency_target_seconds == 120
+    assert isinstance(orchestrator.created[0][1]["deadline"], str)
+
+
+def _generation_request(prompt: str) -> AgentRequest:
+    return AgentRequest(
+        request_id="request-1",
+        agent_type="slide_generation",
+        payload={"prompt": prompt},
+        user_id="user-1"
+    )
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submission_is_returned_while_overloaded(orchestrator, monkeypatch):
+    response = await orchestrator.execute(_generation_request("テスト"))
+    assert response.success
+    
+    async def read_item(container_name, item_id, partition_key):
+        return orchestrator.created[0][1]
+    
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    monkeypatch.setattr(orchestrator.admission, "check", lambda: ("queue_wait", 30))
+    
+    # 過負荷でも既存ジョブにまとめられる再投稿は受け付ける
+    response = await orchestrator.execute(_generation_request("テスト"))
+    assert response.success
+    assert response.result["deduplicated"]
+    assert response.result["job_id"] == orchestrator.created[0][1]["id"]
+    
+    # 新たなジョブになる投稿だけを拒否する
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        await orchestrator.execute(_generation_request("別の内容"))
+    assert rejected.value.retry_after == 30
+    assert len(orchestrator.created) == 1
+
+
+def _stored_job(status: SlideGenerationStatus, owner_id: str = "other-instance") -> dict:
+    job = SlideGenerationJob(
+        id="job-1",
+        user_id="user-1",
+        request=SlideGenerationRequest(prompt="テスト"),
+        status=status,
+        owner_id=owner_id
+    )
+    return json.loads(job.json())
+
+
+@pytest.fixture
+def cancellation(orchestrator, monkeypatch):
+    """キャンセル時の Cosmos DB への書き込みを記録する"""
+    writes = {"replaced": [], "patched": [], "requested": []}
+    
+    async def update_item(container_name, item):
+        writes["replaced"].append(item)
+        return item
+    
+    async def patch_item(container_name, item_id, partition_key, operations):
+        writes["patched"].append({operation["path"]: operation["value"] for operation in operations})
+    
+    async def upsert_item(container_name, item):
+        writes["requested"].append((container_name, item))
+        return item
+    
+    async def remove_job(job_id):
+        return False
+    
+    monkeypatch.setattr(main.cosmos_client, "update_item", update_item)
+    monkeypatch.setattr(main.cosmos_client, "patch_item", patch_item)
+    monkeypatch.setattr(main.cosmos_client, "upsert_item", upsert_item)
+    monkeypatch.setattr(orchestrator.job_queue, "remove_job", remove_job)
+    return writes
+
+
+@pytest.mark.asyncio
+async def test_cancel_job_does_not_overwrite_completed_job(orchestrator, cancellation, monkeypatch):
+    # 最初の読み込み後、キャンセルが届く前にジョブが完了した
+    snapshots = [_stored_job(SlideGenerationStatus.SLIDE_CREATION), _stored_job(SlideGenerationStatus.COMPLETED)]
+    
+    async def read_item(container_name, item_id, partition_key):
+        return snapshots.pop(0) if container_name == "slide_jobs" else None
+    
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    job = await orchestrator.cancel_job("job-1", "user-1")
+    
+    assert job.status == "completed"
+    assert cancellation["replaced"] == []
+    assert cancellation["patched"] == []
+
+
+@pytest.mark.asyncio
+async def test_cancel_job_on_other_replica_patches_status_and_records_request(orchestrator, cancellation, monkeypatch):
+    async def read_item(container_name, item_id, partition_key):
+        return _stored_job(SlideGenerationStatus.SLIDE_CREATION) if container_name == "slide_jobs" else None
+    
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    job = await orchestrator.cancel_job("job-1", "user-1")
+    
+    assert job.status == "cancelled"
+    assert cancellation["requested"] == [("job_cancellations", {"id": "job-1", "user_id": "user-1"})]
+    # 結果やチェックポイントを上書きしないよう、状態の項目だけを書き込む
+    assert cancellation["replaced"] == []
+    assert set(cancellation["patched"][0]) == {"/status", "/current_step", "/queue_position", "/updated_at"}
+    assert cancellation["patched"][0]["/status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stops_on_cancel_request_from_other_replica(orchestrator, cancellation, monkeypatch):
+    async def read_item(container_name, item_id, partition_key):
+        return {"id": item_id, "user_id": partition_key} if container_name == "job_cancellations" else None
+    
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    job = SlideGenerationJob(**_stored_job(SlideGenerationStatus.AGENDA_GENERATION, owner_id=orchestrator.instance_id))
+    
+    with pytest.raises(asyncio.CancelledError):
+        await orchestrator._stop_if_cancel_requested(job)
+    assert job.id in orchestrator._cancelled_jobs
+    assert cancellation["patched"][0]["/status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_second_approval_is_rejected(orchestrator, monkeypatch):
+    stored = _stored_job(SlideGenerationStatus.AGENDA_APPROVAL, owner_id=orchestrator.instance_id)
+    stored["deadline"] = stored["updated_at"]
+    enqueued = []
+    
+    async def read_item(container_name, item_id, partition_key):
+        return stored if container_name == "slide_jobs" else None
+    
+    async def update_item(container_name, item):
+        stored.update(item)
+        return item
+    
+    async def enqueue(job, kind, weight=None):
+        enqueued.append(kind)
+    
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    monkeypatch.setattr(main.cosmos_client, "update_item", update_item)
+    monkeypatch.setattr(orchestrator, "_enqueue", enqueue)
+    approval = AgentRequest(
+        request_id="request-1",
+        agent_type="agenda_approval",
+        payload={"job_id": "job-1", "approved": True},
+        user_id="user-1"
+    )
+    
+    assert (await orchestrator._handle_agenda_approval(approval)).success
+    assert stored["status"] == SlideGenerationStatus.PENDING
+    
+    # 重ねて届いた承認はキューに入れず、期限も延ばさない
+    deadline = stored["deadline"]
+    assert not (await orchestrator._handle_agenda_approval(approval)).success
+    assert enqueued == ["continue_after_approval"]
+    assert stored["deadline"] == deadline
+
+
+@pytest.mark.asyncio
+async def test_duplicate_queue_entry_for_running_job_is_dropped(orchestrator, monkeypatch):
+    async def read_item(container_name, item_id, partition_key):
+        return _stored_job(SlideGenerationStatus.PENDING, owner_id=orchestrator.instance_id)
+    
+    started = []
+    
+    async def continue_after_approval(job):
+        started.append(job.id)
+    
+    monkeypatch.setattr(main.cosmos_client, "read_item", read_item)
+    monkeypatch.setattr(orchestrator, "_continue_after_approval", continue_after_approval)
+    running = asyncio.create_task(asyncio.sleep(60))
+    orchestrator._job_tasks["job-1"] = running
+    
+    await orchestrator._run_queue_entry(JobQueueEntry(
+        id="entry-2", job_id="job-1", user_id="user-1", kind="continue_after_approval"
+    ))
+    
+    assert started == []
+    assert orchestrator._job_tasks["job-1"] is running
+    running.cancel()
+
+
+def test_information_requests_are_routed_by_batch(orchestrator):
+    job = SlideGenerationJob(**_stored_job(SlideGenerationStatus.INFORMATION_COLLECTION))
+    assert orchestrator._session_key(job, "information") == job.id
+    
+    job.batch_id = "batch-1"
+    # バッチ内の取得をまとめられるよう、同じバッチの情報収集は同じレプリカへ振り分ける
+    assert orchestrator._session_key(job, "information") == "batch-1"
+    assert orchestrator._session_key(job, "slide") == job.id
+
+
+def _agenda(titles) -> SlideAgenda:
+    return SlideAgenda(
+        slides=[
+            SlideContent(page_number=index + 1, title=title, content=f"{title} の内容")
+            for index, title in enumerate(titles)
+        ],
+        total_pages=len(titles),
+        estimated_duration=5
+    )
+
+
+@pytest.mark.parametrize("titles, reuse, changed", [
+    # 同じアジェンダはすべて流用する
+    (["A", "B", "C", "D"], {0: 0, 1: 1, 2: 2, 3: 3}, []),
+    # 並べ替え（1 ページ目との入れ替えはタイトルレイアウトが変わるため作り直す）
+    (["A", "D", "B", "C"], {0: 0, 1: 3, 2: 1, 3: 2}, []),
+    (["B", "A", "C", "D"], {2: 2, 3: 3}, [1, 2]),
+    # 挿入
+    (["A", "B", "X", "C", "D"], {0: 0, 1: 1, 3: 2, 4: 3}, [3]),
+    # 削除
+    (["A", "C", "D"], {0: 0, 1: 2, 2: 3}, []),
+    # 重複（前のデッキの 1 枚は 1 か所でだけ流用する）
+    (["A", "B", "B", "C"], {0: 0, 1: 1, 3: 2}, [3]),
+])
+def test_diff_agenda(orchestrator, titles, reuse, changed):
+    actual_reuse, actual_changed = orchestrator._diff_agenda(_agenda(["A", "B", "C", "D"]), _agenda(titles))
+    
+    assert actual_reuse == reuse
+    assert [slide.page_number for slide in actual_changed] == changed
+
+
+def test_diff_agenda_rerenders_edited_slide(orchestrator):
+    agenda = _agenda(["A", "B", "C"])
+    agenda.slides[1].notes = "発表者ノート"
+    
+    reuse, changed = orchestrator._diff_agenda(_agenda(["A", "B", "C"]), agenda)
+    
+    assert reuse == {0: 0, 2: 2}
+    assert [slide.title for slide in changed] == ["B"]
@@ -0,0 +1,66 @@
+import pytest
+
+from backend.shared import resilience
+from backend.shared.config import settings
+from backend.shared.resilience import AdmissionController, CircuitBreaker, StageCaller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(settings.circuit_breaker_min_calls):
+        breaker.record_failure()
+
+
+def test_admission_recovers_after_open_period(clock):
+    stage_caller = StageCaller()
+    admission = AdmissionController(stage_caller, queue_wait=lambda: 0.0)
+    breaker = stage_caller.breaker("agenda")
+    
+    trip(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert admission.evaluate()[0] == "circuit_open"
+    
+    # open の保持時間を過ぎれば half_open になり、試行の呼び出しのためにジョブを受け付ける
+    clock.now += settings.circuit_breaker_open_seconds + 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert admission.check() is None
+    assert breaker.allow()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert admission.evaluate() is None
+
+
+def test_error_rate_window_expires(clock):
+    stage_caller = StageCaller()
+    admission = AdmissionController(stage_caller, queue_wait=lambda: 0.0)
+    breaker = stage_caller.breaker("review")
+    
+    # ブレーカーは開かないがアドミッションの閾値は超えるエラー率
+    failures = settings.circuit_breaker_min_calls // 2
+    for i in range(settings.circuit_breaker_min_calls):
+        if i < failures:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert admission.evaluate()[0] == "error_rate"
+    
+    # 呼び出しがなくてもウィンドウの時間を過ぎた結果は捨てられる
+    clock.now += settings.circuit_breaker_window_seconds + 1
+    assert breaker.calls == 0
+    assert admission.evaluate() is None
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from backend.shared.jobs.scheduler import FairShareScheduler
+from backend.shared.models import JobQueueEntry
+
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def _entries(*specs) -> list:
+    """(エントリID, ユーザーID[, 重み]) を投入順に並べたエントリ"""
+    return [
+        JobQueueEntry(
+            id=spec[0], job_id=f"job-{spec[0]}", user_id=spec[1], kind="slide_generation",
+            weight=spec[2] if len(spec) > 2 else 1.0, enqueued_at=BASE_TIME + timedelta(seconds=index)
+        )
+        for index, spec in enumerate(specs)
+    ]
+
+
+def _ids(entries) -> list:
+    return [entry.id for entry in entries]
+
+
+def test_users_are_interleaved_regardless_of_submission_order():
+    pending = _entries(("a1", "alice"), ("a2", "alice"), ("a3", "alice"), ("b1", "bob"), ("b2", "bob"))
+    
+    # 先にまとめて投入したユーザーが後続のユーザーを待たせない
+    assert _ids(FairShareScheduler().order(pending)) == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_weight_gives_proportional_share():
+    pending = _entries(
+        ("a1", "alice"), ("a2", "alice"),
+        ("c1", "carol", 2.0), ("c2", "carol", 2.0), ("c3", "carol", 2.0), ("c4", "carol", 2.0)
+    )
+    
+    assert _ids(FairShareScheduler().order(pending)) == ["c1", "a1", "c2", "c3", "a2", "c4"]
+
+
+def test_late_user_does_not_get_credit_for_idle_time():
+    scheduler = FairShareScheduler()
+    pending = _entries(("a1", "alice"), ("a2", "alice"), ("a3", "alice"), ("a4", "alice"))
+    for entry in scheduler.order(pending)[:2]:
+        scheduler.on_start(entry)
+        pending.remove(entry)
+    
+    # 後から来たユーザーは現在の仮想時刻から並ぶため、待っていた時間の分だけ連続して割り込むことはない
+    pending += _entries(("b1", "bob"), ("b2", "bob"), ("b3", "bob"))
+    for entry in pending[-3:]:
+        entry.enqueued_at += timedelta(minutes=1)
+    assert _ids(scheduler.order(pending)) == ["b1", "a3", "b2", "a4", "b3"]
+
+
+def test_running_cap_per_user():
+    scheduler = FairShareScheduler(max_running_per_user=2)
+    pending = _entries(("a1", "alice"), ("a2", "alice"), ("a3", "alice"), ("b1", "bob"))
+    for entry in scheduler.select(pending)[:2]:
+        scheduler.on_start(entry)
+        pending.remove(entry)
+    assert scheduler.running("alice") == 1
+    
+    started = scheduler.select(pending)[0]
+    scheduler.on_start(started)
+    pending.remove(started)
+    assert started.id == "a2"
+    assert scheduler.running("alice") == 2
+    
+    # 上限に達したユーザーのエントリは選ばれず、他のユーザーは影響を受けない
+    assert _ids(scheduler.select(pending)) == []
+    pending += _entries(("c1", "carol"))
+    assert _ids(scheduler.select(pending)) == ["c1"]
+    
+    scheduler.on_finish(started)
+    assert scheduler.running("alice") == 1
+    assert "a3" in _ids(scheduler.select(pending))
+
+
+def test_no_running_cap_when_disabled():
+    scheduler = FairShareScheduler(max_running_per_user=0)
+    pending = _entries(("a1", "alice"), ("a2", "alice"), ("a3", "alice"))
+    for entry in list(pending):
+        scheduler.on_start(entry)
+    
+    assert scheduler.can_start(_entries(("a4", "alice"))[0])
@@ -0,0 +1,103 @@
+import pytest
+
+from backend.shared.cache import MinHashLSHIndex, similarity_index
+
+
+TEXT = "Azure Functions の概要とユースケースを説明する 10 枚のプレゼンテーション"
+PARAPHRASE = "Azure Functions の概要とユースケースを紹介する 10 枚のプレゼンテーション"
+OTHER = "社内向けの四半期売上報告とマーケティング施策の振り返り資料"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(similarity_index.time, "monotonic", clock)
+    return clock
+
+
+def _assert_buckets_consistent(index: MinHashLSHIndex):
+    """バケットには登録中のキーだけが残り、空のバケットは残らない"""
+    for bucket in index._buckets.values():
+        assert bucket
+        assert bucket <= set(index._entries)
+    assert sum(len(bucket) for bucket in index._buckets.values()) == index.bands * len(index)
+
+
+def test_query_finds_paraphrase_within_scope():
+    index = MinHashLSHIndex(max_entries=10, ttl_seconds=60)
+    index.add("deck", TEXT, "value", scope="user-1")
+    
+    value, similarity = index.query(PARAPHRASE, scope="user-1")
+    assert value == "value"
+    assert similarity > 0.5
+    assert index.query(PARAPHRASE, scope="user-2") is None
+    assert index.query(OTHER, scope="user-1") is None
+
+
+def test_remove_cleans_up_buckets():
+    index = MinHashLSHIndex(max_entries=10, ttl_seconds=60)
+    index.add("deck", TEXT, "deck", scope="user-1")
+    index.add("other", OTHER, "other", scope="user-1")
+    
+    index.remove("deck")
+    index.remove("missing")
+    
+    assert len(index) == 1
+    _assert_buckets_consistent(index)
+    assert index.query(TEXT, scope="user-1") is None
+    
+    index.remove("other")
+    assert index._buckets == {}
+
+
+def test_add_replaces_existing_key():
+    index = MinHashLSHIndex(max_entries=10, ttl_seconds=60)
+    index.add("deck", TEXT, "old", scope="user-1")
+    index.add("deck", OTHER, "new", scope="user-2")
+    
+    assert len(index) == 1
+    _assert_buckets_consistent(index)
+    assert index.query(TEXT, scope="user-1") is None
+    assert index.query(OTHER, scope="user-2") == ("new", 1.0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    index = MinHashLSHIndex(max_entries=2, ttl_seconds=60)
+    index.add("first", TEXT, "first")
+    index.add("second", OTHER, "second")
+    
+    # 照合されたエントリは最近使われたものとして残る
+    assert index.query(TEXT) == ("first", 1.0)
+    index.add("third", "スライド生成エージェントのアーキテクチャ解説", "third")
+    
+    assert len(index) == 2
+    assert "second" not in index._entries
+    assert index.query(OTHER) is None
+    assert index.query(TEXT) == ("first", 1.0)
+    _assert_buckets_consistent(index)
+
+
+def test_expired_entry_is_removed_on_query(clock):
+    index = MinHashLSHIndex(max_entries=10, ttl_seconds=60)
+    index.add("deck", TEXT, "deck")
+    
+    clock.now += 59
+    assert index.query(TEXT) == ("deck", 1.0)
+    
+    clock.now += 1
+    assert index.query(TEXT) is None
+    assert len(index) == 0
+    assert index._buckets == {}
+
+
+def test_num_perm_must_be_divisible_by_bands():
+    with pytest.raises(ValueError):
+        MinHashLSHIndex(max_entries=10, ttl_seconds=60, num_perm=100, bands=32)
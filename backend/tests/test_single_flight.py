@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from backend.shared.cache import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_followers_share_leader_result():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await release.wait()
+        return "result"
+    
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await leader == ("result", False)
+    assert await follower == ("result", True)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            await asyncio.sleep(3600)
+        await asyncio.sleep(0)
+        return "result"
+    
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    followers = [asyncio.create_task(flight.do("key", fetch)) for _ in range(2)]
+    await asyncio.sleep(0)
+    
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    
+    # 待機者の 1 つが取得をやり直し、残りはその結果を共有する
+    results = await asyncio.gather(*followers)
+    assert sorted(results) == [("result", False), ("result", True)]
+    assert len(calls) == 2
+    assert "key" not in flight
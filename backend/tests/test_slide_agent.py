@@ -0,0 +1,148 @@
+import io
+
+import pytest
+from pptx import Presentation
+
+from backend.agents.slide_agent import main
+from backend.agents.slide_agent.main import SlideCreationExecutor, _SlideSession
+from backend.shared.models import AgentRequest, SlideAgenda, SlideContent
+
+
+def _session() -> _SlideSession:
+    agenda = SlideAgenda(
+        slides=[SlideContent(page_number=1, title="概要", content="内容")],
+        total_pages=1,
+        estimated_duration=5
+    )
+    return _SlideSession(Presentation(), agenda, "user-1", include_images=False, include_tables=False)
+
+
+@pytest.mark.asyncio
+async def test_cancel_discards_session():
+    executor = SlideCreationExecutor()
+    executor._sessions["session-1"] = _session()
+    
+    assert await executor.cancel("session-1")
+    assert "session-1" not in executor._sessions
+    
+    response = await executor.execute(AgentRequest(
+        request_id="request-1",
+        agent_type="finalize_slides",
+        payload={"session_id": "session-1"},
+        user_id="user-1"
+    ))
+    assert not response.success
+    assert response.error == "Slide session not found"
+
+
+@pytest.mark.asyncio
+async def test_failed_render_discards_session(monkeypatch):
+    executor = SlideCreationExecutor()
+    executor._sessions["session-1"] = _session()
+    
+    async def fail_render(session, flush):
+        raise RuntimeError("render failed")
+    
+    monkeypatch.setattr(executor, "_render_ready_slides", fail_render)
+    response = await executor.execute(AgentRequest(
+        request_id="request-1",
+        agent_type="add_slide_information",
+        payload={"session_id": "session-1", "page_number": 1, "information": {}},
+        user_id="user-1"
+    ))
+    
+    assert not response.success
+    assert "session-1" not in executor._sessions
+
+
+def _agenda(titles) -> SlideAgenda:
+    return SlideAgenda(
+        slides=[
+            SlideContent(page_number=index + 1, title=title, content=f"{title} の内容")
+            for index, title in enumerate(titles)
+        ],
+        total_pages=len(titles),
+        estimated_duration=5
+    )
+
+
+def _titles(data: bytes) -> list:
+    return [slide.shapes.title.text for slide in Presentation(io.BytesIO(data)).slides]
+
+
+@pytest.fixture
+def previous_deck(monkeypatch):
+    """A〜D の 4 枚のデッキを前回の結果として置き、アップロードされたデッキを記録する"""
+    executor = SlideCreationExecutor()
+    prs = Presentation()
+    for slide in _agenda(["A", "B", "C", "D"]).slides:
+        executor._render_slide(prs, slide, {}, [], False, prs.slide_layouts)
+    previous = executor._save_presentation(prs)
+    uploaded = []
+    
+    async def download_file(blob_url):
+        return previous if blob_url == "previous.pptx" else None
+    
+    async def upload_bytes(data, file_name, user_id, file_type="pptx"):
+        uploaded.append(data)
+        return f"updated-{len(uploaded)}.pptx"
+    
+    monkeypatch.setattr(main.blob_client, "download_file", download_file)
+    monkeypatch.setattr(main.blob_client, "upload_bytes", upload_bytes)
+    return executor, uploaded
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("titles, reuse", [
+    # 並べ替え（1 ページ目はレイアウトが変わるため作り直す）
+    (["A", "D", "B", "C"], {1: 3, 2: 1, 3: 2}),
+    (["B", "A", "C", "D"], {2: 2, 3: 3}),
+    # 挿入
+    (["A", "B", "X", "C", "D"], {0: 0, 1: 1, 3: 2, 4: 3}),
+    # 削除
+    (["A", "C", "D"], {0: 0, 1: 2, 2: 3}),
+    # 同じ内容のスライドが重複（前のデッキの 1 枚は 1 か所でだけ流用する）
+    (["A", "B", "B", "C"], {0: 0, 1: 1, 3: 2}),
+])
+async def test_update_slides_saves_deck_in_agenda_order(previous_deck, titles, reuse):
+    executor, uploaded = previous_deck
+    response = await executor.execute(AgentRequest(
+        request_id="request-1",
+        agent_type="update_slides",
+        payload={
+            "base_slide_url": "previous.pptx",
+            "agenda": _agenda(titles).dict(),
+            "reuse": {str(index): previous_index for index, previous_index in reuse.items()},
+            "information": {},
+            "include_images": False,
+            "include_tables": False
+        },
+        user_id="user-1"
+    ))
+    
+    assert response.success, response.error
+    assert response.result["reused"] == len(reuse)
+    assert response.result["rendered"] == len(titles) - len(reuse)
+    assert _titles(uploaded[0]) == titles
+    # 使わなくなったスライドはパッケージにも残さない
+    package = Presentation(io.BytesIO(uploaded[0])).part.package
+    slide_parts = [part for part in package.iter_parts() if part.partname.startswith("/ppt/slides/slide")]
+    assert len(slide_parts) == len(titles)
+
+
+@pytest.mark.asyncio
+async def test_update_slides_rejects_reuse_outside_previous_deck(previous_deck):
+    executor, uploaded = previous_deck
+    response = await executor.execute(AgentRequest(
+        request_id="request-1",
+        agent_type="update_slides",
+        payload={
+            "base_slide_url": "previous.pptx",
+            "agenda": _agenda(["A", "E"]).dict(),
+            "reuse": {"0": 0, "1": 4}
+        },
+        user_id="user-1"
+    ))
+    
+    assert not response.success
+    assert uploaded == []
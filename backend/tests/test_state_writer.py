@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from backend.shared.jobs import JobStateWriter, state_writer
+from backend.shared.models import SlideGenerationJob, SlideGenerationRequest, SlideGenerationStatus
+
+
+@pytest.mark.asyncio
+async def test_flush_keeps_lock_while_another_flush_waits(monkeypatch):
+    gate = asyncio.Event()
+    
+    async def update_item(container_name, item):
+        await gate.wait()
+        return item
+    
+    monkeypatch.setattr(state_writer.cosmos_client, "update_item", update_item)
+    writer = JobStateWriter(debounce_seconds=60)
+    job = SlideGenerationJob(
+        id="job-1",
+        user_id="user-1",
+        request=SlideGenerationRequest(prompt="テスト"),
+        status=SlideGenerationStatus.AGENDA_GENERATION
+    )
+    
+    writing = asyncio.create_task(writer.submit(job, full=True, immediate=True))
+    await asyncio.sleep(0)
+    lock = writer._locks[job.id]
+    waiting = asyncio.create_task(writer._flush(job.id))
+    await asyncio.sleep(0)
+    
+    gate.set()
+    await asyncio.sleep(0)
+    # 書き込みが終わっても、ロックを待っている呼び出しがいる間は同じロックを使い続ける
+    assert writing.done()
+    assert writer._locks.get(job.id) is lock
+    
+    await waiting
+    assert job.id not in writer._locks
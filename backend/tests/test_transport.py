@@ -0,0 +1,35 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from backend.shared.transport import inprocess
+from backend.shared.transport.inprocess import InProcessTransport
+
+
+# InProcessTransport が読み込むエージェントモジュールの代わり
+app = object()
+events = []
+executor = object()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    events.append("startup")
+    yield
+    events.append("shutdown")
+
+
+@pytest.mark.asyncio
+async def test_inprocess_transport_runs_agent_lifespans(monkeypatch):
+    monkeypatch.setattr(inprocess, "AGENT_MODULES", {"fake": __name__})
+    events.clear()
+    transport = InProcessTransport()
+    
+    await transport.start()
+    await transport.start()
+    assert events == ["startup"]
+    assert transport.executor("fake") is executor
+    
+    await transport.aclose()
+    await transport.aclose()
+    assert events == ["startup", "shutdown"]
@@ -1,7 +1,12 @@
 import { useState, useEffect } from 'react';
 import { useMsal } from '@azure/msal-react';
-import apiService from '../services/apiService';
-import { SlideGenerationJob } from '../types';
+import apiService, { JobEvent } from '../services/apiService';
+import { SlideAgenda, SlideGenerationJob } from '../types';
+
+const MAX_STREAM_RETRIES = 3;
+
+const isFinished = (status?: string) =>
+  status === 'completed' || status === 'failed' || status === 'cancelled';
 
 export const useSlideGeneration = () => {
   const [currentJob, setCurrentJob] = useState<SlideGenerationJob | null>(null);
@@ -26,8 +31,8 @@ export const useSlideGeneration = () => {
       
       const response = await apiService.generateSlides(request);
       
-      // Start polling for job status
-      pollJobStatus(response.job_id);
+      // Start watching job progress
+      watchJob(response.job_id);
       
       return response;
     } catch (error: any) {
@@ -37,13 +42,44 @@ export const useSlideGeneration = () => {
     }
   };
 
+  // Receive job progress via Server-Sent Events, resuming from the last event id on reconnect
+  const watchJob = async (jobId: string) => {
+    let lastEventId: string | undefined;
+    let finished = false;
+
+    const applyEvent = (event: JobEvent) => {
+      if (event.type === 'snapshot') {
+        setCurrentJob(event.data as SlideGenerationJob);
+      } else {
+        setCurrentJob((prev) => (prev ? { ...prev, ...event.data } : prev));
+      }
+
+      if (isFinished(event.data.status)) {
+        finished = true;
+        setIsGenerating(false);
+      }
+    };
+
+    for (let attempt = 0; attempt < MAX_STREAM_RETRIES && !finished; attempt++) {
+      try {
+        lastEventId = await apiService.streamJobEvents(jobId, applyEvent, lastEventId);
+      } catch (error) {
+        // Retry below, then fall back to polling
+      }
+    }
+
+    if (!finished) {
+      pollJobStatus(jobId);
+    }
+  };
+
   const pollJobStatus = async (jobId: string) => {
     const pollInterval = setInterval(async () => {
       try {
         const job = await apiService.getJobStatus(jobId);
         setCurrentJob(job);
         
-        if (job.status === 'completed' || job.status === 'failed') {
+        if (isFinished(job.status)) {
           clearInterval(pollInterval);
           setIsGenerating(false);
         }
@@ -61,10 +97,8 @@ export const useSlideGeneration = () => {
     try {
       await apiService.approveAgenda(jobId, approved, agenda);
       
-      if (approved) {
-        // Continue polling for job status
-        pollJobStatus(jobId);
-      } else {
+      // The job event stream stays open while awaiting approval, so progress continues to arrive
+      if (!approved) {
         setCurrentJob(null);
         setIsGenerating(false);
       }
@@ -73,12 +107,48 @@ export const useSlideGeneration = () => {
     }
   };
 
+  const cancelJob = async (jobId: string) => {
+    try {
+      await apiService.cancelJob(jobId);
+      setIsGenerating(false);
+    } catch (error: any) {
+      setError(error.message || 'ジョブのキャンセルに失敗しました');
+    }
+  };
+
+  // Resume a failed or cancelled job from its first incomplete stage
+  const retryJob = async (jobId: string) => {
+    try {
+      setError(null);
+      await apiService.retryJob(jobId);
+      setIsGenerating(true);
+      watchJob(jobId);
+    } catch (error: any) {
+      setError(error.message || 'ジョブの再開に失敗しました');
+    }
+  };
+
+  // Regenerate a completed deck from an edited agenda; only changed slides are rebuilt
+  const regenerateJob = async (jobId: string, agenda: SlideAgenda) => {
+    try {
+      setError(null);
+      await apiService.regenerateJob(jobId, agenda);
+      setIsGenerating(true);
+      watchJob(jobId);
+    } catch (error: any) {
+      setError(error.message || 'スライドの再生成に失敗しました');
+    }
+  };
+
   return {
     currentJob,
     isGenerating,
     error,
     generateSlides,
     approveAgenda,
+    cancelJob,
+    retryJob,
+    regenerateJob,
     setError,
   };
 };
\ No newline at end of file
@@ -37,6 +37,8 @@ const HomePage: React.FC = () => {
     error: generationError,
     generateSlides,
     approveAgenda,
+    cancelJob,
+    retryJob,
     setError: setGenerationError,
   } = useSlideGeneration();
 
@@ -58,6 +60,7 @@ const HomePage: React.FC = () => {
   const [autoApproval, setAutoApproval] = useState(false);
   const [includeImages, setIncludeImages] = useState(true);
   const [includeTables, setIncludeTables] = useState(true);
+  const [bypassCache, setBypassCache] = useState(false);
   
   // Agenda approval
   const [agendaDialog, setAgendaDialog] = useState(false);
@@ -123,6 +126,7 @@ const HomePage: React.FC = () => {
       auto_approval: autoApproval,
       include_images: includeImages,
       include_tables: includeTables,
+      bypass_cache: bypassCache,
     };
 
     try {
@@ -146,6 +150,21 @@ const HomePage: React.FC = () => {
     await approveAgenda(currentJob.id, false);
   };
 
+  const handleCancelJob = async () => {
+    if (!currentJob) return;
+    
+    setAgendaDialog(false);
+    await cancelJob(currentJob.id);
+  };
+
+  const handleRetryJob = async () => {
+    if (!currentJob) return;
+    
+    await retryJob(currentJob.id);
+  };
+
+  const canRetry = !isGenerating && (currentJob?.status === 'failed' || currentJob?.status === 'cancelled');
+
   return (
     <Box>
       <Typography variant="h4" gutterBottom>
@@ -165,7 +184,24 @@ const HomePage: React.FC = () => {
           <Typography variant="body2" color="text.secondary">
             {currentJob.current_step}
           </Typography>
+          {currentJob.queue_position != null && (
+            <Typography variant="body2" color="text.secondary">
+              キュー待ち: {currentJob.queue_position} 番目
+            </Typography>
+          )}
+          {currentJob.status === 'agenda_generation' && currentJob.agenda && (
+            <Box sx={{ mt: 1 }}>
+              {currentJob.agenda.slides.map((slide) => (
+                <Typography key={slide.page_number} variant="body2">
+                  {slide.page_number}. {slide.title}
+                </Typography>
+              ))}
+            </Box>
+          )}
           <ProgressAnimation />
+          <Button variant="outlined" color="error" onClick={handleCancelJob} sx={{ mt: 2 }}>
+            キャンセル
+          </Button>
         </Paper>
       )}
 
@@ -175,6 +211,20 @@ const HomePage: React.FC = () => {
         </Alert>
       )}
 
+      {canRetry && (
+        <Alert
+          severity="warning"
+          sx={{ mb: 3 }}
+          action={
+            <Button color="inherit" size="small" onClick={handleRetryJob}>
+              再開
+            </Button>
+          }
+        >
+          {currentJob?.error_message || currentJob?.current_step}
+        </Alert>
+      )}
+
       <Paper sx={{ p: 3 }}>
         <Grid container spacing={3}>
           <Grid item xs={12}>
@@ -305,6 +355,16 @@ const HomePage: React.FC = () => {
                 }
                 label="テーブルを含める"
               />
+              <FormControlLabel
+                control={
+                  <Switch
+                    checked={bypassCache}
+                    onChange={(e) => setBypassCache(e.target.checked)}
+                    disabled={!isAuthenticated}
+                  />
+                }
+                label="キャッシュを使わずに再生成"
+              />
             </Box>
           </Grid>
 
@@ -332,6 +392,13 @@ const HomePage: React.FC = () => {
               <Typography variant="body1" gutterBottom>
                 以下のアジェンダでスライドを生成します。内容を確認してください。
               </Typography>
+              {currentJob?.agenda_draft_similarity != null && (
+                <Alert severity="info" sx={{ mb: 2 }}>
+                  類似したリクエストのアジェンダを下書きとして表示しています（類似度{' '}
+                  {Math.round(currentJob.agenda_draft_similarity * 100)}%）。新しく生成する場合は
+                  「キャッシュを使わずに再生成」を有効にして再度生成してください。
+                </Alert>
+              )}
               <Typography variant="body2" color="text.secondary" gutterBottom>
                 推定時間: {pendingAgenda.estimated_duration}分
               </Typography>
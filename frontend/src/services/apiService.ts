@@ -2,6 +2,8 @@ import axios from 'axios';
 import { 
   SlideGenerationRequest, 
   SlideGenerationJob, 
+  SlideGenerationBatchStatus,
+  SlideAgenda,
   SlideTemplate, 
   PromptTemplate, 
   LLMConfig, 
@@ -39,6 +41,33 @@ apiClient.interceptors.response.use(
   }
 );
 
+export interface JobEvent {
+  id?: string;
+  type: 'snapshot' | 'update';
+  data: Partial<SlideGenerationJob> & { job_id?: string };
+}
+
+const parseSseEvent = (block: string): JobEvent | null => {
+  let id: string | undefined;
+  let type = 'update';
+  const dataLines: string[] = [];
+
+  block.split('\n').forEach((line) => {
+    if (line.startsWith('id:')) {
+      id = line.slice(3).trim();
+    } else if (line.startsWith('event:')) {
+      type = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trim());
+    }
+  });
+
+  if (dataLines.length === 0) {
+    return null;
+  }
+  return { id, type: type as JobEvent['type'], data: JSON.parse(dataLines.join('\n')) };
+};
+
 export const apiService = {
   // Slide generation
   async generateSlides(request: SlideGenerationRequest): Promise<{ job_id: string; status: string }> {
@@ -60,6 +89,84 @@ export const apiService = {
     return response.data;
   },
 
+  // Server-Sent Events でジョブの進捗を受信する（EventSource は Authorization ヘッダーを送れないため fetch を使用）
+  async streamJobEvents(
+    jobId: string,
+    onEvent: (event: JobEvent) => void,
+    lastEventId?: string,
+    signal?: AbortSignal
+  ): Promise<string | undefined> {
+    const token = localStorage.getItem('authToken');
+    const headers: Record<string, string> = { Accept: 'text/event-stream' };
+    if (token) {
+      headers.Authorization = `Bearer ${token}`;
+    }
+    if (lastEventId) {
+      headers['Last-Event-ID'] = lastEventId;
+    }
+
+    const response = await fetch(`${API_BASE_URL}/jobs/${jobId}/events`, { headers, signal });
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to open job event stream: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let latestId = lastEventId;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const event = parseSseEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        if (event) {
+          latestId = event.id ?? latestId;
+          onEvent(event);
+        }
+        boundary = buffer.indexOf('\n\n');
+      }
+    }
+
+    return latestId;
+  },
+
+  async cancelJob(jobId: string): Promise<{ job_id: string; status: string }> {
+    const response = await apiClient.delete(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  async generateSlidesBatch(
+    requests: SlideGenerationRequest[]
+  ): Promise<{ batch_id: string; job_ids: string[]; total: number }> {
+    const response = await apiClient.post('/generate-slides/batch', { requests });
+    return response.data;
+  },
+
+  async getBatchStatus(batchId: string): Promise<SlideGenerationBatchStatus> {
+    const response = await apiClient.get(`/batches/${batchId}`);
+    return response.data;
+  },
+
+  async retryJob(jobId: string): Promise<{ job_id: string; status: string }> {
+    const response = await apiClient.post(`/jobs/${jobId}/retry`);
+    return response.data;
+  },
+
+  async regenerateJob(
+    jobId: string,
+    agenda: SlideAgenda
+  ): Promise<{ job_id: string; status: string; version: number }> {
+    const response = await apiClient.post(`/jobs/${jobId}/regenerate`, agenda);
+    return response.data;
+  },
+
   async getUserJobs(): Promise<SlideGenerationJob[]> {
     const response = await apiClient.get('/jobs');
     return response.data;
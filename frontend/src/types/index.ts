@@ -53,22 +53,57 @@ export interface SlideGenerationRequest {
   auto_approval: boolean;
   include_images: boolean;
   include_tables: boolean;
+  bypass_cache?: boolean;
+  latency_target_seconds?: number;
 }
 
 export interface SlideGenerationJob {
   id: string;
   user_id: string;
   request: SlideGenerationRequest;
-  status: 'pending' | 'agenda_generation' | 'agenda_approval' | 'information_collection' | 'slide_creation' | 'review' | 'completed' | 'failed';
+  status: 'pending' | 'agenda_generation' | 'agenda_approval' | 'information_collection' | 'slide_creation' | 'review' | 'completed' | 'failed' | 'cancelled';
   agenda?: SlideAgenda;
   progress: number;
   current_step: string;
   result_blob_url?: string;
   error_message?: string;
+  queue_position?: number | null;
+  versions?: DeckVersion[];
+  latency_target_seconds?: number | null;
+  deadline?: string | null;
+  degradations?: string[];
+  agenda_draft_similarity?: number | null;
+  llm_config?: Pick<LLMConfig, 'provider' | 'model_name' | 'temperature' | 'max_tokens'> | null;
   created_at: string;
   updated_at: string;
 }
 
+export interface DeckVersion {
+  version: number;
+  agenda: SlideAgenda;
+  result_blob_url: string;
+  information_blob_url?: string;
+  regenerated_pages: number[];
+  created_at: string;
+}
+
+export interface SlideGenerationBatchStatus {
+  batch_id: string;
+  total: number;
+  finished: number;
+  status: 'in_progress' | 'completed';
+  progress: number;
+  status_counts: Record<string, number>;
+  jobs: {
+    job_id: string;
+    status: SlideGenerationJob['status'];
+    progress: number;
+    current_step: string;
+    result_blob_url?: string;
+    error_message?: string;
+  }[];
+}
+
 export interface GenerationHistory {
   id: string;
   user_id: string;
@@ -85,6 +120,7 @@ export interface UserSettings {
   default_template_id?: string;
   auto_approval: boolean;
   notification_enabled: boolean;
+  latency_target_seconds?: number | null;
   created_at: string;
   updated_at: string;
 }
\ No newline at end of file